@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`archive` -- Archiving of the simulation files
+================================================================================
+
+.. module:: archive
+   :synopsis: Archiving of the simulation files
+
+.. inheritance-diagram:: pymontecarlo.program._penelope.archive
+
+The files of a simulation are archived in a ZIP after its results are
+imported.
+The :class:`Archiver` selects the files with include and exclude patterns,
+compresses them with a configurable codec and, optionally, archives them in
+a background thread, so that the results are returned before the archive
+is completed.
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import os
+import time
+import shutil
+import fnmatch
+import logging
+import tempfile
+import threading
+import zipfile
+from zipfile import ZipFile
+from concurrent.futures import ThreadPoolExecutor
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.program._penelope.settings import _parse_bool
+
+# Globals and constants variables.
+CODEC_OFF = 'off'
+CODEC_STORE = 'store'
+CODEC_DEFLATE = 'deflate'
+CODEC_BZIP2 = 'bzip2'
+CODEC_LZMA = 'lzma'
+CODEC_ZSTD = 'zstd'
+
+_COMPRESSIONS = {CODEC_STORE: zipfile.ZIP_STORED,
+                 CODEC_DEFLATE: zipfile.ZIP_DEFLATED,
+                 CODEC_BZIP2: zipfile.ZIP_BZIP2,
+                 CODEC_LZMA: zipfile.ZIP_LZMA}
+if hasattr(zipfile, 'ZIP_ZSTANDARD'): # Python 3.14+
+    _COMPRESSIONS[CODEC_ZSTD] = zipfile.ZIP_ZSTANDARD
+
+def _split_patterns(text):
+    if not text:
+        return ()
+    return tuple(pattern.strip() for pattern in text.split(',') if pattern.strip())
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+class Archiver(object):
+
+    def __init__(self, codec=CODEC_DEFLATE, level=None,
+                 includes=('*',), excludes=(), background=False):
+        """
+        Archives the files of simulations in ZIPs.
+
+        :arg codec: compression of the ZIP: :const:`CODEC_OFF` (no ZIP),
+            :const:`CODEC_STORE` (no compression), :const:`CODEC_DEFLATE`,
+            :const:`CODEC_BZIP2`, :const:`CODEC_LZMA` or
+            :const:`CODEC_ZSTD` (Python 3.14+)
+        :arg level: compression level (default: default level of the codec),
+            e.g. ``1`` for the fastest deflate compression
+        :arg includes: patterns (:mod:`fnmatch`) of the file names to archive
+        :arg excludes: patterns of the file names not to archive, even if
+            they match an include pattern (e.g. ``dump.dat``)
+        :arg background: whether to archive in a background thread.
+            The files are first linked (or copied, if they are on another
+            file system) next to the ZIP, so that the working directory can
+            be modified or removed right away.
+            Use :meth:`wait` to wait until all archives are completed.
+        """
+        if codec != CODEC_OFF and codec not in _COMPRESSIONS:
+            raise ValueError('Unknown or unsupported archive codec: %s' % codec)
+        self._codec = codec
+        self._level = level
+        self._includes = tuple(includes)
+        self._excludes = tuple(excludes)
+        self._background = background
+
+        self._executor = None
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '<%s(%s, level=%s, background=%s)>' % \
+            (self.__class__.__name__, self.codec, self.level, self.background)
+
+    @property
+    def codec(self):
+        """
+        Compression of the ZIP.
+        """
+        return self._codec
+
+    @property
+    def level(self):
+        """
+        Compression level or ``None`` for the default level of the codec.
+        """
+        return self._level
+
+    @property
+    def includes(self):
+        """
+        Patterns of the file names to archive.
+        """
+        return self._includes
+
+    @property
+    def excludes(self):
+        """
+        Patterns of the file names not to archive.
+        """
+        return self._excludes
+
+    @property
+    def background(self):
+        """
+        Whether the files are archived in a background thread.
+        """
+        return self._background
+
+    def is_archived(self, filename):
+        """
+        Returns whether a file is archived according to the include and
+        exclude patterns.
+        """
+        if not any(fnmatch.fnmatch(filename, pattern) for pattern in self._includes):
+            return False
+        return not any(fnmatch.fnmatch(filename, pattern) for pattern in self._excludes)
+
+    def archive(self, workdir, zipfilepath, exceptions=()):
+        """
+        Archives the files of *workdir* in *zipfilepath*.
+        An existing ZIP is replaced once the new one is completed.
+        Does nothing if the codec is :const:`CODEC_OFF`.
+
+        :arg workdir: directory containing the simulation files
+        :arg zipfilepath: path of the ZIP
+        :arg exceptions: names of the files never archived
+        """
+        if self._codec == CODEC_OFF:
+            return
+
+        filenames = [filename for filename in sorted(os.listdir(workdir))
+                     if filename not in exceptions and self.is_archived(filename)]
+
+        if not self._background:
+            self._write(workdir, filenames, zipfilepath)
+            return
+
+        # Snapshot of the files, the working directory may be modified
+        stagedir = tempfile.mkdtemp(prefix='.' + os.path.basename(zipfilepath),
+                                    dir=os.path.dirname(zipfilepath) or '.')
+        try:
+            for filename in filenames:
+                src = os.path.join(workdir, filename)
+                dst = os.path.join(stagedir, filename)
+                if os.path.isdir(src):
+                    os.mkdir(dst)
+                else:
+                    _link_or_copy(src, dst)
+        except:
+            shutil.rmtree(stagedir, ignore_errors=True)
+            raise
+
+        def _archive():
+            try:
+                self._write(stagedir, filenames, zipfilepath)
+            finally:
+                shutil.rmtree(stagedir, ignore_errors=True)
+
+        self._submit(_archive)
+
+    def append(self, zipfilepath, arcname, data):
+        """
+        Adds a file with the specified content to a ZIP, after the pending
+        archives are completed.
+        Does nothing if the ZIP does not exist or already contains the file.
+
+        :arg zipfilepath: path of the ZIP
+        :arg arcname: name of the file in the ZIP
+        :arg data: content of the file (:class:`str` or :class:`bytes`)
+        """
+        if self._codec == CODEC_OFF:
+            return
+
+        def _append():
+            if not os.path.exists(zipfilepath):
+                return
+            with ZipFile(zipfilepath, 'a', compression=self._get_compression(),
+                         compresslevel=self._level) as z:
+                if arcname not in z.namelist():
+                    z.writestr(arcname, data)
+
+        if self._background:
+            self._submit(_append)
+        else:
+            _append()
+
+    def wait(self):
+        """
+        Waits until all the archives submitted in the background are
+        completed.
+        Raises the first exception raised while archiving, if any.
+        """
+        with self._lock:
+            futures, self._futures = self._futures, []
+
+        error = None
+        for future in futures:
+            exception = future.exception()
+            if exception is not None and error is None:
+                error = exception
+
+        if error is not None:
+            raise error
+
+    def shutdown(self):
+        """
+        Waits until all the archives are completed and stops the background
+        thread.
+        """
+        try:
+            self.wait()
+        finally:
+            with self._lock:
+                executor, self._executor = self._executor, None
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+    def _submit(self, func):
+        with self._lock:
+            # A single thread, so that the archives are completed in order
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+            self._futures.append(self._executor.submit(func))
+
+    def _get_compression(self):
+        return _COMPRESSIONS[self._codec]
+
+    def _write(self, dirpath, filenames, zipfilepath):
+        start = time.perf_counter()
+
+        # Write under a temporary name first, so that a partially written ZIP
+        # is never seen
+        tmpfilepath = zipfilepath + '.tmp'
+        try:
+            with ZipFile(tmpfilepath, 'w', compression=self._get_compression(),
+                         compresslevel=self._level) as z:
+                for filename in filenames:
+                    z.write(os.path.join(dirpath, filename), filename)
+            os.replace(tmpfilepath, zipfilepath)
+        except:
+            if os.path.exists(tmpfilepath):
+                os.remove(tmpfilepath)
+            logging.exception('Archiving %s failed', zipfilepath)
+            raise
+
+        logging.debug('Archived %i files in %s (%s) in %.3fs', len(filenames),
+                      zipfilepath, self._codec, time.perf_counter() - start)
+
+def create_archiver(section):
+    """
+    Returns an :class:`Archiver` configured from the options of a settings
+    section:
+
+      * ``archive``: codec (default: ``deflate``)
+      * ``archivelevel``: compression level
+      * ``archiveinclude``: comma-separated patterns of the files to archive
+        (default: all files)
+      * ``archiveexclude``: comma-separated patterns of the files not to
+        archive
+      * ``archivebackground``: whether to archive in a background thread
+    """
+    codec = str(getattr(section, 'archive', CODEC_DEFLATE)).lower()
+
+    level = getattr(section, 'archivelevel', None)
+    if level is not None:
+        level = int(level)
+
+    includes = _split_patterns(getattr(section, 'archiveinclude', None)) or ('*',)
+    excludes = _split_patterns(getattr(section, 'archiveexclude', None))
+    background = _parse_bool(getattr(section, 'archivebackground', False))
+
+    return Archiver(codec, level, includes, excludes, background)
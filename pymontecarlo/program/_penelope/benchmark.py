@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`benchmark` -- Utilities to benchmark the PENELOPE programs
+================================================================================
+
+.. module:: benchmark
+   :synopsis: Utilities to benchmark the PENELOPE programs
+
+.. inheritance-diagram:: pymontecarlo.program._penelope.benchmark
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import os
+import sys
+import json
+import time
+import argparse
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.settings import get_settings
+
+# Globals and constants variables.
+FAKE_EXECUTABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake.py')
+
+DEFAULT_THRESHOLD = 1.5
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+def measure(func, repeat=5, setup=None):
+    """
+    Calls *func* *repeat* times and returns the durations (in seconds).
+    If specified, *setup* is called before each call, but not timed.
+    """
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+@contextmanager
+def fake_executable(section_name, **env):
+    """
+    Configures the fake executable (:mod:`fake`) as the executable of a
+    section of the settings (``penepma`` or ``penshower``) within the
+    context.
+    The keyword arguments set the ``FAKE_PENELOPE_*`` environment variables,
+    e.g. ``lines=1000`` sets ``FAKE_PENELOPE_LINES``.
+    """
+    section = getattr(get_settings(), section_name)
+    previous_exe = section.exe
+
+    envnames = dict(('FAKE_PENELOPE_' + name.upper(), str(value))
+                    for name, value in env.items())
+    previous_env = dict((name, os.environ.get(name)) for name in envnames)
+
+    section.exe = FAKE_EXECUTABLE
+    os.environ.update(envnames)
+    try:
+        yield FAKE_EXECUTABLE
+    finally:
+        section.exe = previous_exe
+        for name, value in previous_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+def format_report(title, results):
+    """
+    Returns a table of the benchmark results.
+
+    :arg title: title of the table
+    :arg results: ordered :class:`dict` of name and duration (in seconds)
+    """
+    width = max([len(name) for name in results] + [len(title)])
+    lines = [title.ljust(width) + '  ' + 'time (ms)'.rjust(12),
+             '-' * (width + 14)]
+    for name, duration_s in results.items():
+        lines.append(name.ljust(width) + '  ' + ('%.3f' % (duration_s * 1e3)).rjust(12))
+    return '\n'.join(lines)
+
+def stage_medians(timings_list):
+    """
+    Returns an ordered :class:`dict` of the median duration of each stage
+    over several runs.
+
+    :arg timings_list: :class:`list` of the spans of each run
+        (see :attr:`Worker.timings`)
+    """
+    durations = OrderedDict()
+    for timings in timings_list:
+        totals = OrderedDict()
+        for record in timings:
+            totals[record.name] = totals.get(record.name, 0.0) + record.duration_s
+        for name, duration_s in totals.items():
+            durations.setdefault(name, []).append(duration_s)
+
+    return OrderedDict((name, median(values)) for name, values in durations.items())
+
+def load_baseline(filepath):
+    """
+    Returns the durations (in seconds) of a baseline saved with
+    :func:`save_baseline` as a :class:`dict`.
+    """
+    with open(filepath, 'r') as fp:
+        return json.load(fp, object_pairs_hook=OrderedDict)
+
+def save_baseline(results, filepath):
+    """
+    Saves the durations (in seconds) of benchmark results as a baseline.
+    The durations of benchmarks missing from the results are kept.
+
+    :arg results: ordered :class:`dict` of name and duration (in seconds)
+    :arg filepath: path of the baseline (JSON) file
+    """
+    baseline = OrderedDict()
+    if os.path.exists(filepath):
+        baseline.update(load_baseline(filepath))
+    baseline.update(results)
+
+    with open(filepath, 'w') as fp:
+        json.dump(baseline, fp, indent=2)
+        fp.write('\n')
+
+def compare_baseline(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Returns an ordered :class:`dict` of the benchmarks slower than their
+    baseline by more than *threshold* times, with the ratio of the duration
+    over the baseline.
+    Benchmarks without a baseline are ignored.
+
+    :arg results: ordered :class:`dict` of name and duration (in seconds)
+    :arg baseline: :class:`dict` of name and duration (in seconds)
+    :arg threshold: maximum ratio of the duration over the baseline
+    """
+    regressions = OrderedDict()
+    for name, duration_s in results.items():
+        reference_s = baseline.get(name)
+        if not reference_s:
+            continue
+
+        ratio = duration_s / reference_s
+        if ratio > threshold:
+            regressions[name] = ratio
+
+    return regressions
+
+def run_suite(description, suites, argv=None):
+    """
+    Runs benchmark suites from the command line, prints a report and compares
+    the durations with a baseline.
+    Returns the exit status: 1 if a benchmark regressed, 0 otherwise.
+
+    :arg description: description of the command
+    :arg suites: ordered :class:`dict` of title and function taking the
+        number of repetitions and returning the results of the suite
+        (ordered :class:`dict` of name and duration in seconds)
+    :arg argv: command line arguments (default: :data:`sys.argv`)
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of runs of each benchmark')
+    parser.add_argument('--baseline',
+                        help='Baseline (JSON) file to compare with')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Maximum ratio of the duration over the baseline (default: %(default)s)')
+    parser.add_argument('--update', action='store_true',
+                        help='Save the durations in the baseline file')
+    args = parser.parse_args(argv)
+
+    results = OrderedDict()
+    reports = []
+    for title, func in suites.items():
+        suite_results = func(args.repeat)
+        reports.append(format_report(title, suite_results))
+        for name, duration_s in suite_results.items():
+            results['%s: %s' % (title, name)] = duration_s
+    print('\n\n'.join(reports))
+
+    if not args.baseline:
+        return 0
+
+    if args.update:
+        save_baseline(results, args.baseline)
+        print('\nBaseline saved in %s' % args.baseline)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('\nNo baseline %s, use --update to create it' % args.baseline,
+              file=sys.stderr)
+        return 0
+
+    regressions = compare_baseline(results, load_baseline(args.baseline),
+                                   args.threshold)
+    if not regressions:
+        print('\nNo regression (threshold: %sx)' % args.threshold)
+        return 0
+
+    print('\nRegressions (threshold: %sx):' % args.threshold, file=sys.stderr)
+    for name, ratio in regressions.items():
+        print('  %s: %.2fx slower' % (name, ratio), file=sys.stderr)
+    return 1
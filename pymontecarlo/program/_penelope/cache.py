@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`cache` -- Cache of PENELOPE material files
+================================================================================
+
+.. module:: cache
+   :synopsis: Cache of PENELOPE material files
+
+.. inheritance-diagram:: pymontecarlo.program._penelope.cache
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import os
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+
+# Third party modules.
+import pypenelopelib
+
+# Local modules.
+
+# Globals and constants variables.
+DEFAULT_MAX_SIZE = 1024 ** 3 # 1 GB
+
+def _touch(filepath):
+    with open(filepath, 'a'):
+        pass
+    os.utime(filepath, None)
+
+def _link_or_copy(src, dst):
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy(src, dst)
+
+class MaterialCache(object):
+
+    def __init__(self, dirpath, max_size=DEFAULT_MAX_SIZE):
+        """
+        Persistent cache of material files generated by the PENELOPE
+        MATERIAL program.
+
+        A material file is identified by the composition and density of the
+        material, the pendbase directory used to generate it and the version
+        of :mod:`pypenelopelib`.
+        Cached files are hard-linked (or copied if not possible) into the
+        simulation directory.
+        When the total size of the cache exceeds *max_size*, the least
+        recently used files are removed.
+        The last use of each file is recorded by the modification time of an
+        empty marker file (``.used``), since the cached file shares its
+        modification time with its hard links in the simulation directories.
+
+        :arg dirpath: directory where the material files are cached
+        :arg max_size: maximum size of the cache (in bytes)
+        """
+        if not os.path.exists(dirpath):
+            os.makedirs(dirpath)
+        self._dirpath = dirpath
+        self._max_size = max_size
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __repr__(self):
+        return '<%s(%s, hits=%i, misses=%i)>' % \
+            (self.__class__.__name__, self.dirpath, self.hits, self.misses)
+
+    def _create_key(self, material, pendbase_dir):
+        sha = hashlib.sha1()
+
+        for z, wf in sorted(material.composition.items()):
+            sha.update(('%i:%r;' % (z, float(wf))).encode('ascii'))
+        sha.update(('density:%r;' % float(material.density_kg_m3)).encode('ascii'))
+
+        if pendbase_dir:
+            pendbase_dir = os.path.realpath(pendbase_dir)
+            mtime = os.stat(pendbase_dir).st_mtime if os.path.isdir(pendbase_dir) else 0
+            sha.update(('pendbase:%s:%r;' % (pendbase_dir, mtime)).encode('utf8'))
+
+        version = getattr(pypenelopelib, '__version__', '')
+        sha.update(('version:%s;' % version).encode('utf8'))
+
+        return sha.hexdigest()
+
+    def _get_filepath(self, material, pendbase_dir):
+        key = self._create_key(material, pendbase_dir)
+        return os.path.join(self._dirpath, key + '.mat')
+
+    def _get_markerfilepath(self, cachefilepath):
+        return os.path.splitext(cachefilepath)[0] + '.used'
+
+    def get(self, material, pendbase_dir, filepath):
+        """
+        Links or copies the cached material file of *material* to *filepath*.
+        Returns ``True`` if the material was found in the cache,
+        ``False`` otherwise.
+        """
+        cachefilepath = self._get_filepath(material, pendbase_dir)
+
+        with self._lock:
+            try:
+                _link_or_copy(cachefilepath, filepath)
+                _touch(self._get_markerfilepath(cachefilepath)) # Mark as recently used
+            except OSError:
+                self._misses += 1
+                logging.debug('Material cache miss: %s', material)
+                return False
+
+            self._hits += 1
+            logging.debug('Material cache hit: %s', material)
+            return True
+
+    def put(self, material, pendbase_dir, filepath):
+        """
+        Adds the material file *filepath* of *material* to the cache.
+        """
+        cachefilepath = self._get_filepath(material, pendbase_dir)
+
+        with self._lock:
+            # Copy under a temporary name first, so that other processes
+            # never see a partially written file
+            fd, tmpfilepath = tempfile.mkstemp('.tmp', dir=self._dirpath)
+            os.close(fd)
+            shutil.copy(filepath, tmpfilepath)
+            os.replace(tmpfilepath, cachefilepath)
+            _touch(self._get_markerfilepath(cachefilepath))
+
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for filename in os.listdir(self._dirpath):
+            if not filename.endswith('.mat'):
+                continue
+            filepath = os.path.join(self._dirpath, filename)
+            try:
+                stat = os.stat(filepath)
+            except OSError: # Removed by another process
+                continue
+
+            try:
+                used = os.stat(self._get_markerfilepath(filepath)).st_mtime
+            except OSError: # No marker, e.g. file of a previous version
+                used = stat.st_mtime
+
+            entries.append((used, stat.st_size, filepath))
+
+        size = sum(entry[1] for entry in entries)
+        for _used, filesize, filepath in sorted(entries):
+            if size <= self._max_size:
+                break
+            logging.debug('Material cache eviction: %s', filepath)
+            try:
+                os.remove(filepath)
+            except OSError:
+                continue
+            size -= filesize
+
+            try:
+                os.remove(self._get_markerfilepath(filepath))
+            except OSError:
+                pass
+
+    def clear(self):
+        """
+        Removes all material files from the cache and resets the statistics.
+        """
+        with self._lock:
+            for filename in os.listdir(self._dirpath):
+                if filename.endswith(('.mat', '.used')):
+                    os.remove(os.path.join(self._dirpath, filename))
+            self._hits = 0
+            self._misses = 0
+
+    @property
+    def dirpath(self):
+        """
+        Directory where the material files are cached.
+        """
+        return self._dirpath
+
+    @property
+    def max_size(self):
+        """
+        Maximum size of the cache (in bytes).
+        """
+        return self._max_size
+
+    @property
+    def size(self):
+        """
+        Current size of the cache (in bytes).
+        """
+        return sum(os.path.getsize(os.path.join(self._dirpath, filename))
+                   for filename in os.listdir(self._dirpath)
+                   if filename.endswith('.mat'))
+
+    @property
+    def hits(self):
+        """
+        Number of materials found in the cache.
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        Number of materials not found in the cache.
+        """
+        return self._misses
+
+def create_material_cache(section):
+    """
+    Returns a :class:`MaterialCache` configured from the ``matcache``
+    (directory) and ``matcachesize`` (in bytes) options of a settings
+    section, or ``None`` if no cache directory is specified.
+    """
+    dirpath = getattr(section, 'matcache', None)
+    if not dirpath:
+        return None
+
+    max_size = int(getattr(section, 'matcachesize', DEFAULT_MAX_SIZE))
+    return MaterialCache(dirpath, max_size)
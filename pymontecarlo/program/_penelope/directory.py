@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`directory` -- Directories of simulation files
+================================================================================
+
+.. module:: directory
+   :synopsis: Directories of simulation files
+
+.. inheritance-diagram:: pymontecarlo.program._penelope.directory
+
+The importers read the simulation files through a directory object, so that
+the results can be imported from a folder or directly from the members of a
+ZIP (e.g. the archive of the results), without extracting them.
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import os
+import fnmatch
+from zipfile import ZipFile, is_zipfile
+
+# Third party modules.
+
+# Local modules.
+
+# Globals and constants variables.
+
+class BaseDirectory(object):
+    """
+    Read-only directory of simulation files.
+    Only the files at the root of the directory are considered.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __repr__(self):
+        return '<%s(%s)>' % (self.__class__.__name__, self.name)
+
+    @property
+    def name(self):
+        """
+        Name of the directory, used in messages.
+        """
+        raise NotImplementedError
+
+    def join(self, filename):
+        """
+        Returns the full name of a file, used in messages.
+        """
+        return os.path.join(self.name, filename)
+
+    def listdir(self):
+        """
+        Returns the names of the files.
+        """
+        raise NotImplementedError
+
+    def exists(self, filename):
+        """
+        Returns whether the file exists.
+        """
+        raise NotImplementedError
+
+    def open(self, filename):
+        """
+        Returns a binary file object to read the file.
+        """
+        raise NotImplementedError
+
+    def read(self, filename):
+        """
+        Returns the content of the file as :class:`bytes`.
+        """
+        with self.open(filename) as fp:
+            return fp.read()
+
+    def glob(self, pattern):
+        """
+        Returns the sorted names of the files matching a pattern
+        (see :mod:`fnmatch`).
+        """
+        return sorted(fnmatch.filter(self.listdir(), pattern))
+
+    def close(self):
+        """
+        Releases the resources of the directory.
+        """
+        pass
+
+class Directory(BaseDirectory):
+
+    def __init__(self, dirpath):
+        """
+        Directory of the file system.
+        """
+        self._dirpath = dirpath
+
+    @property
+    def name(self):
+        return self._dirpath
+
+    def listdir(self):
+        return [filename for filename in os.listdir(self._dirpath)
+                if os.path.isfile(os.path.join(self._dirpath, filename))]
+
+    def exists(self, filename):
+        return os.path.isfile(os.path.join(self._dirpath, filename))
+
+    def open(self, filename):
+        return open(os.path.join(self._dirpath, filename), 'rb')
+
+class ZipDirectory(BaseDirectory):
+
+    def __init__(self, source, prefix=''):
+        """
+        Directory of the members of a ZIP.
+        Members are streamed from the ZIP, without temporary files.
+
+        :arg source: path or binary file object of the ZIP
+        :arg prefix: folder of the members in the ZIP (default: root)
+        """
+        self._zipfile = ZipFile(source, 'r')
+        self._name = source if isinstance(source, str) else \
+            getattr(source, 'name', repr(source))
+
+        prefix = prefix.strip('/')
+        self._prefix = prefix + '/' if prefix else ''
+
+        self._filenames = set()
+        for member in self._zipfile.namelist():
+            if not member.startswith(self._prefix) or member.endswith('/'):
+                continue
+            filename = member[len(self._prefix):]
+            if '/' not in filename:
+                self._filenames.add(filename)
+
+    @property
+    def name(self):
+        return self._name
+
+    def join(self, filename):
+        return '%s:%s%s' % (self._name, self._prefix, filename)
+
+    def listdir(self):
+        return list(self._filenames)
+
+    def exists(self, filename):
+        return filename in self._filenames
+
+    def open(self, filename):
+        return self._zipfile.open(self._prefix + filename, 'r')
+
+    def close(self):
+        self._zipfile.close()
+
+def open_directory(source):
+    """
+    Returns a directory of simulation files.
+
+    :arg source: path of a directory or of a ZIP, binary file object of a
+        ZIP or directory object (returned as is)
+    """
+    if isinstance(source, BaseDirectory):
+        return source
+    if isinstance(source, str) and os.path.isdir(source):
+        return Directory(source)
+    if hasattr(source, 'read') or is_zipfile(source):
+        return ZipDirectory(source)
+    raise ValueError('Specified path (%s) is not a directory or a ZIP' % source)
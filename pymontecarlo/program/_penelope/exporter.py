@@ -20,8 +20,11 @@ __license__ = "GPL v3"
 
 # Standard library modules.
 import os
+import math
+import logging
 from operator import attrgetter
 import itertools
+from concurrent.futures import ProcessPoolExecutor
 
 # Third party modules.
 import numpy as np
@@ -37,6 +40,9 @@ from pymontecarlo.options.model import \
 
 from pymontecarlo.program._penelope.options.geometry import \
     PenelopeGeometry, Module, xplane, yplane, zplane, cylinder, sphere
+from pymontecarlo.program._penelope.options.material import PenelopeMaterial
+from pymontecarlo.program._penelope.extent import interaction_extent_m
+from pymontecarlo.program._penelope.timing import span
 
 from pymontecarlo.program.exporter import \
     Exporter as _Exporter, ExporterException, ExporterWarning #@UnusedImport
@@ -46,12 +52,27 @@ import pypenelopelib.material as penmaterial
 # Globals and constants variables.
 from pymontecarlo.options.particle import ELECTRON, PHOTON, POSITRON
 
+GROUPING_LINEAR = 'linear'
+GROUPING_BALANCED = 'balanced'
+GROUPINGS = frozenset([GROUPING_LINEAR, GROUPING_BALANCED])
+
+DEFAULT_EXTENT_M = 0.1 # 10 cm
+BOUNDS_SAFETY_FACTOR = 3.0
+
 def _pairwise(iterable):
     "s -> (s0,s1), (s1,s2), (s2, s3), ..."
     a, b = itertools.tee(iterable)
     next(b, None)
     return zip(a, b)
 
+def _create_material_file(name, composition, density_kg_m3, filepath,
+                          pendbase_dir):
+    """
+    Creates a material file.
+    Defined at the module level so that it can be run in a worker process.
+    """
+    penmaterial.create(name, composition, density_kg_m3, filepath, pendbase_dir)
+
 class Keyword(object):
 
     LINE_KEYWORDS_SIZE = 6
@@ -111,9 +132,21 @@ class Comment(Keyword):
 
 class Exporter(_Exporter):
 
-    def __init__(self, pendbase_dir):
+    def __init__(self, pendbase_dir, material_cache=None, max_workers=1,
+                 grouping=GROUPING_LINEAR, tight_bounds=False):
         """
         Creates a exporter to PENELOPE main programs.
+
+        :arg pendbase_dir: directory of the PENELOPE database
+        :arg material_cache: cache of material files
+            (:class:`MaterialCache`). If ``None``, the material files are
+            always generated.
+        :arg max_workers: maximum number of processes used to generate the
+            material files of a geometry concurrently
+        :arg grouping: strategy to group the modules of horizontal layers,
+            either :const:`GROUPING_LINEAR` or :const:`GROUPING_BALANCED`
+        :arg tight_bounds: whether to size the volumes enclosing the sample
+            from the range of the electrons (see :attr:`tight_bounds`)
         """
         _Exporter.__init__(self)
 
@@ -132,10 +165,56 @@ class Exporter(_Exporter):
         self._model_exporters[MASS_ABSORPTION_COEFFICIENT] = self._export_dummy
 
         self._pendbase_dir = pendbase_dir
+        self._material_cache = material_cache
+        self._max_workers = max(1, int(max_workers))
+        self.grouping = grouping
+        self.tight_bounds = tight_bounds
+
+    @property
+    def grouping(self):
+        """
+        Strategy to group the modules of horizontal layers.
+
+        With :const:`GROUPING_LINEAR`, each grouping module contains the
+        next layer and the previous grouping module, so the nesting depth
+        increases linearly with the number of layers.
+        With :const:`GROUPING_BALANCED`, the grouping modules form a balanced
+        binary tree over the layers, so the nesting depth only increases
+        logarithmically.
+        """
+        return self._grouping
+
+    @grouping.setter
+    def grouping(self, grouping):
+        if grouping not in GROUPINGS:
+            raise ValueError('Unknown grouping: %s' % grouping)
+        self._grouping = grouping
+
+    @property
+    def tight_bounds(self):
+        """
+        Whether the volumes enclosing the sample (e.g. the substrate) are
+        sized from the Kanaya-Okayama electron range, multiplied by
+        :const:`BOUNDS_SAFETY_FACTOR`.
+        The tight volumes are surrounded by an absorber, made of the
+        substrate material up to :const:`DEFAULT_EXTENT_M`, where electrons
+        and positrons are absorbed immediately. Photons are transported as
+        in the substrate, since characteristic and bremsstrahlung
+        fluorescence is produced much deeper than the electron range.
+        Geometries without a substrate for the absorber (e.g. vertical
+        layers), or simulations with an unknown beam, keep volumes extending
+        :const:`DEFAULT_EXTENT_M` from the impact point.
+        """
+        return self._tight_bounds
+
+    @tight_bounds.setter
+    def tight_bounds(self, tight_bounds):
+        self._tight_bounds = bool(tight_bounds)
 
     def _export(self, options, outputdir, *args):
         # Export geometry
-        geoinfo, matinfos = self.export_geometry(options.geometry, outputdir)
+        geoinfo, matinfos = self.export_geometry(options.geometry, outputdir,
+                                                 options.beam)
 
         # Create input file
         filepath = self._create_input_file(options, outputdir, geoinfo, matinfos)
@@ -200,7 +279,7 @@ class Exporter(_Exporter):
 
         lines.append(self._COMMENT_SKIP())
 
-    def export_geometry(self, geometry, outputdir):
+    def export_geometry(self, geometry, outputdir, beam=None):
         """
         Exports geometry to a *geo* file and all materials to *mat* files.
 
@@ -209,6 +288,9 @@ class Exporter(_Exporter):
         :arg outputdir: full path to a directory where the files will be saved.
             Note that any conflicting files will be overwritten without warnings.
 
+        :arg beam: beam of the simulation, used to size the volumes
+            enclosing the sample (see :attr:`tight_bounds`)
+
         :return: a :class:`tuple` and a list of :class:`tuple`.
             The class:`tuple` contains 2 items: the :class:`PenelopeGeometry`
             object used to create the *geo* file and the full path of this
@@ -221,18 +303,14 @@ class Exporter(_Exporter):
             geometry file.
         """
         # Save geometry
-        title = geometry.__class__.__name__.lower()
-        pengeom = PenelopeGeometry(title)
-        pengeom.tilt_rad = geometry.tilt_rad
-        pengeom.rotation_rad = geometry.rotation_rad
-
-        self._export_geometry(geometry, pengeom)
+        with span('export.geometry'):
+            pengeom = self.create_geometry(geometry, beam)
 
-        lines = pengeom.to_geo()
-        geofilepath = os.path.join(outputdir, title + ".geo")
-        with open(geofilepath, 'w') as f:
-            for line in lines:
-                f.write(line + '\n')
+            lines = pengeom.to_geo()
+            geofilepath = os.path.join(outputdir, pengeom.title + ".geo")
+            with open(geofilepath, 'w') as f:
+                for line in lines:
+                    f.write(line + '\n')
 
         # Save materials
         matinfos = []
@@ -241,15 +319,172 @@ class Exporter(_Exporter):
             index = material._index
 
             filepath = os.path.join(outputdir, 'mat%i.mat' % index)
+            matinfos.append((material, filepath))
 
-            penmaterial.create(material.name, dict(material.composition),
-                               material.density_kg_m3, filepath,
-                               self._pendbase_dir)
+        with span('export.materials'):
+            self._export_materials(matinfos)
 
-            matinfos.append((material, filepath))
+        if self._material_cache is not None:
+            logging.debug('%r', self._material_cache)
 
         return (pengeom, geofilepath), matinfos
 
+    def create_geometry(self, geometry, beam=None):
+        """
+        Returns the :class:`PenelopeGeometry` of a geometry, without
+        creating any file.
+
+        :arg geometry: geometry object
+        :arg beam: beam of the simulation, used to size the volumes
+            enclosing the sample (see :attr:`tight_bounds`)
+        """
+        title = geometry.__class__.__name__.lower()
+        pengeom = PenelopeGeometry(title)
+        pengeom.tilt_rad = geometry.tilt_rad
+        pengeom.rotation_rad = geometry.rotation_rad
+
+        extent_m = self._get_extent_m(geometry, beam)
+        self._export_geometry(geometry, pengeom, extent_m)
+
+        if extent_m < DEFAULT_EXTENT_M:
+            self._export_absorber(geometry, pengeom, beam.energy_eV)
+
+        return pengeom
+
+    def _export_materials(self, matinfos):
+        """
+        Creates the material files.
+        The files found in the material cache are reused. The other ones are
+        generated concurrently by up to *max_workers* processes.
+
+        :arg matinfos: :class:`list` of :class:`tuple` of the material and
+            the full path of its *mat* file
+        """
+        cache = self._material_cache
+
+        missing_matinfos = []
+        for material, filepath in matinfos:
+            if cache is not None:
+                if cache.get(material, self._pendbase_dir, filepath):
+                    continue
+
+                # Never write through a hard link to a cached file
+                if os.path.exists(filepath):
+                    os.remove(filepath)
+
+            missing_matinfos.append((material, filepath))
+
+        def _args(material, filepath):
+            return (material.name, dict(material.composition),
+                    material.density_kg_m3, filepath, self._pendbase_dir)
+
+        max_workers = min(self._max_workers, len(missing_matinfos))
+        errors = []
+
+        if max_workers > 1:
+            with ProcessPoolExecutor(max_workers) as executor:
+                futures = []
+                for material, filepath in missing_matinfos:
+                    future = executor.submit(_create_material_file,
+                                             *_args(material, filepath))
+                    futures.append((material, filepath, future))
+
+                for material, filepath, future in futures:
+                    try:
+                        future.result()
+                    except Exception as ex:
+                        errors.append((material, filepath, ex))
+        else:
+            for material, filepath in missing_matinfos:
+                try:
+                    _create_material_file(*_args(material, filepath))
+                except Exception as ex:
+                    errors.append((material, filepath, ex))
+
+        if errors:
+            messages = ['%s (%s): %s' % (material.name, os.path.basename(filepath), ex)
+                        for material, filepath, ex in errors]
+            raise ExporterException('Could not create material file(s): ' + \
+                                    '; '.join(messages))
+
+        if cache is not None:
+            for material, filepath in missing_matinfos:
+                cache.put(material, self._pendbase_dir, filepath)
+
+    def _get_extent_m(self, geometry, beam):
+        """
+        Returns the distance (in meters) from the axis and from the bottom
+        of the sample up to which the enclosing volumes extend.
+        """
+        if not self.tight_bounds or beam is None:
+            return DEFAULT_EXTENT_M
+
+        # Photons must be transported up to the default extent
+        if self._get_absorber_material(geometry) is None:
+            logging.debug('No absorber for geometry %s, tight bounds ignored',
+                          geometry.__class__.__name__)
+            return DEFAULT_EXTENT_M
+
+        extent_m = interaction_extent_m(beam.energy_eV, geometry.get_materials(),
+                                        BOUNDS_SAFETY_FACTOR)
+
+        # Distance between the impact point and the axis of the geometry
+        x_m, y_m = beam.origin_m[:2]
+        offset_m = math.hypot(x_m, y_m) + getattr(beam, 'diameter_m', 0.0)
+        offset_m /= max(math.cos(geometry.tilt_rad), 0.1)
+
+        extent_m = min(extent_m + offset_m, DEFAULT_EXTENT_M)
+        logging.debug('Extent of the geometry: %s m', extent_m)
+
+        return extent_m
+
+    def _get_absorber_material(self, geometry):
+        """
+        Returns a :class:`tuple` of the material of the absorber and the
+        depth (in meters) of the bottom of the sample above it, or ``None``
+        if the geometry has no substrate.
+        """
+        if isinstance(geometry, Substrate):
+            return geometry.body.material, 0.0
+        elif isinstance(geometry, Inclusion):
+            return geometry.substrate.material, 0.0
+        elif isinstance(geometry, HorizontalLayers) and geometry.has_substrate():
+            zmin_m = min([layer.zmin_m for layer in geometry.layers] or [0.0])
+            return geometry.substrate.material, zmin_m
+        return None
+
+    def _export_absorber(self, geometry, pengeom, energy_eV):
+        material, zmin_m = self._get_absorber_material(geometry)
+
+        # Electrons and positrons below this energy are absorbed as soon as
+        # they enter. Photons keep the absorption energy of the substrate.
+        absorption_energy_eV = dict(material.absorption_energy_eV)
+        absorption_energy_eV[ELECTRON] = 0.9 * energy_eV
+        absorption_energy_eV[POSITRON] = 0.9 * energy_eV
+        material = \
+            PenelopeMaterial(material.composition, material.name,
+                             material.density_kg_m3,
+                             absorption_energy_eV,
+                             material.elastic_scattering,
+                             material.cutoff_energy_inelastic_eV,
+                             material.cutoff_energy_bremsstrahlung_eV,
+                             maximum_step_length_m=material.maximum_step_length_m)
+
+        linked_modules = set()
+        for module in pengeom.modules:
+            linked_modules.update(module.get_modules())
+        unlinked_modules = [module for module in pengeom.modules
+                            if module not in linked_modules]
+
+        module = Module(pengeom, material, 'Absorber')
+        module.add_surface(cylinder(DEFAULT_EXTENT_M), -1)
+        module.add_surface(zplane(0.0), -1)
+        module.add_surface(zplane(zmin_m - DEFAULT_EXTENT_M), 1)
+        for submodule in unlinked_modules:
+            module.add_module(submodule)
+
+        pengeom.modules.add(module)
+
     def _export_geometry(self, geometry, *args):
         clasz = geometry.__class__
         method = self._geometry_exporters.get(clasz)
@@ -259,10 +494,11 @@ class Exporter(_Exporter):
         else:
             raise ExporterException("Could not export geometry '%s'" % clasz.__name__)
 
-    def _export_geometry_substrate(self, geometry, pengeom):
-        surface_cylinder = cylinder(0.1) # 10 cm radius
+    def _export_geometry_substrate(self, geometry, pengeom,
+                                   extent_m=DEFAULT_EXTENT_M):
+        surface_cylinder = cylinder(extent_m) # 10 cm radius by default
         surface_top = zplane(0.0) # z = 0
-        surface_bottom = zplane(-0.1) # z = -10 cm
+        surface_bottom = zplane(-extent_m) # z = -10 cm by default
 
         module = Module(pengeom, geometry.body.material, 'Substrate')
         module.add_surface(surface_cylinder, -1)
@@ -271,11 +507,15 @@ class Exporter(_Exporter):
 
         pengeom.modules.add(module)
 
-    def _export_geometry_inclusion(self, geometry, pengeom):
-        surface_cylinder = cylinder(0.1) # 10 cm radius
+    def _export_geometry_inclusion(self, geometry, pengeom,
+                                   extent_m=DEFAULT_EXTENT_M):
+        radius_m = geometry.inclusion.diameter_m / 2.0
+        extent_m = min(extent_m + radius_m, DEFAULT_EXTENT_M)
+
+        surface_cylinder = cylinder(extent_m) # 10 cm radius by default
         surface_top = zplane(0.0) # z = 0
-        surface_bottom = zplane(-0.1) # z = -10 cm
-        surface_sphere = sphere(geometry.inclusion.diameter_m / 2.0)
+        surface_bottom = zplane(-extent_m) # z = -10 cm by default
+        surface_sphere = sphere(radius_m)
 
         module_inclusion = Module(pengeom, geometry.inclusion.material, 'Inclusion')
         module_inclusion.add_surface(surface_top, -1)
@@ -290,11 +530,12 @@ class Exporter(_Exporter):
         pengeom.modules.add(module_substrate)
         pengeom.modules.add(module_inclusion)
 
-    def _export_geometry_horizontal_layers(self, geometry, pengeom):
+    def _export_geometry_horizontal_layers(self, geometry, pengeom,
+                                           extent_m=DEFAULT_EXTENT_M):
         layers = np.array(geometry.layers, ndmin=1)
 
         # Surfaces
-        surface_cylinder = cylinder(0.1) # 10 cm radius
+        surface_cylinder = cylinder(extent_m) # 10 cm radius by default
 
         surface_layers = [zplane(0.0)]
         for layer in layers:
@@ -311,11 +552,11 @@ class Exporter(_Exporter):
             module.add_surface(surface_bottom, 1)
 
             pengeom.modules.add(module)
-            tmpgrouping.append((module, surface_bottom))
+            tmpgrouping.append((module, surface_top, surface_bottom))
 
         if geometry.has_substrate():
             surface_top = surface_layers[-1]
-            surface_bottom = zplane(surface_top.shift.z_m - 0.1) # 10 cm below last layer
+            surface_bottom = zplane(surface_top.shift.z_m - extent_m) # 10 cm below last layer by default
 
             module = Module(pengeom, geometry.substrate.material, 'Substrate')
             module.add_surface(surface_cylinder, -1)
@@ -323,46 +564,65 @@ class Exporter(_Exporter):
             module.add_surface(surface_bottom, 1)
 
             pengeom.modules.add(module)
-            tmpgrouping.append((module, surface_bottom))
-
-        # Grouping
-        # G0: s0, s2, m0, m1
-        # G1: s0, s3, m2, g0
-        # G2: s0, s4, m3, g1
-        # etc.
+            tmpgrouping.append((module, surface_top, surface_bottom))
 
         if len(tmpgrouping) <= 2: # no grouping required if only 2 modules
             return
 
-        module, surface_bottom = tmpgrouping[1]
+        if self.grouping == GROUPING_BALANCED:
+            self._group_balanced(pengeom, surface_cylinder, tmpgrouping)
+        else:
+            self._group_linear(pengeom, surface_cylinder, tmpgrouping)
 
+    def _create_group(self, pengeom, surface_cylinder, surface_top,
+                      surface_bottom, modules):
         group = Module(pengeom, VACUUM, 'grouping')
         group.add_surface(surface_cylinder, -1)
-        group.add_surface(surface_layers[0], -1) # top z = 0.0
+        group.add_surface(surface_top, -1)
         group.add_surface(surface_bottom, 1)
-        group.add_module(tmpgrouping[0][0]) # m0
-        group.add_module(module) #m1
+        for module in modules:
+            group.add_module(module)
 
         pengeom.modules.add(group)
 
-        for module, surface_bottom in tmpgrouping[2:]:
-            oldgroup = group
+        return group
 
-            group = Module(pengeom, VACUUM, 'grouping')
-            group.add_surface(surface_cylinder, -1)
-            group.add_surface(surface_layers[0], -1) # top z = 0.0
-            group.add_surface(surface_bottom, 1)
-            group.add_module(module)
-            group.add_module(oldgroup)
+    def _group_linear(self, pengeom, surface_cylinder, tmpgrouping):
+        # G0: s0, s2, m0, m1
+        # G1: s0, s3, m2, g0
+        # G2: s0, s4, m3, g1
+        # etc.
+        surface_top = tmpgrouping[0][1] # top z = 0.0
+
+        group = self._create_group(pengeom, surface_cylinder, surface_top,
+                                   tmpgrouping[1][2],
+                                   [tmpgrouping[0][0], tmpgrouping[1][0]])
 
-            pengeom.modules.add(group)
+        for module, _, surface_bottom in tmpgrouping[2:]:
+            group = self._create_group(pengeom, surface_cylinder, surface_top,
+                                       surface_bottom, [module, group])
 
-    def _export_geometry_vertical_layers(self, geometry, pengeom):
+    def _group_balanced(self, pengeom, surface_cylinder, tmpgrouping):
+        # Each group spans consecutive modules and contains two halves:
+        # G(m0..m3): s0, s4, G(m0..m1), G(m2..m3)
+        if len(tmpgrouping) == 1:
+            return tmpgrouping[0][0]
+
+        middle = (len(tmpgrouping) + 1) // 2
+        modules = [self._group_balanced(pengeom, surface_cylinder, tmpgrouping[:middle]),
+                   self._group_balanced(pengeom, surface_cylinder, tmpgrouping[middle:])]
+
+        return self._create_group(pengeom, surface_cylinder,
+                                  tmpgrouping[0][1], tmpgrouping[-1][2],
+                                  modules)
+
+    def _export_geometry_vertical_layers(self, geometry, pengeom,
+                                         extent_m=DEFAULT_EXTENT_M):
         layers = np.array(geometry.layers, ndmin=1)
 
         # Surfaces
         surface_top = zplane(0.0) # z = 0
-        surface_bottom = zplane(-0.1) # z = -10 cm
+        surface_bottom = zplane(-extent_m) # z = -10 cm by default
 
         surface_layers = []
         for layer in layers:
@@ -370,7 +630,7 @@ class Exporter(_Exporter):
         surface_layers.append(xplane(layer.xmax_m))
 
         diameter_m = sum(map(attrgetter('thickness_m'), layers))
-        surface_cylinder = cylinder(0.1 + 3.0 * diameter_m) # 10 cm radius
+        surface_cylinder = cylinder(extent_m + 3.0 * diameter_m) # 10 cm radius by default
 
         # Modules
         ## Left substrate
@@ -404,7 +664,7 @@ class Exporter(_Exporter):
 
         pengeom.modules.add(module)
 
-    def _export_geometry_sphere(self, geometry, pengeom):
+    def _export_geometry_sphere(self, geometry, pengeom, *args):
         radius_m = geometry.body.diameter_m / 2.0
         surface_sphere = sphere(radius_m)
 
@@ -413,7 +673,7 @@ class Exporter(_Exporter):
         module.shift.z_m = -radius_m
         pengeom.modules.add(module)
 
-    def _export_geometry_cuboids2d(self, geometry, pengeom):
+    def _export_geometry_cuboids2d(self, geometry, pengeom, *args):
         # Surfaces
         surface_top = zplane(0.0) # z = 0
         surface_bottom = zplane(-0.1) # z = -10 cm
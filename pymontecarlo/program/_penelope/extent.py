@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`extent` -- Extent of the interaction volume
+================================================================================
+
+.. module:: extent
+   :synopsis: Extent of the interaction volume
+
+.. inheritance-diagram:: pymontecarlo.program._penelope.extent
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+
+# Third party modules.
+from pyxray.element_properties import atomic_mass_kg_mol
+
+# Local modules.
+from pymontecarlo.options.material import VACUUM
+
+# Globals and constants variables.
+
+def electron_range_m(energy_eV, material):
+    """
+    Returns the Kanaya-Okayama electron range (in meters).
+    For a compound, the ratio ``Z^0.889 / A`` is averaged using the weight
+    fractions of the elements.
+
+    :arg energy_eV: energy of the electrons (in eV)
+    :arg material: material
+    """
+    ratio = 0.0
+    for z, fraction in material.composition.items():
+        a_g_mol = atomic_mass_kg_mol(z) * 1e3
+        ratio += fraction * z ** 0.889 / a_g_mol
+
+    density_g_cm3 = material.density_kg_m3 / 1e3
+    energy_keV = energy_eV / 1e3
+
+    return 0.0276e-6 * energy_keV ** 1.67 / (ratio * density_g_cm3)
+
+def interaction_extent_m(energy_eV, materials, safety_factor=3.0):
+    """
+    Returns the distance (in meters) from the impact point beyond which
+    the electrons are not expected to travel in any of the materials.
+    Photons travel much further (a few attenuation lengths, i.e. tens of
+    micrometers for characteristic x-rays) and are not considered.
+
+    :arg energy_eV: energy of the incident electrons (in eV)
+    :arg materials: iterable of materials
+    :arg safety_factor: factor applied to the largest range
+    """
+    extent_m = 0.0
+    for material in materials:
+        if material is VACUUM:
+            continue
+        extent_m = max(extent_m, electron_range_m(energy_eV, material))
+
+    return extent_m * safety_factor
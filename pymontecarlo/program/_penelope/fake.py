@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`fake` -- Stand-in executable for PENEPMA and PENSHOWER
+================================================================================
+
+.. module:: fake
+   :synopsis: Stand-in executable for PENEPMA and PENSHOWER
+
+This script can be configured as the ``exe`` of the ``penepma`` or
+``penshower`` section of the settings to exercise the workers without the
+Fortran programs, e.g. to measure their overhead.
+Like the real programs, it reads the input file on its standard input,
+prints progress lines on its standard output and writes result files of the
+same format in its working directory.
+The program is selected from the input file: PENSHOWER if it contains the
+``NTRJM`` keyword, PENEPMA otherwise.
+The results are not physical.
+
+The following environment variables control the simulation:
+
+  * ``FAKE_PENELOPE_DURATION_S``: wall time of the simulation (default: 0.0)
+  * ``FAKE_PENELOPE_STEPS``: number of progress lines and dumps (default: 10)
+  * ``FAKE_PENELOPE_SPEED``: reported number of showers per second
+    (default: 1000)
+  * ``FAKE_PENELOPE_LINES``: number of x-ray lines in the intensity files
+    (default: 100)
+  * ``FAKE_PENELOPE_CHANNELS``: number of channels of the spectra
+    (default: from the input file)
+  * ``FAKE_PENELOPE_TRAJECTORIES``: maximum number of trajectories
+    (default: 1000)
+  * ``FAKE_PENELOPE_INTERACTIONS``: number of interactions per trajectory
+    (default: 20)
+  * ``FAKE_PENELOPE_EXIT_CODE``: exit code (default: 0)
+
+A depth distribution (``pe-map-XX-depth.dat``) is written for each x-ray
+line of the spatial distribution (``XRLINE``).
+The dump file (``DUMPTO``) contains the number of showers and simulation
+time, so that a simulation can be resumed (``RESUME``).
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import os
+import sys
+import json
+import math
+import time
+
+# Third party modules.
+
+# Local modules.
+
+# Globals and constants variables.
+_INFINITY = 1e37
+_DEFAULT_SHOWERS = 1e4
+
+_SUBSHELLS = ['K', 'L1', 'L2', 'L3', 'M1', 'M2', 'M3', 'M4', 'M5',
+              'N1', 'N2', 'N3', 'N4', 'N5', 'N6', 'N7']
+
+_TRANSITIONS = [('K', 'L3'), ('K', 'L2'), ('K', 'M3'), ('L3', 'M5'),
+                ('L3', 'M4'), ('L2', 'M4'), ('L1', 'M3'), ('L3', 'N5')]
+
+def _getenv(name, default, type_=float):
+    return type_(os.environ.get('FAKE_PENELOPE_' + name, default))
+
+def parse_input(lines):
+    """
+    Returns a :class:`dict` of the keywords of an input file and the list of
+    their values (one :class:`list` of strings per occurrence).
+    """
+    keywords = {}
+    for line in lines:
+        keyword = line[:6].strip()
+        if not keyword:
+            continue
+        values = line[7:].split('[')[0].split()
+        keywords.setdefault(keyword, []).append(values)
+    return keywords
+
+def _get_float(keywords, name, default):
+    try:
+        return float(keywords[name][0][0])
+    except (KeyError, IndexError, ValueError):
+        return default
+
+def _read_dump(filepath):
+    if not os.path.exists(filepath):
+        return 0.0, 0.0
+    with open(filepath, 'r') as fp:
+        state = json.load(fp)
+    return state['showers'], state['time_s']
+
+def _write_dump(filepath, showers, time_s):
+    with open(filepath, 'w') as fp:
+        json.dump({'showers': showers, 'time_s': time_s}, fp)
+
+def _iter_lines(count):
+    z = 30
+    while True:
+        for s0, s1 in _TRANSITIONS:
+            if count <= 0:
+                return
+            energy_eV = 0.75 * 13.6 * (z - 1) ** 2 if s0 == 'K' else 0.15 * 13.6 * (z - 7.4) ** 2
+            yield z, s0, s1, energy_eV
+            count -= 1
+        z = 30 + (z - 29) % 62
+
+def _write_intensities(filepath, title, nlines, uncertainty):
+    with open(filepath, 'w') as fp:
+        fp.write(' #  Results from PENEPMA. %s\n' % title)
+        fp.write(' #  unc = statistical uncertainty (3 sigma).\n')
+        fp.write(' #\n')
+        fp.write(' # IZ S0 S1  E (eV)      P            unc       C            unc       B            unc       TF           unc       T            unc\n')
+
+        for i, (z, s0, s1, energy_eV) in enumerate(_iter_lines(nlines)):
+            p = 1e-5 / (1 + i % 17)
+            c = 0.1 * p
+            b = 0.01 * p
+            tf = c + b
+            t = p + tf
+            values = []
+            for val in [p, c, b, tf, t]:
+                values.append('%.6E %.2E' % (val, val * uncertainty))
+            fp.write('  %3i %-2s %-2s  %.4E  %s\n' % (z, s0, s1, energy_eV, '  '.join(values)))
+
+def _write_distribution(filepath, header, emin, emax, channels, uncertainty):
+    width = (emax - emin) / channels
+    with open(filepath, 'w') as fp:
+        for line in header:
+            fp.write(' #  %s\n' % line)
+        fp.write(' #\n')
+        for i in range(channels):
+            energy = emin + (i + 0.5) * width
+            val = math.exp(-2.0 * i / channels) * 1e-6
+            fp.write('  %.6E  %.6E  %.6E\n' % (energy, val, val * uncertainty))
+
+def _write_depth_distribution(filepath, code, index, zmin, zmax, channels, uncertainty):
+    z = code // 1000000
+    dest = _SUBSHELLS[(code // 10000) % 100 - 1]
+    src = _SUBSHELLS[(code // 100) % 100 - 1]
+    width = (zmax - zmin) / channels
+
+    with open(filepath, 'w') as fp:
+        fp.write(' #  Results from PENEPMA. Depth distribution of x rays.\n')
+        fp.write(' #   X-ray emission line:  Z = %2i,%s-%s, detector = %2i\n' % (z, dest, src, index))
+        fp.write(' #  1st column: z coordinate (cm).\n')
+        fp.write(' #  2nd column: density of x-ray emission (1/(cm.electron.sr)).\n')
+        fp.write(' #  3rd column: statistical uncertainty (3 sigma).\n')
+        fp.write('\n')
+        for i in range(channels):
+            depth = zmin + (i + 0.5) * width
+            val = math.exp(-4.0 * (i - 0.8 * channels) ** 2 / channels ** 2) * 1e-3
+            fp.write('  %.6E  %.6E  %.6E\n' % (depth, val, val * uncertainty))
+
+def write_penepma_results(keywords, showers, time_s, speed,
+                          dirpath='.', nlines=None, channels=None):
+    """
+    Writes the result files of PENEPMA in a directory.
+
+    :arg dirpath: output directory (default: current directory)
+    :arg nlines: number of x-ray lines in the intensity files
+        (default: ``FAKE_PENELOPE_LINES``)
+    :arg channels: number of channels of the spectra
+        (default: ``FAKE_PENELOPE_CHANNELS`` or from the input file)
+    """
+    uncertainty = 1.0 / math.sqrt(max(showers, 1.0))
+    if nlines is None:
+        nlines = _getenv('LINES', 100, int)
+    join = lambda filename: os.path.join(dirpath, filename)
+
+    with open(join('penepma-res.dat'), 'w') as fp:
+        fp.write('\n   ***********************************\n')
+        fp.write('   **   Program PENEPMA. Results.   **\n')
+        fp.write('   ***********************************\n\n')
+        fp.write('   Simulation time .........................  %.6E sec\n' % time_s)
+        fp.write('   Simulation speed ........................  %.6E showers/sec\n\n' % speed)
+        fp.write('   Simulated primary showers ...............  %.6E\n\n' % showers)
+        fp.write('   Upbound fraction ...................  %.6E +- %.1E\n' % (0.3, 0.3 * uncertainty))
+        fp.write('   Downbound fraction .................  %.6E +- %.1E\n' % (0.0, 0.0))
+        fp.write('   Absorption fraction ................  %.6E +- %.1E\n' % (0.7, 0.7 * uncertainty))
+
+    _write_intensities(join('pe-gen-ph.dat'), 'Probability of emission of characteristic lines.',
+                       nlines, uncertainty)
+
+    for index, values in enumerate(keywords.get('PDENER', [])):
+        emin, emax = float(values[0]), float(values[1])
+        nchannels = channels
+        if nchannels is None:
+            nchannels = _getenv('CHANNELS', int(values[2]), int)
+
+        _write_intensities(join('pe-intens-%s.dat' % str(index + 1).zfill(2)),
+                           'Output from photon detector #%3i' % (index + 1),
+                           nlines, uncertainty)
+        _write_distribution(join('pe-spect-%s.dat' % str(index + 1).zfill(2)),
+                            ['Results from PENEPMA. Output from photon detector #%3i' % (index + 1),
+                             '1st column: photon energy (eV).',
+                             '2nd column: probability density (1/(eV*sr*electron)).',
+                             '3rd column: statistical uncertainty (3 sigma).'],
+                            emin, emax, nchannels, uncertainty)
+
+    try:
+        values = keywords['NBE'][0]
+        emin, emax, bins = float(values[0]), float(values[1]), int(values[2])
+    except (KeyError, IndexError, ValueError):
+        emin, emax, bins = 0.0, _get_float(keywords, 'SENERG', 2e4), 100
+    emax = emax or _get_float(keywords, 'SENERG', 2e4)
+
+    for direction in ['up', 'down']:
+        _write_distribution(join('pe-energy-el-%s.dat' % direction),
+                            ['Results from PENEPMA.',
+                             'Energy distribution of %sbound electrons.' % direction,
+                             '1st column: E (eV).',
+                             '2nd and 3rd columns: probability density and STU (1/(eV*particle)).'],
+                            emin, emax, bins, uncertainty)
+
+    try:
+        values = keywords['GRIDZ'][0]
+        zmin, zmax, bins = float(values[0]), float(values[1]), int(values[2])
+    except (KeyError, IndexError, ValueError):
+        zmin, zmax, bins = -1e-4, 0.0, 100
+
+    for index, values in enumerate(keywords.get('XRLINE', [])):
+        _write_depth_distribution(join('pe-map-%s-depth.dat' % str(index + 1).zfill(2)),
+                                  int(values[0]), int(values[1]),
+                                  zmin, zmax, bins, uncertainty)
+
+def write_penshower_results(keywords, showers, dirpath='.'):
+    """
+    Writes the result files of PENSHOWER in a directory.
+
+    :arg dirpath: output directory (default: current directory)
+    """
+    energy_eV = _get_float(keywords, 'SENERG', 2e4)
+    ntrajectories = int(min(showers, _getenv('TRAJECTORIES', 1000, int)))
+    ninteractions = _getenv('INTERACTIONS', 20, int)
+
+    with open(os.path.join(dirpath, 'penshower.dat'), 'w') as fp:
+        fp.write('\n   **   Program PENSHOWER.  Input data and run-time messages.   **\n')
+
+    with open(os.path.join(dirpath, 'pe-trajectories.dat'), 'w') as fp:
+        fp.write(' #  Results from PENSHOWER.\n')
+        fp.write(' #\n')
+        for traj in range(ntrajectories):
+            fp.write('0' * 80 + '\n')
+            fp.write('TRAJ   %8i\n' % (traj + 1))
+            fp.write('KPAR          1\n')
+            fp.write('PARENT        0\n')
+            fp.write('ICOL          0\n')
+            fp.write('EXIT          %i\n' % (1 if traj % 3 == 0 else 3))
+            fp.write('1' * 80 + '\n')
+            for i in range(ninteractions):
+                fp.write(' %13.6E %13.6E %13.6E %13.6E %13.6E %4i %4i\n' %
+                         (1e-6 * math.cos(i), 1e-6 * math.sin(i), -1e-6 * i,
+                          energy_eV * (1.0 - float(i) / ninteractions),
+                          1.0, 1, 1 if i else 0))
+
+def main():
+    lines = sys.stdin.read().splitlines()
+    keywords = parse_input(lines)
+    penshower = 'NTRJM' in keywords
+
+    duration_s = _getenv('DURATION_S', 0.0)
+    steps = max(1, _getenv('STEPS', 10, int))
+    speed = _getenv('SPEED', 1000.0)
+
+    # Limits
+    if penshower:
+        showers_limit = _get_float(keywords, 'NTRJM', _DEFAULT_SHOWERS)
+        time_limit = _INFINITY
+    else:
+        showers_limit = _get_float(keywords, 'NSIMSH', _INFINITY)
+        time_limit = _get_float(keywords, 'TIME', _INFINITY)
+    if showers_limit >= _INFINITY and time_limit >= _INFINITY:
+        showers_limit = _DEFAULT_SHOWERS
+    showers_limit = min(showers_limit, time_limit * speed)
+
+    tolerance = 0.0
+    if 'REFLIN' in keywords:
+        tolerance = float(keywords['REFLIN'][0][2])
+
+    resume = keywords.get('RESUME', [[None]])[0][0]
+    dumpto = keywords.get('DUMPTO', [[None]])[0][0]
+    showers, time_s = _read_dump(resume) if resume else (0.0, 0.0)
+
+    print('Simulation started')
+    sys.stdout.flush()
+
+    increment = showers_limit / steps
+    while showers < showers_limit:
+        time.sleep(duration_s / steps)
+
+        showers = min(showers_limit, showers + increment)
+        time_s = showers / speed
+        uncertainty = 1.0 / math.sqrt(max(showers, 1.0))
+
+        if penshower:
+            print('%i,%i' % (showers, showers))
+        else:
+            write_penepma_results(keywords, showers, time_s, speed)
+            print('%i,%f,%f,%i' % (showers, time_s, uncertainty, 0))
+        sys.stdout.flush()
+
+        if dumpto:
+            _write_dump(dumpto, showers, time_s)
+
+        if uncertainty <= tolerance:
+            break
+
+    if penshower:
+        write_penshower_results(keywords, showers)
+    else:
+        write_penepma_results(keywords, showers, time_s, speed)
+
+    print('Simulation completed')
+    sys.stdout.flush()
+
+    return _getenv('EXIT_CODE', 0, int)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -59,11 +59,15 @@ class PenelopeMaterialXMLHandler(_MaterialXMLHandler):
 
         maximum_step_length_m = float(element.get('dsmax'))
 
+        bremsstrahlung_splitting = int(element.get('ibrspl', 1))
+        xray_splitting = int(element.get('ixrspl', 1))
+
         return PenelopeMaterial(mat.composition, mat.name, mat.density_kg_m3,
                                 mat.absorption_energy_eV, elastic_scattering,
                                 cutoff_energy_inelastic_eV,
                                 cutoff_energy_bremsstrahlung_eV,
-                                interaction_forcings, maximum_step_length_m)
+                                interaction_forcings, maximum_step_length_m,
+                                bremsstrahlung_splitting, xray_splitting)
 
     def convert(self, obj):
         element = _MaterialXMLHandler.convert(self, obj)
@@ -83,4 +87,7 @@ class PenelopeMaterialXMLHandler(_MaterialXMLHandler):
 
         element.set('dsmax', str(obj.maximum_step_length_m))
 
+        element.set('ibrspl', str(obj.bremsstrahlung_splitting))
+        element.set('ixrspl', str(obj.xray_splitting))
+
         return element
@@ -40,11 +40,13 @@ class TestMaterialXMLHandler(unittest.TestCase):
                                     cutoff_energy_inelastic_eV=51.2,
                                     cutoff_energy_bremsstrahlung_eV=53.4,
                                     interaction_forcings=[if1],
-                                    maximum_step_length_m=123.456)
+                                    maximum_step_length_m=123.456,
+                                    bremsstrahlung_splitting=2,
+                                    xray_splitting=3)
 
         etree.register_namespace('mc', 'http://pymontecarlo.sf.net')
         etree.register_namespace('mc-pen', 'http://pymontecarlo.sf.net/penelope')
-        source = BytesIO(b'<mc-pen:material xmlns:mc-pen="http://pymontecarlo.sf.net/penelope" c1="0.1" c2="0.2" density="8960.0" dsmax="123.456" name="Pure Cu" wcc="51.2" wcr="53.4"><composition><element weightFraction="1.0" z="29" /></composition><interactionForcing collision="hard bremsstrahlung emission" forcer="-4" particle="electron" whigh="1.0" wlow="0.1" /></mc-pen:material>')
+        source = BytesIO(b'<mc-pen:material xmlns:mc-pen="http://pymontecarlo.sf.net/penelope" c1="0.1" c2="0.2" density="8960.0" dsmax="123.456" ibrspl="2" ixrspl="3" name="Pure Cu" wcc="51.2" wcr="53.4"><composition><element weightFraction="1.0" z="29" /></composition><interactionForcing collision="hard bremsstrahlung emission" forcer="-4" particle="electron" whigh="1.0" wlow="0.1" /></mc-pen:material>')
         self.element = etree.parse(source).getroot()
 
     def tearDown(self):
@@ -83,6 +85,17 @@ class TestMaterialXMLHandler(unittest.TestCase):
 
         self.assertAlmostEqual(123.456, obj.maximum_step_length_m, 4)
 
+        self.assertEqual(2, obj.bremsstrahlung_splitting)
+        self.assertEqual(3, obj.xray_splitting)
+
+    def testparse_no_splitting(self):
+        del self.element.attrib['ibrspl']
+        del self.element.attrib['ixrspl']
+        obj = self.h.parse(self.element)
+
+        self.assertEqual(1, obj.bremsstrahlung_splitting)
+        self.assertEqual(1, obj.xray_splitting)
+
     def testcan_convert(self):
         self.assertTrue(self.h.can_convert(self.obj))
 
@@ -112,6 +125,9 @@ class TestMaterialXMLHandler(unittest.TestCase):
 
         self.assertAlmostEqual(123.456, float(element.get('dsmax')), 4)
 
+        self.assertEqual(2, int(element.get('ibrspl')))
+        self.assertEqual(3, int(element.get('ixrspl')))
+
 if __name__ == '__main__': #pragma: no cover
     logging.getLogger().setLevel(logging.DEBUG)
     unittest.main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`importer` -- Base importer of PENELOPE main programs
+================================================================================
+
+.. module:: importer
+   :synopsis: Base importer of PENELOPE main programs
+
+.. inheritance-diagram:: pymontecarlo.program._penelope.importer
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.program.importer import Importer as _Importer
+from pymontecarlo.program._penelope.directory import open_directory
+
+# Globals and constants variables.
+
+class Importer(_Importer):
+
+    def import_(self, options, source, *args, **kwargs):
+        """
+        Imports the results of a simulation.
+        The importers receive a directory object (see :mod:`directory`)
+        instead of a path.
+
+        :arg options: options of the simulation
+        :arg source: directory containing the simulation files, results ZIP
+            (path or binary file object) or directory object.
+            Only the members of a ZIP needed by the detectors are read.
+        """
+        directory = open_directory(source)
+        try:
+            return self._import(options, directory, *args, **kwargs)
+        finally:
+            if directory is not source:
+                directory.close()
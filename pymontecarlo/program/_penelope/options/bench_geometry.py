@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`bench_geometry` -- Benchmark of the serialization of PENELOPE geometries
+================================================================================
+
+.. module:: bench_geometry
+   :synopsis: Benchmark of the serialization of PENELOPE geometries
+
+Measures :meth:`PenelopeGeometry.to_geo` for multilayers of growing number of
+modules (layers and their grouping modules).
+
+Usage::
+
+    python -m pymontecarlo.program._penelope.options.bench_geometry \\
+        --baseline baseline.json
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import sys
+from collections import OrderedDict
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.options.geometry import HorizontalLayers
+
+from pymontecarlo.program._penelope.options.material import PenelopeMaterial
+from pymontecarlo.program._penelope.options.geometry import PenelopeGeometry
+from pymontecarlo.program._penelope.exporter import Exporter, GROUPING_BALANCED
+from pymontecarlo.program._penelope.benchmark import measure, median, run_suite
+
+# Globals and constants variables.
+MODULE_COUNTS = (10, 100, 1000, 10000)
+
+def create_geometry(modules):
+    """
+    Returns a :class:`PenelopeGeometry` of a multilayer with about *modules*
+    modules.
+    The layers are grouped in a balanced tree, i.e. each layer adds about two
+    modules.
+    """
+    mat1 = PenelopeMaterial({79: 0.5, 47: 0.5}, 'mat1')
+    mat2 = PenelopeMaterial({29: 0.5, 30: 0.5}, 'mat2')
+
+    geometry = HorizontalLayers(mat1)
+    for i in range(max(1, modules // 2 - 1)):
+        geometry.add_layer(mat2 if i % 2 else mat1, 10e-9)
+
+    pengeom = PenelopeGeometry('bench')
+    exporter = Exporter(None, grouping=GROUPING_BALANCED)
+    exporter._export_geometry(geometry, pengeom)
+
+    return pengeom
+
+def bench_to_geo(repeat=5, module_counts=MODULE_COUNTS):
+    """
+    Returns the median duration of :meth:`PenelopeGeometry.to_geo` for each
+    number of modules.
+    """
+    results = OrderedDict()
+    for modules in module_counts:
+        pengeom = create_geometry(modules)
+        name = 'to_geo (%i modules)' % len(pengeom.modules)
+        results[name] = median(measure(pengeom.to_geo, repeat))
+    return results
+
+def main(argv=None):
+    suites = OrderedDict([('PenelopeGeometry', bench_to_geo)])
+    return run_suite('Benchmark of the serialization of PENELOPE geometries',
+                     suites, argv)
+
+if __name__ == '__main__': #pragma: no cover
+    sys.exit(main())
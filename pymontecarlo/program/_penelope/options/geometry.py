@@ -22,6 +22,7 @@ __license__ = ""
 # Standard library modules.
 import math
 from itertools import chain
+from collections.abc import MutableSet
 from operator import methodcaller, attrgetter
 
 # Third party modules.
@@ -61,6 +62,37 @@ def topological_sort(d, k):
         yield from topological_sort(d, ii)
     yield k
 
+class _OrderedSet(MutableSet):
+    """
+    Set which remembers the order in which its items were added.
+    Contrary to :class:`set`, the iteration order does not depend on the
+    hash of the items and is therefore the same in every process.
+    """
+
+    def __init__(self, iterable=()):
+        self._items = dict.fromkeys(iterable)
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, list(self._items))
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, item):
+        self._items[item] = None
+
+    def discard(self, item):
+        self._items.pop(item, None)
+
+    def clear(self):
+        self._items.clear()
+
 class _Keyword(object):
     def __init__(self, name, termination=""):
         self._name = name
@@ -820,7 +852,7 @@ class Module(_Body):
         self.description = description
 
         self._surfaces = {}
-        self._modules = set()
+        self._modules = _OrderedSet()
 
         self._rotation = Rotation()
         self._shift = Shift()
@@ -947,7 +979,7 @@ class PenelopeGeometry(_Geometry):
         _Geometry.__init__(self)
 
         self.title = title
-        self._modules = set()
+        self._modules = _OrderedSet()
 
     @property
     def title(self):
@@ -965,19 +997,29 @@ class PenelopeGeometry(_Geometry):
         self._title = title
 
     def get_bodies(self):
-        return set(self._modules) # copy
+        return _OrderedSet(self._modules) # copy
+
+    def get_materials(self):
+        return _OrderedSet(module.material for module in self._modules)
 
     def get_surfaces(self):
-        return set(chain(*map(_SURFACES_GETTER, self.modules)))
+        return _OrderedSet(chain(*map(_SURFACES_GETTER, self.modules)))
 
     @property
     def modules(self):
         return self._modules
 
     def _indexify(self):
+        """
+        Assigns the index of the materials, surfaces and modules.
+        The indexes only depend on the order in which the modules, and their
+        surfaces, were added, so that the same geometry always results in
+        the same GEO file.
+        """
         # Materials
         VACUUM._index = 0
-        for i, material in enumerate(self.get_materials(), 1):
+        materials = [m for m in self.get_materials() if m is not VACUUM]
+        for i, material in enumerate(materials, 1):
             material._index = i
 
         # Surfaces
@@ -1025,9 +1067,9 @@ class PenelopeGeometry(_Geometry):
         extra = Module(self, VACUUM, description='Extra module for rotation and tilt')
 
         ## Find all unlinked modules
-        all_modules = set(self.modules)
         linked_modules = set(chain(*map(methodcaller('get_modules'), self.modules)))
-        unlinked_modules = all_modules - linked_modules
+        unlinked_modules = [module for module in self.modules
+                            if module not in linked_modules]
         for module in unlinked_modules:
             extra.add_module(module)
 
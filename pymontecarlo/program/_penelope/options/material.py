@@ -116,7 +116,8 @@ class PenelopeMaterial(_Material):
     def __init__(self, composition, name=None, density_kg_m3=None, absorption_energy_eV=None,
                  elastic_scattering=(0.0, 0.0),
                  cutoff_energy_inelastic_eV=50.0, cutoff_energy_bremsstrahlung_eV=50.0,
-                 interaction_forcings=None, maximum_step_length_m=1e15, *args, **kwargs):
+                 interaction_forcings=None, maximum_step_length_m=1e15,
+                 bremsstrahlung_splitting=1, xray_splitting=1, *args, **kwargs):
         """
         Creates a new material.
 
@@ -155,6 +156,12 @@ class PenelopeMaterial(_Material):
         :arg interaction_forcings: interaction forcing(s)
 
         :arg maximum_step_length_m: maximum length of an electron trajectory
+
+        :arg bremsstrahlung_splitting: splitting factor of the bremsstrahlung
+            photons (``IBRSPL``). ``1`` means no splitting.
+
+        :arg xray_splitting: splitting factor of the characteristic x-rays
+            (``IXRSPL``). ``1`` means no splitting.
         """
         _Material.__init__(self, composition, name, density_kg_m3, absorption_energy_eV)
 
@@ -184,46 +191,64 @@ class PenelopeMaterial(_Material):
             maximum_step_length_m = 1e20
         self._maximum_step_length_m = maximum_step_length_m
 
+        if int(bremsstrahlung_splitting) != bremsstrahlung_splitting or \
+                bremsstrahlung_splitting < 1:
+            raise ValueError('Bremsstrahlung splitting must be an integer greater or equal to 1')
+        self._bremsstrahlung_splitting = int(bremsstrahlung_splitting)
+
+        if int(xray_splitting) != xray_splitting or xray_splitting < 1:
+            raise ValueError('X-ray splitting must be an integer greater or equal to 1')
+        self._xray_splitting = int(xray_splitting)
+
     @classmethod
     def pure(cls, z, absorption_energy_eV=None, elastic_scattering=(0.0, 0.0),
              cutoff_energy_inelastic_eV=50.0, cutoff_energy_bremsstrahlung_eV=50.0,
-             interaction_forcings=None, maximum_step_length_m=1e20):
+             interaction_forcings=None, maximum_step_length_m=1e20,
+             bremsstrahlung_splitting=1, xray_splitting=1):
         mat = _Material.pure(z, absorption_energy_eV)
         return cls(mat.composition, mat.name, mat.density_kg_m3, mat.absorption_energy_eV,
                    elastic_scattering, cutoff_energy_inelastic_eV, cutoff_energy_bremsstrahlung_eV,
-                   interaction_forcings, maximum_step_length_m)
+                   interaction_forcings, maximum_step_length_m,
+                   bremsstrahlung_splitting, xray_splitting)
 
     @classmethod
     def from_formula(cls, formula, density_kg_m3=None, absorption_energy_eV=None,
                      elastic_scattering=(0.0, 0.0),
                      cutoff_energy_inelastic_eV=50.0,
                      cutoff_energy_bremsstrahlung_eV=50.0,
-                     interaction_forcings=None, maximum_step_length_m=1e20):
+                     interaction_forcings=None, maximum_step_length_m=1e20,
+                     bremsstrahlung_splitting=1, xray_splitting=1):
         mat = _Material.from_formula(formula, density_kg_m3, absorption_energy_eV)
         return cls(mat.composition, mat.name, mat.density_kg_m3, mat.absorption_energy_eV,
                    elastic_scattering, cutoff_energy_inelastic_eV, cutoff_energy_bremsstrahlung_eV,
-                   interaction_forcings, maximum_step_length_m)
+                   interaction_forcings, maximum_step_length_m,
+                   bremsstrahlung_splitting, xray_splitting)
 
     @classmethod
     def from_material(cls, mat, elastic_scattering=(0.0, 0.0),
                       cutoff_energy_inelastic_eV=50.0, cutoff_energy_bremsstrahlung_eV=50.0,
-                      interaction_forcings=None, maximum_step_length_m=1e20):
+                      interaction_forcings=None, maximum_step_length_m=1e20,
+                      bremsstrahlung_splitting=1, xray_splitting=1):
         elastic_scattering = getattr(mat, 'elastic_scattering', elastic_scattering)
         cutoff_energy_inelastic_eV = getattr(mat, 'cutoff_energy_inelastic_eV', cutoff_energy_inelastic_eV)
         cutoff_energy_bremsstrahlung_eV = getattr(mat, 'cutoff_energy_bremsstrahlung_eV', cutoff_energy_bremsstrahlung_eV)
         interaction_forcings = getattr(mat, 'interaction_forcings', interaction_forcings)
         maximum_step_length_m = getattr(mat, 'maximum_step_length_m', maximum_step_length_m)
+        bremsstrahlung_splitting = getattr(mat, 'bremsstrahlung_splitting', bremsstrahlung_splitting)
+        xray_splitting = getattr(mat, 'xray_splitting', xray_splitting)
 
         return cls(mat.composition, mat.name, mat.density_kg_m3, mat.absorption_energy_eV,
                    elastic_scattering, cutoff_energy_inelastic_eV, cutoff_energy_bremsstrahlung_eV,
-                   interaction_forcings, maximum_step_length_m)
+                   interaction_forcings, maximum_step_length_m,
+                   bremsstrahlung_splitting, xray_splitting)
 
     def __repr__(self):
-        return '<Material(name=%s, composition=%s, density=%s kg/m3, absorption energies=%s eV, elastic_scattering=%s, cutoff_inelastic=%s eV, cutoff_bremsstrahlung=%s eV, interaction_forcings=%s, maximum_step_length=%s m)>' % \
+        return '<Material(name=%s, composition=%s, density=%s kg/m3, absorption energies=%s eV, elastic_scattering=%s, cutoff_inelastic=%s eV, cutoff_bremsstrahlung=%s eV, interaction_forcings=%s, maximum_step_length=%s m, bremsstrahlung_splitting=%i, xray_splitting=%i)>' % \
             (self.name, self.composition, self.density_kg_m3, self.absorption_energy_eV,
              self.elastic_scattering,
              self.cutoff_energy_inelastic_eV, self.cutoff_energy_bremsstrahlung_eV,
-             self.interaction_forcings, self.maximum_step_length_m)
+             self.interaction_forcings, self.maximum_step_length_m,
+             self.bremsstrahlung_splitting, self.xray_splitting)
 
     @property
     def elastic_scattering(self):
@@ -260,3 +285,16 @@ class PenelopeMaterial(_Material):
         """
         return self._maximum_step_length_m
 
+    @property
+    def bremsstrahlung_splitting(self):
+        """
+        Splitting factor of the bremsstrahlung photons.
+        """
+        return self._bremsstrahlung_splitting
+
+    @property
+    def xray_splitting(self):
+        """
+        Splitting factor of the characteristic x-rays.
+        """
+        return self._xray_splitting
@@ -404,6 +404,16 @@ class TestPenelopeGeometry(TestCase):
         self.assertEqual(4, len(self.geo.get_surfaces()))
         self.assertEqual(2, len(self.geo.get_materials()))
 
+    def test_indexify(self):
+        self.geo._indexify()
+
+        surfaces = list(self.module1.get_surfaces())
+        self.assertEqual([0, 1, 2, 3], [s._index for s in surfaces])
+        self.assertEqual(1, self.module1.material._index)
+        self.assertEqual(2, self.module2.material._index)
+        self.assertEqual(0, self.module1._index)
+        self.assertEqual(1, self.module2._index)
+
     def testto_geo(self):
         lines = self.geo.to_geo()
         self.assertEqual(self.GEOFILE[:3], lines[:3])
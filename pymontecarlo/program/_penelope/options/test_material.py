@@ -102,7 +102,9 @@ class TestMaterial(TestCase):
                                   cutoff_energy_inelastic_eV=51.2,
                                   cutoff_energy_bremsstrahlung_eV=53.4,
                                   interaction_forcings=[if1],
-                                  maximum_step_length_m=123.456)
+                                  maximum_step_length_m=123.456,
+                                  bremsstrahlung_splitting=2,
+                                  xray_splitting=3)
 
     def tearDown(self):
         TestCase.tearDown(self)
@@ -138,6 +140,15 @@ class TestMaterial(TestCase):
 
         self.assertAlmostEqual(123.456, self.m.maximum_step_length_m, 4)
 
+        self.assertEqual(2, self.m.bremsstrahlung_splitting)
+        self.assertEqual(3, self.m.xray_splitting)
+
+    def testsplitting(self):
+        self.assertRaises(ValueError, PenelopeMaterial, {'Cu': 1.0},
+                          bremsstrahlung_splitting=0)
+        self.assertRaises(ValueError, PenelopeMaterial, {'Cu': 1.0},
+                          xray_splitting=1.5)
+
     def testpure(self):
         m = PenelopeMaterial.pure(29)
 
@@ -162,6 +173,9 @@ class TestMaterial(TestCase):
 
         self.assertAlmostEqual(1e20, m.maximum_step_length_m, 4)
 
+        self.assertEqual(1, m.bremsstrahlung_splitting)
+        self.assertEqual(1, m.xray_splitting)
+
 if __name__ == '__main__': #pragma: no cover
     logging.getLogger().setLevel(logging.DEBUG)
     unittest.main()
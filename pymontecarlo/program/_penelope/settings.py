@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`settings` -- Parsing of the options of the settings
+================================================================================
+
+.. module:: settings
+   :synopsis: Parsing of the options of the settings
+
+.. inheritance-diagram:: pymontecarlo.program._penelope.settings
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+
+# Third party modules.
+
+# Local modules.
+
+# Globals and constants variables.
+
+_TRUE_VALUES = frozenset(['true', 'yes', 'on', '1'])
+
+def _parse_bool(value):
+    """
+    Returns whether the value of an option of the settings is true
+    (``true``, ``yes``, ``on`` or ``1``, case insensitive).
+    """
+    return str(value).lower() in _TRUE_VALUES
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`store` -- Store of simulation results
+================================================================================
+
+.. module:: store
+   :synopsis: Store of simulation results
+
+.. inheritance-diagram:: pymontecarlo.program._penelope.store
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import os
+import shutil
+import hashlib
+import logging
+import tempfile
+from zipfile import ZipFile
+
+# Third party modules.
+
+# Local modules.
+
+# Globals and constants variables.
+_INPUT_EXTENSIONS = ('.in', '.geo', '.mat')
+
+# The title does not affect the simulation
+_IGNORED_PREFIXES = (b'TITLE ',)
+
+_executable_fingerprints = {}
+
+def _fingerprint_executable(filepath):
+    """
+    Returns the SHA-1 of the content of an executable.
+    The value is memoized as long as the size and modification time of the
+    file do not change.
+    """
+    filepath = os.path.realpath(filepath)
+    stat = os.stat(filepath)
+    memokey = (filepath, stat.st_size, stat.st_mtime)
+
+    if memokey not in _executable_fingerprints:
+        sha = hashlib.sha1()
+        with open(filepath, 'rb') as fp:
+            for data in iter(lambda: fp.read(1024 ** 2), b''):
+                sha.update(data)
+        _executable_fingerprints[memokey] = sha.hexdigest()
+
+    return _executable_fingerprints[memokey]
+
+def _update_inputs(sha, workdir, extra, ignored_prefixes):
+    for text in extra:
+        sha.update(b'\x00extra\x00' + text.encode('utf8'))
+
+    for filename in sorted(os.listdir(workdir)):
+        if os.path.splitext(filename)[1] not in _INPUT_EXTENSIONS:
+            continue
+
+        sha.update(b'\x00' + filename.encode('utf8') + b'\x00')
+
+        with open(os.path.join(workdir, filename), 'rb') as fp:
+            for line in fp:
+                if line.startswith(ignored_prefixes):
+                    continue
+                sha.update(line)
+
+def fingerprint_inputs(workdir, extra=(), ignored_prefixes=_IGNORED_PREFIXES):
+    """
+    Returns the SHA-1 of the input files (*in*, *geo* and *mat*) in *workdir*
+    and of the *extra* :class:`str`.
+    The lines starting with one of the *ignored_prefixes* (:class:`bytes`)
+    are ignored.
+    """
+    sha = hashlib.sha1()
+    _update_inputs(sha, workdir, extra, ignored_prefixes)
+    return sha.hexdigest()
+
+class ResultStore(object):
+
+    def __init__(self, dirpath):
+        """
+        Store of the results of simulations, identified by the content of
+        their input files and by the executable used to run them.
+
+        The input files are the *in*, *geo* and *mat* files exported in the
+        simulation directory. The title of the *in* file is ignored, so that
+        the same simulation with a different name is recognized.
+        The results are stored as the ZIP created by the worker.
+
+        :arg dirpath: directory where the results are stored
+        """
+        if not os.path.exists(dirpath):
+            os.makedirs(dirpath)
+        self._dirpath = dirpath
+
+    def __repr__(self):
+        return '<%s(%s)>' % (self.__class__.__name__, self.dirpath)
+
+    def create_key(self, workdir, executable, extra=()):
+        """
+        Returns the key of the simulation exported in *workdir* and run with
+        *executable*.
+
+        :arg extra: :class:`str` describing the parameters of the simulation
+            which are not written in its input files (e.g. the tuning of the
+            interaction forcings)
+        """
+        sha = hashlib.sha1()
+        sha.update(_fingerprint_executable(executable).encode('ascii'))
+        _update_inputs(sha, workdir, extra, _IGNORED_PREFIXES)
+        return sha.hexdigest()
+
+    def _get_filepath(self, key):
+        return os.path.join(self._dirpath, key + '.zip')
+
+    def __contains__(self, key):
+        return os.path.exists(self._get_filepath(key))
+
+    def fetch(self, key, zipfilepath, workdir):
+        """
+        Copies the stored results of *key* to *zipfilepath* and extracts them
+        in *workdir*.
+        Returns ``True`` if the results were found, ``False`` otherwise.
+        """
+        if key not in self:
+            return False
+
+        logging.debug('Results found in store: %s', key)
+        shutil.copy(self._get_filepath(key), zipfilepath)
+
+        with ZipFile(zipfilepath, 'r') as zipfile:
+            zipfile.extractall(workdir)
+
+        return True
+
+    def put(self, key, zipfilepath):
+        """
+        Stores the results (ZIP) of *key*.
+        """
+        # Copy under a temporary name first, so that other processes never
+        # see a partially written file
+        fd, tmpfilepath = tempfile.mkstemp('.tmp', dir=self._dirpath)
+        os.close(fd)
+        shutil.copy(zipfilepath, tmpfilepath)
+        os.replace(tmpfilepath, self._get_filepath(key))
+
+        logging.debug('Results stored: %s', key)
+
+    def discard(self, key):
+        """
+        Removes the stored results of *key*, if any.
+        """
+        if key in self:
+            os.remove(self._get_filepath(key))
+
+    @property
+    def dirpath(self):
+        """
+        Directory where the results are stored.
+        """
+        return self._dirpath
+
+def create_result_store(section):
+    """
+    Returns a :class:`ResultStore` located in the directory specified by the
+    ``resultstore`` option of a settings section, or ``None`` if it is not
+    specified.
+    """
+    dirpath = getattr(section, 'resultstore', None)
+    if not dirpath:
+        return None
+    return ResultStore(dirpath)
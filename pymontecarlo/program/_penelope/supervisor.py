@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`supervisor` -- Supervisor of concurrent PENELOPE processes
+================================================================================
+
+.. module:: supervisor
+   :synopsis: Supervisor of concurrent PENELOPE processes
+
+.. inheritance-diagram:: pymontecarlo.program._penelope.supervisor
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import os
+import time
+import asyncio
+import logging
+import threading
+import subprocess
+
+# Third party modules.
+
+# Local modules.
+
+# Globals and constants variables.
+
+class Job(object):
+
+    def __init__(self, args, infilepath, workdir,
+                 read_progress=None, stop=None, callback=None):
+        """
+        Process supervised by a :class:`Supervisor`.
+
+        :arg args: command line of the process
+        :arg infilepath: file sent to the standard input of the process
+        :arg workdir: working directory of the process
+        :arg read_progress: function taking a line of the standard output
+            (:class:`bytes`) and returning a :class:`tuple` of the status and
+            progress (each may be ``None`` if not reported by the line).
+            The function may raise an exception to abort the process.
+        :arg stop: function taking the job and returning whether the process
+            should be stopped, i.e. terminated and considered successful.
+            It is called each time a progress is reported.
+        :arg callback: function taking the job, called in a separate thread
+            once the process exited successfully (e.g. to import the results).
+            Its returned value is stored in :attr:`result`.
+        """
+        self.args = list(args)
+        self.infilepath = infilepath
+        self.workdir = workdir
+        self.read_progress = read_progress
+        self.stop = stop
+        self.callback = callback
+
+        self.status = 'Waiting'
+        self.progress = 0.0
+        self.returncode = None
+        self.stopped = False
+        self.error = None
+        self.result = None
+        self.start = None
+        self.duration_s = None
+
+    def __repr__(self):
+        return '<%s(%s, %s)>' % (self.__class__.__name__, self.workdir, self.status)
+
+    @property
+    def succeeded(self):
+        """
+        Whether the process exited successfully or was stopped, and the
+        callback did not raise an exception.
+        """
+        return self.error is None and (self.returncode == 0 or self.stopped)
+
+class Supervisor(object):
+
+    def __init__(self, max_processes=None, timeout_s=None, on_progress=None):
+        """
+        Launches and monitors many processes from a single event loop, instead
+        of one thread per process.
+
+        :arg max_processes: maximum number of processes running at the same
+            time (default: number of CPUs)
+        :arg timeout_s: maximum wall time of each process (default: no limit).
+            A process running longer is killed.
+        :arg on_progress: function taking a job, called each time the status
+            or progress of a job changes
+        """
+        if max_processes is None:
+            max_processes = os.cpu_count() or 1
+        if max_processes < 1:
+            raise ValueError('Maximum number of processes must be at least 1')
+        self._max_processes = max_processes
+        self._timeout_s = timeout_s
+        self._on_progress = on_progress
+
+        self._jobs = []
+        self._processes = set()
+        self._loop = None
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    def submit(self, args, infilepath, workdir,
+               read_progress=None, stop=None, callback=None):
+        """
+        Adds a process to the supervisor and returns its :class:`Job`.
+        The processes are only launched by :meth:`run`.
+        See :class:`Job` for the arguments.
+        """
+        job = Job(args, infilepath, workdir, read_progress, stop, callback)
+        self._jobs.append(job)
+        return job
+
+    def run(self):
+        """
+        Launches all the submitted processes (at most *max_processes* at the
+        same time) and waits until they are all finished.
+        Returns the jobs in the order they were submitted.
+        """
+        loop = asyncio.new_event_loop()
+        with self._lock:
+            self._loop = loop
+
+        try:
+            loop.run_until_complete(self._run_all())
+        finally:
+            with self._lock:
+                self._loop = None
+            loop.close()
+
+        return list(self._jobs)
+
+    def cancel(self):
+        """
+        Kills the running processes and does not launch the remaining ones.
+        This method can be called from any thread.
+        """
+        self._cancelled = True
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._kill_all)
+
+    def _kill_all(self):
+        for process in list(self._processes):
+            if process.returncode is None:
+                process.kill()
+
+    async def _run_all(self):
+        semaphore = asyncio.Semaphore(self._max_processes)
+        await asyncio.gather(*[self._run_job(job, semaphore) for job in self._jobs])
+
+    def _notify(self, job):
+        if self._on_progress is not None:
+            self._on_progress(job)
+
+    async def _run_job(self, job, semaphore):
+        async with semaphore:
+            if self._cancelled:
+                job.status = 'Cancelled'
+                job.error = RuntimeError('Cancelled before being launched')
+                return
+
+            logging.debug('Launching %s in %s', ' '.join(job.args), job.workdir)
+            start = job.start = time.time()
+
+            with open(job.infilepath, 'r') as stdin:
+                process = await asyncio.create_subprocess_exec(*job.args,
+                                                               stdin=stdin,
+                                                               stdout=subprocess.PIPE,
+                                                               stderr=subprocess.STDOUT,
+                                                               cwd=job.workdir)
+            self._processes.add(process)
+
+            job.status = 'Running'
+            self._notify(job)
+
+            try:
+                await self._monitor(job, process, start)
+            except Exception as ex:
+                job.error = ex
+                if process.returncode is None:
+                    process.kill()
+            finally:
+                job.returncode = await process.wait()
+                job.duration_s = time.time() - start
+                self._processes.discard(process)
+
+            if job.error is None and job.returncode != 0 and not job.stopped:
+                job.error = RuntimeError('Process exited with code %i' % job.returncode)
+
+            if self._cancelled and not job.stopped:
+                job.error = job.error or RuntimeError('Cancelled')
+
+        # Collect results outside of the limit of processes
+        if job.error is None and job.callback is not None:
+            job.status = 'Collecting results'
+            self._notify(job)
+            try:
+                loop = asyncio.get_running_loop()
+                job.result = await loop.run_in_executor(None, job.callback, job)
+            except Exception as ex:
+                job.error = ex
+
+        job.status = 'Completed' if job.error is None else 'Failed'
+        job.progress = 1.0 if job.error is None else job.progress
+        self._notify(job)
+
+    async def _monitor(self, job, process, start):
+        while True:
+            if self._timeout_s is None:
+                line = await process.stdout.readline()
+            else:
+                remaining_s = self._timeout_s - (time.time() - start)
+                try:
+                    line = await asyncio.wait_for(process.stdout.readline(),
+                                                  max(0.0, remaining_s))
+                except asyncio.TimeoutError:
+                    raise RuntimeError('Process exceeded %s s' % self._timeout_s)
+
+            if not line:
+                break
+
+            if job.read_progress is None:
+                continue
+
+            status, progress = job.read_progress(line)
+            if status is None and progress is None:
+                continue
+
+            if status is not None:
+                job.status = status
+            if progress is not None:
+                job.progress = progress
+            self._notify(job)
+
+            if job.stop is not None and progress is not None and job.stop(job):
+                logging.debug('Stopping %s', job.workdir)
+                job.stopped = True
+                process.terminate()
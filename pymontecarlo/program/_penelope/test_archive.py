@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import tempfile
+import shutil
+from zipfile import ZipFile, ZIP_STORED, ZIP_DEFLATED
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.program._penelope.archive import \
+    Archiver, create_archiver, CODEC_OFF, CODEC_STORE, CODEC_DEFLATE
+
+# Globals and constants variables.
+
+class _Section(object):
+    pass
+
+class TestArchiver(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.workdir = os.path.join(self.tmpdir, 'work')
+        os.makedirs(self.workdir)
+        for filename in ['test.in', 'pe-intens-01.dat', 'dump.dat']:
+            with open(os.path.join(self.workdir, filename), 'w') as fp:
+                fp.write(filename * 100)
+
+        self.zipfilepath = os.path.join(self.tmpdir, 'test.zip')
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _namelist(self):
+        with ZipFile(self.zipfilepath, 'r') as z:
+            return sorted(z.namelist())
+
+    def testarchive(self):
+        archiver = Archiver()
+        archiver.archive(self.workdir, self.zipfilepath, ['test.in'])
+
+        self.assertEqual(['dump.dat', 'pe-intens-01.dat'], self._namelist())
+        with ZipFile(self.zipfilepath, 'r') as z:
+            self.assertEqual(ZIP_DEFLATED, z.getinfo('dump.dat').compress_type)
+
+    def testarchive_off(self):
+        archiver = Archiver(CODEC_OFF)
+        archiver.archive(self.workdir, self.zipfilepath)
+        archiver.append(self.zipfilepath, 'timings.jsonl', '')
+
+        self.assertFalse(os.path.exists(self.zipfilepath))
+
+    def testarchive_store(self):
+        archiver = Archiver(CODEC_STORE)
+        archiver.archive(self.workdir, self.zipfilepath)
+
+        with ZipFile(self.zipfilepath, 'r') as z:
+            self.assertEqual(ZIP_STORED, z.getinfo('dump.dat').compress_type)
+
+    def testarchive_patterns(self):
+        archiver = Archiver(includes=['*.dat'], excludes=['dump.dat'])
+        archiver.archive(self.workdir, self.zipfilepath)
+
+        self.assertEqual(['pe-intens-01.dat'], self._namelist())
+
+    def testarchive_background(self):
+        archiver = Archiver(CODEC_DEFLATE, 1, background=True)
+        archiver.archive(self.workdir, self.zipfilepath)
+        archiver.append(self.zipfilepath, 'timings.jsonl', 'abc')
+
+        # The working directory can be removed right away
+        shutil.rmtree(self.workdir)
+
+        archiver.shutdown()
+
+        self.assertEqual(['dump.dat', 'pe-intens-01.dat', 'test.in', 'timings.jsonl'],
+                         self._namelist())
+        self.assertEqual(['test.zip'], os.listdir(self.tmpdir))
+
+    def testappend(self):
+        archiver = Archiver()
+        archiver.archive(self.workdir, self.zipfilepath)
+        archiver.append(self.zipfilepath, 'timings.jsonl', 'abc')
+        archiver.append(self.zipfilepath, 'timings.jsonl', 'def')
+
+        with ZipFile(self.zipfilepath, 'r') as z:
+            self.assertEqual(b'abc', z.read('timings.jsonl'))
+
+    def testunknown_codec(self):
+        self.assertRaises(ValueError, Archiver, 'abc')
+
+    def testcreate_archiver(self):
+        section = _Section()
+        archiver = create_archiver(section)
+        self.assertEqual(CODEC_DEFLATE, archiver.codec)
+        self.assertIsNone(archiver.level)
+        self.assertEqual(('*',), archiver.includes)
+        self.assertEqual((), archiver.excludes)
+        self.assertFalse(archiver.background)
+
+        section.archive = 'STORE'
+        section.archivelevel = '1'
+        section.archiveexclude = 'dump.dat, *.tmp'
+        section.archivebackground = 'yes'
+        archiver = create_archiver(section)
+        self.assertEqual(CODEC_STORE, archiver.codec)
+        self.assertEqual(1, archiver.level)
+        self.assertEqual(('dump.dat', '*.tmp'), archiver.excludes)
+        self.assertTrue(archiver.background)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
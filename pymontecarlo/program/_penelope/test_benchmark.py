@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import tempfile
+import shutil
+from collections import OrderedDict
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.program._penelope.benchmark import \
+    median, save_baseline, load_baseline, compare_baseline, run_suite
+
+# Globals and constants variables.
+
+class TestModule(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tmpdir, 'baseline.json')
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def testmedian(self):
+        self.assertAlmostEqual(2.0, median([3.0, 1.0, 2.0]), 4)
+        self.assertAlmostEqual(2.5, median([4.0, 1.0, 2.0, 3.0]), 4)
+
+    def testsave_baseline(self):
+        save_baseline(OrderedDict([('a', 1.0), ('b', 2.0)]), self.filepath)
+        save_baseline({'b': 3.0}, self.filepath)
+
+        baseline = load_baseline(self.filepath)
+        self.assertEqual(['a', 'b'], list(baseline.keys()))
+        self.assertAlmostEqual(1.0, baseline['a'], 4)
+        self.assertAlmostEqual(3.0, baseline['b'], 4)
+
+    def testcompare_baseline(self):
+        baseline = {'a': 1.0, 'b': 1.0}
+        results = OrderedDict([('a', 1.4), ('b', 2.0), ('c', 10.0)])
+
+        regressions = compare_baseline(results, baseline, 1.5)
+        self.assertEqual(['b'], list(regressions.keys()))
+        self.assertAlmostEqual(2.0, regressions['b'], 4)
+
+    def testrun_suite(self):
+        durations = [0.001]
+        suites = OrderedDict([('suite', lambda repeat: {'bench': durations[0]})])
+
+        argv = ['--baseline', self.filepath, '--repeat', '1']
+        self.assertEqual(0, run_suite('test', suites, argv + ['--update']))
+        self.assertAlmostEqual(0.001, load_baseline(self.filepath)['suite: bench'], 6)
+
+        self.assertEqual(0, run_suite('test', suites, argv))
+
+        durations[0] = 0.002
+        self.assertEqual(1, run_suite('test', suites, argv))
+        self.assertEqual(0, run_suite('test', suites, argv + ['--threshold', '3']))
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import tempfile
+import shutil
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.program._penelope.options.material import PenelopeMaterial
+from pymontecarlo.program._penelope.cache import MaterialCache
+
+# Globals and constants variables.
+
+class TestMaterialCache(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = MaterialCache(os.path.join(self.tmpdir, 'cache'), 150)
+
+        self.mat1 = PenelopeMaterial({79: 0.5, 47: 0.5}, 'mat1')
+        self.mat2 = PenelopeMaterial({29: 0.5, 30: 0.5}, 'mat2')
+        self.mat3 = PenelopeMaterial({13: 0.5, 14: 0.5}, 'mat3')
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _create_file(self, filename, content):
+        filepath = os.path.join(self.tmpdir, filename)
+        with open(filepath, 'w') as fp:
+            fp.write(content)
+        return filepath
+
+    def _read_file(self, filepath):
+        with open(filepath, 'r') as fp:
+            return fp.read()
+
+    def testget_put(self):
+        filepath = os.path.join(self.tmpdir, 'mat1.mat')
+        self.assertFalse(self.cache.get(self.mat1, None, filepath))
+        self.assertFalse(os.path.exists(filepath))
+
+        self._create_file('mat1.mat', 'a' * 50)
+        self.cache.put(self.mat1, None, filepath)
+        os.remove(filepath)
+
+        self.assertTrue(self.cache.get(self.mat1, None, filepath))
+        self.assertEqual('a' * 50, self._read_file(filepath))
+
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+        self.assertEqual(50, self.cache.size)
+
+    def testget_same_composition(self):
+        filepath = self._create_file('mat1.mat', 'a' * 50)
+        self.cache.put(self.mat1, None, filepath)
+
+        mat = PenelopeMaterial({47: 0.5, 79: 0.5}, 'other name')
+        filepath = os.path.join(self.tmpdir, 'other.mat')
+        self.assertTrue(self.cache.get(mat, None, filepath))
+
+        mat = PenelopeMaterial({47: 0.5, 79: 0.5}, 'other density', 1000.0)
+        self.assertFalse(self.cache.get(mat, None, filepath))
+
+    def testeviction(self):
+        filepath = self._create_file('mat1.mat', 'a' * 60)
+        self.cache.put(self.mat1, None, filepath)
+        filepath = self._create_file('mat2.mat', 'b' * 60)
+        self.cache.put(self.mat2, None, filepath)
+
+        # Use mat1 so that mat2 is the least recently used
+        for filename in os.listdir(self.cache.dirpath):
+            os.utime(os.path.join(self.cache.dirpath, filename), (0, 0))
+        self.assertTrue(self.cache.get(self.mat1, None, filepath))
+
+        filepath = self._create_file('mat3.mat', 'c' * 60)
+        self.cache.put(self.mat3, None, filepath)
+
+        self.assertEqual(120, self.cache.size)
+        self.assertTrue(self.cache.get(self.mat1, None, filepath))
+        self.assertFalse(self.cache.get(self.mat2, None, filepath))
+        self.assertTrue(self.cache.get(self.mat3, None, filepath))
+
+    def testget_keeps_mtime(self):
+        filepath = self._create_file('mat1.mat', 'a' * 50)
+        self.cache.put(self.mat1, None, filepath)
+        os.remove(filepath)
+
+        self.assertTrue(self.cache.get(self.mat1, None, filepath))
+        os.utime(filepath, (0, 0))
+
+        # A hit only marks the cached file as used, not its links
+        self.assertTrue(self.cache.get(self.mat1, None,
+                                       os.path.join(self.tmpdir, 'other.mat')))
+        self.assertEqual(0, os.stat(filepath).st_mtime)
+
+    def testclear(self):
+        filepath = self._create_file('mat1.mat', 'a' * 50)
+        self.cache.put(self.mat1, None, filepath)
+        self.cache.clear()
+
+        self.assertEqual(0, self.cache.size)
+        self.assertEqual([], os.listdir(self.cache.dirpath))
+        self.assertFalse(self.cache.get(self.mat1, None, filepath))
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
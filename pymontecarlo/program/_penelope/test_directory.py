@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import tempfile
+import shutil
+from zipfile import ZipFile
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.program._penelope.directory import \
+    Directory, ZipDirectory, open_directory
+
+# Globals and constants variables.
+
+class TestDirectory(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.dirpath = os.path.join(self.tmpdir, 'test1')
+        os.makedirs(os.path.join(self.dirpath, 'shard01'))
+        for filename in ['pe-map-01-depth.dat', 'pe-map-02-depth.dat',
+                         'penepma-res.dat']:
+            with open(os.path.join(self.dirpath, filename), 'w') as fp:
+                fp.write(filename)
+
+        self.zipfilepath = os.path.join(self.tmpdir, 'test1.zip')
+        with ZipFile(self.zipfilepath, 'w') as z:
+            for filename in os.listdir(self.dirpath):
+                z.write(os.path.join(self.dirpath, filename), filename)
+            z.writestr('shard01/penepma-res.dat', 'shard')
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _test_directory(self, directory):
+        self.assertTrue(directory.exists('penepma-res.dat'))
+        self.assertFalse(directory.exists('pe-gen-ph.dat'))
+        self.assertFalse(directory.exists('shard01'))
+
+        self.assertEqual(3, len(directory.listdir()))
+        self.assertEqual(['pe-map-01-depth.dat', 'pe-map-02-depth.dat'],
+                         directory.glob('pe-map-*-depth.dat'))
+
+        self.assertEqual(b'penepma-res.dat', directory.read('penepma-res.dat'))
+        with directory.open('pe-map-01-depth.dat') as fp:
+            self.assertEqual([b'pe-map-01-depth.dat'], list(fp))
+
+    def testdirectory(self):
+        with Directory(self.dirpath) as directory:
+            self._test_directory(directory)
+
+    def testzipdirectory(self):
+        with ZipDirectory(self.zipfilepath) as directory:
+            self._test_directory(directory)
+            self.assertEqual(self.zipfilepath + ':penepma-res.dat',
+                             directory.join('penepma-res.dat'))
+
+    def testzipdirectory_prefix(self):
+        with ZipDirectory(self.zipfilepath, 'shard01') as directory:
+            self.assertEqual(['penepma-res.dat'], directory.listdir())
+            self.assertEqual(b'shard', directory.read('penepma-res.dat'))
+
+    def testopen_directory(self):
+        with open_directory(self.dirpath) as directory:
+            self.assertIsInstance(directory, Directory)
+
+        with open_directory(self.zipfilepath) as directory:
+            self.assertIsInstance(directory, ZipDirectory)
+
+        with open(self.zipfilepath, 'rb') as fp:
+            with open_directory(fp) as directory:
+                self.assertIsInstance(directory, ZipDirectory)
+                self.assertTrue(directory.exists('penepma-res.dat'))
+
+        directory = Directory(self.dirpath)
+        self.assertIs(directory, open_directory(directory))
+
+        filepath = os.path.join(self.dirpath, 'penepma-res.dat')
+        self.assertRaises(ValueError, open_directory, filepath)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -14,6 +14,7 @@ import logging
 import os
 import tempfile
 import shutil
+from unittest import mock
 
 # Third party modules.
 from nose.plugins.attrib import attr
@@ -30,10 +31,34 @@ from pymontecarlo.options.limit import TimeLimit
 
 from pymontecarlo.program._penelope.options.material import PenelopeMaterial
 from pymontecarlo.program._penelope.converter import Converter
-from pymontecarlo.program._penelope.exporter import Exporter
+from pymontecarlo.program._penelope.options.geometry import PenelopeGeometry
+from pymontecarlo.program._penelope.cache import MaterialCache
+from pymontecarlo.program._penelope.exporter import \
+    (Exporter, ExporterException, GROUPING_LINEAR, GROUPING_BALANCED,
+     DEFAULT_EXTENT_M)
 import pypenelopelib.pengeom as pengeom
 
 # Globals and constants variables.
+from pymontecarlo.options.particle import ELECTRON, PHOTON, POSITRON
+
+def _depth(module):
+    return 1 + max([_depth(m) for m in module.get_modules()] or [0])
+
+def _leaves(module):
+    if not module.get_modules():
+        return [module]
+    leaves = []
+    for submodule in module.get_modules():
+        leaves.extend(_leaves(submodule))
+    return leaves
+
+def _fake_create_material_file(name, composition, density_kg_m3, filepath,
+                               pendbase_dir):
+    # Module level, so that it can be run in a worker process
+    if name == 'fail':
+        raise ValueError('Cannot create %s' % name)
+    with open(filepath, 'w') as fp:
+        fp.write('%s %i' % (name, os.getpid()))
 
 class TestPenelopeExporter(TestCase):
 
@@ -140,6 +165,162 @@ class TestPenelopeExporter(TestCase):
         matfilepath = os.path.join(self.tmpdir, 'mat3.mat')
         self.assertTrue(os.path.exists(matfilepath))
 
+    def _create_multilayers(self, count):
+        mat1 = PenelopeMaterial({79: 0.5, 47: 0.5}, 'mat1')
+        mat2 = PenelopeMaterial({29: 0.5, 30: 0.5}, 'mat2')
+
+        ops = Options()
+        ops.geometry = HorizontalLayers(mat1)
+        for i in range(count):
+            ops.geometry.add_layer(mat2 if i % 2 else mat1, 10e-9)
+        ops.limits.add(TimeLimit(100))
+
+        self.c._convert_geometry(ops)
+
+        return ops
+
+    def _export_pengeom(self, geometry, grouping):
+        self.e.grouping = grouping
+        pengeom = PenelopeGeometry()
+        self.e._export_geometry(geometry, pengeom)
+
+        linked = set()
+        for module in pengeom.modules:
+            linked.update(module.get_modules())
+        roots = [module for module in pengeom.modules if module not in linked]
+        self.assertEqual(1, len(roots))
+
+        return pengeom, roots[0]
+
+    def testgrouping(self):
+        self.assertEqual(GROUPING_LINEAR, self.e.grouping)
+        self.assertRaises(ValueError, setattr, self.e, 'grouping', 'abc')
+
+    def testexport_horizontal_layers_balanced(self):
+        ops = self._create_multilayers(15)
+
+        pengeom_linear, root_linear = \
+            self._export_pengeom(ops.geometry, GROUPING_LINEAR)
+        pengeom_balanced, root_balanced = \
+            self._export_pengeom(ops.geometry, GROUPING_BALANCED)
+
+        # Same number of modules, lower depth
+        self.assertEqual(len(pengeom_linear.modules), len(pengeom_balanced.modules))
+        self.assertEqual(16, _depth(root_linear))
+        self.assertEqual(5, _depth(root_balanced))
+
+        # Same layers, in the same order
+        leaves_linear = sorted(_leaves(root_linear),
+                               key=lambda m: -list(m.get_surfaces())[1].shift.z_m)
+        leaves_balanced = _leaves(root_balanced)
+        self.assertEqual([m.description for m in leaves_linear],
+                         [m.description for m in leaves_balanced])
+        self.assertEqual([m.material for m in leaves_linear],
+                         [m.material for m in leaves_balanced])
+
+        # Each group spans exactly its layers
+        for group in pengeom_balanced.modules:
+            if not group.get_modules():
+                continue
+            leaves = _leaves(group)
+            surfaces = list(group.get_surfaces())
+            self.assertIs(list(leaves[0].get_surfaces())[1], surfaces[1])
+            self.assertIs(list(leaves[-1].get_surfaces())[2], surfaces[2])
+
+    def testtight_bounds(self):
+        mat1 = PenelopeMaterial({79: 0.5, 47: 0.5}, 'mat')
+
+        ops = Options()
+        ops.beam.energy_eV = 15e3
+        ops.geometry = Substrate(mat1)
+        self.c._convert_geometry(ops)
+
+        # Disabled
+        self.assertAlmostEqual(DEFAULT_EXTENT_M,
+                               self.e._get_extent_m(ops.geometry, ops.beam), 12)
+
+        # Enabled
+        self.e.tight_bounds = True
+        extent_m = self.e._get_extent_m(ops.geometry, ops.beam)
+        self.assertLess(extent_m, DEFAULT_EXTENT_M)
+        self.assertAlmostEqual(DEFAULT_EXTENT_M,
+                               self.e._get_extent_m(ops.geometry, None), 12)
+
+        pengeom = PenelopeGeometry()
+        self.e._export_geometry(ops.geometry, pengeom, extent_m)
+        module = list(pengeom.modules)[0]
+        surface_bottom = list(module.get_surfaces())[2]
+        self.assertAlmostEqual(-extent_m, surface_bottom.shift.z_m, 12)
+
+        # Absorber
+        self.e._export_absorber(ops.geometry, pengeom, ops.beam.energy_eV)
+        self.assertEqual(2, len(pengeom.modules))
+
+        absorber = list(pengeom.modules)[1]
+        self.assertEqual([module], absorber.get_modules())
+        self.assertEqual(mat1.composition, absorber.material.composition)
+        self.assertAlmostEqual(13.5e3, absorber.material.absorption_energy_eV[ELECTRON], 4)
+        self.assertAlmostEqual(13.5e3, absorber.material.absorption_energy_eV[POSITRON], 4)
+        self.assertAlmostEqual(mat1.absorption_energy_eV[PHOTON],
+                               absorber.material.absorption_energy_eV[PHOTON], 4)
+
+    def testtight_bounds_photons(self):
+        mat1 = PenelopeMaterial.pure(29)
+
+        ops = Options()
+        ops.beam.energy_eV = 20e3
+        ops.geometry = Substrate(mat1)
+        self.c._convert_geometry(ops)
+
+        self.e.tight_bounds = True
+        pengeom = self.e.create_geometry(ops.geometry, ops.beam)
+        substrate, absorber = list(pengeom.modules)
+
+        # Attenuation length of Cu Ka in Cu
+        # (mass attenuation coefficient of 52.9 cm2/g, NIST XCOM)
+        attenuation_length_m = 1.0 / (52.9 * mat1.density_kg_m3 / 1e3) * 1e-2
+
+        # The tight volume is sized for electrons only, i.e. it is shallower
+        # than the depth from which Cu Ka is emitted
+        depth_m = -list(substrate.get_surfaces())[2].shift.z_m
+        self.assertLess(depth_m, attenuation_length_m)
+
+        # Photons are transported in the absorber over many attenuation
+        # lengths (less than 1e-6 of the intensity is lost)
+        depth_m = -list(absorber.get_surfaces())[2].shift.z_m
+        self.assertGreater(depth_m, 14.0 * attenuation_length_m)
+        self.assertAlmostEqual(mat1.absorption_energy_eV[PHOTON],
+                               absorber.material.absorption_energy_eV[PHOTON], 4)
+
+    def testtight_bounds_no_substrate(self):
+        mat1 = PenelopeMaterial({79: 0.5, 47: 0.5}, 'mat1')
+        mat2 = PenelopeMaterial({29: 1.0}, 'mat2')
+
+        ops = Options()
+        ops.beam.energy_eV = 15e3
+        ops.geometry = VerticalLayers(mat1, mat2)
+        self.c._convert_geometry(ops)
+
+        # No absorber to transport the photons, the tight bounds are ignored
+        self.e.tight_bounds = True
+        self.assertAlmostEqual(DEFAULT_EXTENT_M,
+                               self.e._get_extent_m(ops.geometry, ops.beam), 12)
+
+    @attr('slow')
+    def testexport_horizontal_layers_balanced_pengeom(self):
+        ops = self._create_multilayers(15)
+
+        self.e.grouping = GROUPING_BALANCED
+        self.e.export_geometry(ops.geometry, self.tmpdir)
+
+        # Test
+        geofilepath = os.path.join(self.tmpdir, 'horizontallayers.geo')
+        repfilepath = os.path.join(self.tmpdir, 'geometry.rep')
+        nmat, nbody = pengeom.init(geofilepath, repfilepath)
+
+        self.assertEqual(2, nmat)
+        self.assertEqual(32, nbody)
+
     @attr('slow')
     def testexport_vertical_layers(self):
         # Create
@@ -235,6 +416,94 @@ class TestPenelopeExporter(TestCase):
 #        self.assertTrue(os.path.exists(matfilepath))
 
 
+@mock.patch('pymontecarlo.program._penelope.exporter._create_material_file',
+            _fake_create_material_file)
+class TestExportMaterials(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.mat1 = PenelopeMaterial({79: 0.5, 47: 0.5}, 'mat1')
+        self.mat2 = PenelopeMaterial({29: 0.5, 30: 0.5}, 'mat2')
+        self.mat3 = PenelopeMaterial({13: 0.5, 14: 0.5}, 'mat3')
+        self.fail = PenelopeMaterial({6: 1.0}, 'fail')
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _create_matinfos(self, *materials):
+        return [(material, os.path.join(self.tmpdir, '%s.mat' % material.name))
+                for material in materials]
+
+    def _read(self, filepath):
+        with open(filepath, 'r') as fp:
+            return fp.read().split()
+
+    def testexport_materials_concurrent(self):
+        e = Exporter(None, max_workers=3)
+        matinfos = self._create_matinfos(self.mat1, self.mat2, self.mat3)
+
+        e._export_materials(matinfos)
+
+        for material, filepath in matinfos:
+            name, pid = self._read(filepath)
+            self.assertEqual(material.name, name)
+            self.assertNotEqual(os.getpid(), int(pid)) # created by a worker
+
+    def testexport_materials_error(self):
+        for max_workers in [1, 3]:
+            e = Exporter(None, max_workers=max_workers)
+            matinfos = self._create_matinfos(self.mat1, self.fail, self.mat2)
+
+            with self.assertRaises(ExporterException) as cm:
+                e._export_materials(matinfos)
+
+            # Only the failing material is reported, the others are created
+            message = str(cm.exception)
+            self.assertIn('fail (fail.mat)', message)
+            self.assertNotIn('mat1', message)
+            self.assertTrue(os.path.exists(matinfos[0][1]))
+            self.assertTrue(os.path.exists(matinfos[2][1]))
+
+    def testexport_materials_cache(self):
+        cache = MaterialCache(os.path.join(self.tmpdir, 'cache'))
+        filepath = os.path.join(self.tmpdir, 'cached.mat')
+        with open(filepath, 'w') as fp:
+            fp.write('cached 0')
+        cache.put(self.mat1, None, filepath)
+
+        e = Exporter(None, cache, max_workers=2)
+        matinfos = self._create_matinfos(self.mat1, self.mat2, self.mat3)
+
+        e._export_materials(matinfos)
+
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(2, cache.misses)
+        self.assertEqual('cached', self._read(matinfos[0][1])[0])
+        self.assertEqual('mat2', self._read(matinfos[1][1])[0])
+
+        # Materials created concurrently are added to the cache
+        filepath = os.path.join(self.tmpdir, 'other.mat')
+        self.assertTrue(cache.get(self.mat2, None, filepath))
+        self.assertEqual('mat2', self._read(filepath)[0])
+        self.assertTrue(cache.get(self.mat3, None, filepath))
+
+    def testexport_materials_cache_error(self):
+        cache = MaterialCache(os.path.join(self.tmpdir, 'cache'))
+        e = Exporter(None, cache, max_workers=2)
+        matinfos = self._create_matinfos(self.mat1, self.fail)
+
+        self.assertRaises(ExporterException, e._export_materials, matinfos)
+
+        # Nothing is cached when a material fails
+        filepath = os.path.join(self.tmpdir, 'other.mat')
+        self.assertFalse(cache.get(self.mat1, None, filepath))
+        self.assertFalse(cache.get(self.fail, None, filepath))
+
 if __name__ == '__main__': #pragma: no cover
     logging.getLogger().setLevel(logging.DEBUG)
     unittest.main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.options.material import VACUUM
+from pymontecarlo.program._penelope.options.material import PenelopeMaterial
+from pymontecarlo.program._penelope.extent import \
+    electron_range_m, interaction_extent_m
+
+# Globals and constants variables.
+
+class TestExtent(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.mat = PenelopeMaterial.pure(29)
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+
+    def testelectron_range_m(self):
+        self.assertAlmostEqual(1.46e-6, electron_range_m(20e3, self.mat), 7)
+        self.assertLess(electron_range_m(10e3, self.mat),
+                        electron_range_m(20e3, self.mat))
+
+    def testinteraction_extent_m(self):
+        extent_m = interaction_extent_m(20e3, [self.mat, VACUUM], 1.0)
+        self.assertAlmostEqual(electron_range_m(20e3, self.mat), extent_m, 12)
+
+        self.assertAlmostEqual(3.0 * extent_m,
+                               interaction_extent_m(20e3, [self.mat], 3.0), 12)
+        self.assertAlmostEqual(0.0, interaction_extent_m(20e3, [VACUUM]), 12)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
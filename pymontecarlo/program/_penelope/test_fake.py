@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import sys
+import tempfile
+import shutil
+import subprocess
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.program._penelope.fake import parse_input, write_penepma_results
+
+# Globals and constants variables.
+FAKE_EXECUTABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake.py')
+
+_PENEPMA_IN = '''TITLE  test
+SENERG 2.000000e+04                                [Energy of the electron beam, in eV]
+NBE    0 0 100                                      [E-interval and no. of energy bins]
+PDANGL 30 40 0 360 0                                   [Angular window, in deg, IPSF]
+PDENER 0 20000 500                                  [Energy window, no. of channels]
+PDANGL 40 50 0 360 0                                   [Angular window, in deg, IPSF]
+PDENER 0 20000 500                                  [Energy window, no. of channels]
+RESUME dump.dat                                [Resume from this dump file, 20 chars]
+DUMPTO dump.dat                                 [Generate this dump file, 20 chars]
+NSIMSH %e                                      [Desired number of simulated showers]
+TIME   1.000000e+38                                [Allotted simulation time, in sec]
+END
+'''
+
+_PENSHOWER_IN = '''TITLE  test
+SENERG 2.000000e+04                                [Energy of the electron beam, in eV]
+TRJSC  1                                                [Track secondary electrons?]
+NTRJM  5.000000e+00                            [Number of trajectories in the shower]
+END
+'''
+
+class TestFake(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _run(self, content):
+        filepath = os.path.join(self.tmpdir, 'test.in')
+        with open(filepath, 'w') as fp:
+            fp.write(content)
+
+        env = dict(os.environ, FAKE_PENELOPE_LINES='10')
+        with open(filepath, 'r') as stdin:
+            stdout = subprocess.check_output([sys.executable, FAKE_EXECUTABLE],
+                                             stdin=stdin, cwd=self.tmpdir, env=env)
+        return stdout.decode('ascii').splitlines()
+
+    def testparse_input(self):
+        keywords = parse_input(_PENEPMA_IN.splitlines())
+        self.assertEqual(2, len(keywords['PDENER']))
+        self.assertEqual(['0', '20000', '500'], keywords['PDENER'][0])
+        self.assertEqual(['dump.dat'], keywords['DUMPTO'][0])
+
+    def testpenepma(self):
+        lines = self._run(_PENEPMA_IN % 1e3)
+
+        progress = [line.split(',') for line in lines if len(line.split(',')) == 4]
+        self.assertEqual(10, len(progress))
+        self.assertAlmostEqual(1e3, float(progress[-1][0]), 4)
+
+        for filename in ['penepma-res.dat', 'pe-gen-ph.dat', 'dump.dat',
+                         'pe-intens-01.dat', 'pe-intens-02.dat',
+                         'pe-spect-01.dat', 'pe-spect-02.dat',
+                         'pe-energy-el-up.dat', 'pe-energy-el-down.dat']:
+            self.assertTrue(os.path.exists(os.path.join(self.tmpdir, filename)), filename)
+
+        with open(os.path.join(self.tmpdir, 'pe-spect-01.dat'), 'r') as fp:
+            rows = [line for line in fp if not line.strip().startswith('#')]
+        self.assertEqual(500, len(rows))
+
+        with open(os.path.join(self.tmpdir, 'pe-intens-01.dat'), 'r') as fp:
+            rows = [line.split() for line in fp if not line.strip().startswith('#')]
+        self.assertEqual(10, len(rows))
+        self.assertEqual(14, len(rows[0]))
+
+    def testpenepma_resume(self):
+        self._run(_PENEPMA_IN % 1e3)
+        lines = self._run(_PENEPMA_IN % 2e3)
+
+        progress = [line.split(',') for line in lines if len(line.split(',')) == 4]
+        self.assertAlmostEqual(1.2e3, float(progress[0][0]), 4)
+        self.assertAlmostEqual(2e3, float(progress[-1][0]), 4)
+
+    def testwrite_penepma_results(self):
+        keywords = {'PDENER': [['0', '20000', '500']],
+                    'GRIDZ': [['-1e-4', '0', '50']],
+                    'XRLINE': [['29010400', '0'], ['29010400', '1']]}
+        write_penepma_results(keywords, 1e3, 1.0, 1e3, self.tmpdir, 20, 100)
+
+        with open(os.path.join(self.tmpdir, 'pe-intens-01.dat'), 'r') as fp:
+            rows = [line for line in fp if not line.strip().startswith('#')]
+        self.assertEqual(20, len(rows))
+
+        with open(os.path.join(self.tmpdir, 'pe-spect-01.dat'), 'r') as fp:
+            rows = [line for line in fp if not line.strip().startswith('#')]
+        self.assertEqual(100, len(rows))
+
+        with open(os.path.join(self.tmpdir, 'pe-map-02-depth.dat'), 'r') as fp:
+            lines = fp.read().splitlines()
+        self.assertIn('Z = 29,K-L3, detector =  1', lines[1])
+        self.assertEqual(50, len(lines) - 6)
+
+    def testpenshower(self):
+        self._run(_PENSHOWER_IN)
+
+        filepath = os.path.join(self.tmpdir, 'pe-trajectories.dat')
+        with open(filepath, 'r') as fp:
+            trajectories = [line for line in fp if line.startswith('TRAJ')]
+        self.assertEqual(5, len(trajectories))
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.program._penelope.settings import _parse_bool
+
+# Globals and constants variables.
+
+class TestModule(TestCase):
+
+    def test_parse_bool(self):
+        for value in ['true', 'True', 'YES', 'on', '1', True, 1]:
+            self.assertTrue(_parse_bool(value), value)
+
+        for value in ['false', 'no', 'off', '0', '', None, False, 0]:
+            self.assertFalse(_parse_bool(value), value)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import sys
+import tempfile
+import shutil
+from zipfile import ZipFile
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.program._penelope.store import ResultStore, fingerprint_inputs
+
+# Globals and constants variables.
+
+class TestResultStore(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = ResultStore(os.path.join(self.tmpdir, 'store'))
+
+        self.workdir = os.path.join(self.tmpdir, 'work')
+        os.makedirs(self.workdir)
+
+        self._create_file('test.in', 'TITLE  test\nNSIMSH 1.0e3\n')
+        self._create_file('substrate.geo', 'geometry')
+        self._create_file('mat1.mat', 'material')
+
+        self.executable = sys.executable
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _create_file(self, filename, content):
+        filepath = os.path.join(self.workdir, filename)
+        with open(filepath, 'w') as fp:
+            fp.write(content)
+        return filepath
+
+    def testcreate_key(self):
+        key = self.store.create_key(self.workdir, self.executable)
+
+        # Title is ignored
+        self._create_file('test.in', 'TITLE  other\nNSIMSH 1.0e3\n')
+        self.assertEqual(key, self.store.create_key(self.workdir, self.executable))
+
+        # Results are ignored
+        self._create_file('penepma-res.dat', 'results')
+        self.assertEqual(key, self.store.create_key(self.workdir, self.executable))
+
+        self._create_file('test.in', 'TITLE  other\nNSIMSH 2.0e3\n')
+        self.assertNotEqual(key, self.store.create_key(self.workdir, self.executable))
+
+    def testfingerprint_inputs(self):
+        fingerprint = fingerprint_inputs(self.workdir)
+        self.assertEqual(fingerprint, fingerprint_inputs(self.workdir, []))
+        self.assertNotEqual(fingerprint, fingerprint_inputs(self.workdir, ['shards:2']))
+
+        # Seeds are only ignored if requested
+        self._create_file('test.in', 'TITLE  test\nRSEED  1 2\nNSIMSH 1.0e3\n')
+        self.assertNotEqual(fingerprint, fingerprint_inputs(self.workdir))
+        self.assertEqual(fingerprint,
+                         fingerprint_inputs(self.workdir, [], (b'TITLE ', b'RSEED ')))
+
+    def testcreate_key_extra(self):
+        key = self.store.create_key(self.workdir, self.executable)
+        self.assertEqual(key, self.store.create_key(self.workdir, self.executable, []))
+
+        key1 = self.store.create_key(self.workdir, self.executable, ['autotune'])
+        self.assertNotEqual(key, key1)
+        self.assertEqual(key1, self.store.create_key(self.workdir, self.executable,
+                                                     ['autotune']))
+        self.assertNotEqual(key1, self.store.create_key(self.workdir, self.executable,
+                                                        ['autotune', 'other']))
+
+    def testfetch_put(self):
+        key = self.store.create_key(self.workdir, self.executable)
+        zipfilepath = os.path.join(self.tmpdir, 'test.zip')
+
+        self.assertNotIn(key, self.store)
+        self.assertFalse(self.store.fetch(key, zipfilepath, self.workdir))
+
+        with ZipFile(zipfilepath, 'w') as zipfile:
+            zipfile.writestr('penepma-res.dat', 'results')
+        self.store.put(key, zipfilepath)
+        os.remove(zipfilepath)
+
+        self.assertIn(key, self.store)
+        self.assertTrue(self.store.fetch(key, zipfilepath, self.workdir))
+        self.assertTrue(os.path.exists(zipfilepath))
+        self.assertTrue(os.path.exists(os.path.join(self.workdir, 'penepma-res.dat')))
+
+        self.store.discard(key)
+        self.assertNotIn(key, self.store)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import sys
+import tempfile
+import shutil
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.program._penelope.supervisor import Supervisor
+
+# Globals and constants variables.
+
+# Prints the progress of 10 steps, then exits with the code read on stdin
+_SCRIPT = '''
+import sys, time
+code = int(sys.stdin.read())
+for i in range(10):
+    sys.stdout.write('%i,10\\n' % (i + 1))
+    sys.stdout.flush()
+    time.sleep(0.01)
+sys.exit(code)
+'''
+
+_SLOW_SCRIPT = 'import time; time.sleep(60)'
+
+def _read_progress(line):
+    infos = line.decode('ascii').split(',')
+    if len(infos) == 2:
+        return 'Running', float(infos[0]) / float(infos[1])
+    return None, None
+
+class TestSupervisor(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _create_infile(self, code):
+        filepath = os.path.join(self.tmpdir, 'code%i.in' % code)
+        with open(filepath, 'w') as fp:
+            fp.write(str(code))
+        return filepath
+
+    def testrun(self):
+        progresses = []
+        supervisor = Supervisor(2, on_progress=lambda job: progresses.append(job.progress))
+
+        for _ in range(4):
+            supervisor.submit([sys.executable, '-c', _SCRIPT],
+                              self._create_infile(0), self.tmpdir,
+                              _read_progress, callback=lambda job: job.returncode)
+        jobs = supervisor.run()
+
+        self.assertEqual(4, len(jobs))
+        for job in jobs:
+            self.assertTrue(job.succeeded)
+            self.assertFalse(job.stopped)
+            self.assertEqual(0, job.result)
+            self.assertAlmostEqual(1.0, job.progress, 4)
+            self.assertEqual('Completed', job.status)
+        self.assertGreater(len(progresses), 40)
+
+    def testrun_error(self):
+        supervisor = Supervisor()
+        job = supervisor.submit([sys.executable, '-c', _SCRIPT],
+                                self._create_infile(1), self.tmpdir,
+                                _read_progress)
+        supervisor.run()
+
+        self.assertFalse(job.succeeded)
+        self.assertEqual(1, job.returncode)
+        self.assertEqual('Failed', job.status)
+
+    def testrun_stop(self):
+        supervisor = Supervisor()
+        job = supervisor.submit([sys.executable, '-c', _SCRIPT],
+                                self._create_infile(1), self.tmpdir,
+                                _read_progress, lambda job: job.progress >= 0.5)
+        supervisor.run()
+
+        self.assertTrue(job.stopped)
+        self.assertTrue(job.succeeded)
+
+    def testrun_timeout(self):
+        supervisor = Supervisor(timeout_s=0.5)
+        job = supervisor.submit([sys.executable, '-c', _SLOW_SCRIPT],
+                                self._create_infile(0), self.tmpdir)
+        supervisor.run()
+
+        self.assertFalse(job.succeeded)
+        self.assertIsInstance(job.error, RuntimeError)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
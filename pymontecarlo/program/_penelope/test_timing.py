@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import json
+import tempfile
+import shutil
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.program._penelope.timing import \
+    Timer, span, add_timing_hook, remove_timing_hook, get_current_timer
+
+# Globals and constants variables.
+
+class TestTimer(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.spans = []
+        add_timing_hook(self.spans.append)
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+        remove_timing_hook(self.spans.append)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def testspan(self):
+        with Timer('sim1') as timer:
+            self.assertIs(timer, get_current_timer())
+
+            with span('export'):
+                pass
+            with span('run'):
+                pass
+            with span('export'):
+                pass
+
+        self.assertIsNone(get_current_timer())
+
+        self.assertEqual(3, len(timer.spans))
+        self.assertEqual(['export', 'run'], list(timer.durations().keys()))
+        self.assertEqual('sim1', timer.spans[0].run)
+
+        self.assertEqual(3, len(self.spans))
+
+    def testspan_exception(self):
+        with Timer('sim1') as timer:
+            try:
+                with span('run'):
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertEqual(1, len(timer.spans))
+
+    def testspan_no_timer(self):
+        with span('run'):
+            pass
+
+        self.assertEqual(1, len(self.spans))
+        self.assertIsNone(self.spans[0].run)
+
+    def testwrite_jsonl(self):
+        with Timer('sim1') as timer:
+            with span('run'):
+                pass
+
+        filepath = os.path.join(self.tmpdir, 'timings.jsonl')
+        timer.write_jsonl(filepath)
+        timer.write_jsonl(filepath)
+
+        with open(filepath, 'r') as fp:
+            records = [json.loads(line) for line in fp]
+        self.assertEqual(2, len(records))
+        self.assertEqual('sim1', records[0]['run'])
+        self.assertEqual('run', records[0]['name'])
+        self.assertIn('duration_s', records[0])
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`timing` -- Timing of the stages of a simulation
+================================================================================
+
+.. module:: timing
+   :synopsis: Timing of the stages of a simulation
+
+.. inheritance-diagram:: pymontecarlo.program._penelope.timing
+
+A :class:`Timer` records the spans of the stages of a simulation (export,
+run, import, etc.) measured with :func:`span`.
+Spans are recorded by the timer activated in the current thread, if any,
+and passed to the hooks registered with :func:`add_timing_hook`.
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import time
+import json
+import logging
+import threading
+from collections import namedtuple, OrderedDict
+from contextlib import contextmanager
+
+# Third party modules.
+
+# Local modules.
+
+# Globals and constants variables.
+
+Span = namedtuple('Span', ['run', 'name', 'start', 'duration_s'])
+
+_hooks = []
+_local = threading.local()
+
+def add_timing_hook(hook):
+    """
+    Registers a function called with each :class:`Span` once it ends.
+    Hooks are called from the thread running the stage.
+    """
+    _hooks.append(hook)
+
+def remove_timing_hook(hook):
+    """
+    Unregisters a function added with :func:`add_timing_hook`.
+    """
+    _hooks.remove(hook)
+
+def get_current_timer():
+    """
+    Returns the timer activated in the current thread or ``None``.
+    """
+    return getattr(_local, 'timer', None)
+
+@contextmanager
+def span(name):
+    """
+    Measures the duration of the enclosed block as a stage called *name*.
+    """
+    timer = get_current_timer()
+    run = timer.run if timer is not None else None
+
+    start = time.time()
+    start_perf = time.perf_counter()
+    try:
+        yield
+    finally:
+        record = Span(run, name, start, time.perf_counter() - start_perf)
+
+        if timer is not None:
+            timer.spans.append(record)
+
+        for hook in list(_hooks):
+            try:
+                hook(record)
+            except Exception:
+                logging.exception('Timing hook %r failed', hook)
+
+class Timer(object):
+
+    def __init__(self, run=None):
+        """
+        Records the spans of the stages of a simulation.
+        When used as a context manager, the timer is activated in the
+        current thread, i.e. it records the spans measured with :func:`span`.
+
+        :arg run: name of the simulation
+        """
+        self.run = run
+        self.spans = []
+        self._previous = None
+
+    def __repr__(self):
+        return '<%s(%s, %i spans)>' % (self.__class__.__name__, self.run, len(self.spans))
+
+    def __enter__(self):
+        self._previous = get_current_timer()
+        _local.timer = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.timer = self._previous
+        self._previous = None
+        return False
+
+    def durations(self):
+        """
+        Returns an ordered :class:`dict` of the total duration (in seconds)
+        of each stage, in the order they started.
+        """
+        durations = OrderedDict()
+        for record in self.spans:
+            durations[record.name] = durations.get(record.name, 0.0) + record.duration_s
+        return durations
+
+    def to_jsonl(self):
+        """
+        Returns the spans as JSON lines.
+        """
+        return ''.join(json.dumps(record._asdict(), sort_keys=True) + '\n'
+                       for record in self.spans)
+
+    def write_jsonl(self, filepath):
+        """
+        Appends the spans as JSON lines to a file.
+        """
+        with open(filepath, 'a') as fp:
+            fp.write(self.to_jsonl())
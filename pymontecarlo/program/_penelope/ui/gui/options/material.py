@@ -77,6 +77,17 @@ class _MaximumStepLengthValidator(NumericalValidator):
                 return QValidator.Intermediate
         return QValidator.Acceptable
 
+class _SplittingValidator(NumericalValidator):
+
+    def validate(self, values):
+        if len(values) == 0:
+            return QValidator.Intermediate
+
+        for value in values:
+            if value < 1 or int(value) != value:
+                return QValidator.Intermediate
+        return QValidator.Acceptable
+
 class _InteractionForcingForcerValidator(NumericalValidator):
 
     def validate(self, value):
@@ -369,6 +380,18 @@ class PenelopeMaterialDialog(_MaterialDialog):
         self._txt_maximum_step_length.setValues([1e15])
         self._cb_maximum_step_length_unit = UnitComboBox('m')
 
+        self._lbl_bremsstrahlung_splitting = QLabel('Bremsstrahlung')
+        self._lbl_bremsstrahlung_splitting.setStyleSheet("color: blue")
+        self._txt_bremsstrahlung_splitting = MultiNumericalLineEdit()
+        self._txt_bremsstrahlung_splitting.setValidator(_SplittingValidator())
+        self._txt_bremsstrahlung_splitting.setValues([1])
+
+        self._lbl_xray_splitting = QLabel('Characteristic x-rays')
+        self._lbl_xray_splitting.setStyleSheet("color: blue")
+        self._txt_xray_splitting = MultiNumericalLineEdit()
+        self._txt_xray_splitting.setValidator(_SplittingValidator())
+        self._txt_xray_splitting.setValues([1])
+
         self._tbl_forcing = QTableView()
         self._tbl_forcing.setModel(model_forcing)
         self._tbl_forcing.setItemDelegate(_InteractionForcingDelegate())
@@ -428,6 +451,13 @@ class PenelopeMaterialDialog(_MaterialDialog):
         box_forcing.setLayout(boxlayout)
         sublayout.addWidget(box_forcing)
 
+        box_splitting = QGroupBox('Splitting')
+        boxlayout = QFormLayout()
+        boxlayout.addRow(self._lbl_bremsstrahlung_splitting, self._txt_bremsstrahlung_splitting)
+        boxlayout.addRow(self._lbl_xray_splitting, self._txt_xray_splitting)
+        box_splitting.setLayout(boxlayout)
+        sublayout.addWidget(box_splitting)
+
         sublayout.addStretch()
 
         layout.addLayout(sublayout, 1)
@@ -438,6 +468,8 @@ class PenelopeMaterialDialog(_MaterialDialog):
         self._txt_cutoff_energy_inelastic.textChanged.connect(self._onCutoffEnergyInelasticChanged)
         self._txt_cutoff_energy_bremsstrahlung.textChanged.connect(self._onCutoffEnergyBremsstrahlungChanged)
         self._txt_maximum_step_length.textChanged.connect(self._onMaximumStepLengthChanged)
+        self._txt_bremsstrahlung_splitting.textChanged.connect(self._onBremsstrahlungSplittingChanged)
+        self._txt_xray_splitting.textChanged.connect(self._onXraySplittingChanged)
 
         act_add_forcing.triggered.connect(self._onForcingAdd)
         act_remove_forcing.triggered.connect(self._onForcingRemove)
@@ -474,6 +506,18 @@ class PenelopeMaterialDialog(_MaterialDialog):
         else:
             self._txt_maximum_step_length.setStyleSheet('background: pink')
 
+    def _onBremsstrahlungSplittingChanged(self):
+        if self._txt_bremsstrahlung_splitting.hasAcceptableInput():
+            self._txt_bremsstrahlung_splitting.setStyleSheet('background: none')
+        else:
+            self._txt_bremsstrahlung_splitting.setStyleSheet('background: pink')
+
+    def _onXraySplittingChanged(self):
+        if self._txt_xray_splitting.hasAcceptableInput():
+            self._txt_xray_splitting.setStyleSheet('background: none')
+        else:
+            self._txt_xray_splitting.setStyleSheet('background: pink')
+
     def _onForcingAdd(self):
         index = self._tbl_forcing.selectionModel().currentIndex()
         model = self._tbl_forcing.model()
@@ -507,6 +551,9 @@ class PenelopeMaterialDialog(_MaterialDialog):
         params['forcings'] = \
             self._tbl_forcing.model().interaction_forcings()
 
+        params['ibrspl'] = self._txt_bremsstrahlung_splitting.values().astype(int).tolist()
+        params['ixrspl'] = self._txt_xray_splitting.values().astype(int).tolist()
+
         return params
 
     def _generateName(self, parameters, varied):
@@ -537,6 +584,8 @@ class PenelopeMaterialDialog(_MaterialDialog):
         wcr = parameters['wcr']
         dsmax = parameters['dsmax']
         forcings = parameters['forcings']
+        ibrspl = parameters['ibrspl']
+        ixrspl = parameters['ixrspl']
 
         return PenelopeMaterial(mat.composition, mat.name, mat.density_kg_m3,
                                 mat.absorption_energy_eV,
@@ -544,7 +593,9 @@ class PenelopeMaterialDialog(_MaterialDialog):
                                 cutoff_energy_inelastic_eV=wcc,
                                 cutoff_energy_bremsstrahlung_eV=wcr,
                                 interaction_forcings=forcings,
-                                maximum_step_length_m=dsmax)
+                                maximum_step_length_m=dsmax,
+                                bremsstrahlung_splitting=ibrspl,
+                                xray_splitting=ixrspl)
 
     def setValue(self, material):
         _MaterialDialog.setValue(self, material)
@@ -565,6 +616,10 @@ class PenelopeMaterialDialog(_MaterialDialog):
         self._txt_maximum_step_length.setValues(material.maximum_step_length_m)
         self._cb_maximum_step_length_unit.setUnit('m')
 
+        # Splitting
+        self._txt_bremsstrahlung_splitting.setValues(material.bremsstrahlung_splitting)
+        self._txt_xray_splitting.setValues(material.xray_splitting)
+
         # Interaction forcings
         forcings = material.interaction_forcings
 
@@ -601,6 +656,12 @@ class PenelopeMaterialDialog(_MaterialDialog):
         self._txt_maximum_step_length.setReadOnly(state)
         self._cb_maximum_step_length_unit.setEnabled(not state)
 
+        self._lbl_bremsstrahlung_splitting.setStyleSheet(style)
+        self._txt_bremsstrahlung_splitting.setReadOnly(state)
+
+        self._lbl_xray_splitting.setStyleSheet(style)
+        self._txt_xray_splitting.setReadOnly(state)
+
         self._tbl_forcing.setEnabled(not state)
         self._tlb_forcing.setVisible(not state)
 
@@ -611,6 +672,8 @@ class PenelopeMaterialDialog(_MaterialDialog):
             self._txt_cutoff_energy_inelastic.isReadOnly() and \
             self._txt_cutoff_energy_bremsstrahlung.isReadOnly() and \
             self._txt_maximum_step_length.isReadOnly() and \
+            self._txt_bremsstrahlung_splitting.isReadOnly() and \
+            self._txt_xray_splitting.isReadOnly() and \
             not self._tbl_forcing.isEnabled() and \
             not self._tlb_forcing.isVisible()
 
@@ -624,6 +687,7 @@ def __run():
                          cutoff_energy_inelastic_eV=60.0,
                          cutoff_energy_bremsstrahlung_eV=70.0,
                          maximum_step_length_m=0.4,
+                         bremsstrahlung_splitting=2,
                          interaction_forcings=[InteractionForcing(ELECTRON, DELTA, -2.0, (0.05, 0.6))])
 
     app = QApplication(sys.argv)
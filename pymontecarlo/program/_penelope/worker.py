@@ -22,32 +22,98 @@ __license__ = "GPL v3"
 import os
 import logging
 import shutil
-from zipfile import ZipFile
 
 # Third party modules.
 
 # Local modules.
 from pymontecarlo.program.worker import SubprocessWorker as _Worker
+from pymontecarlo.program._penelope.timing import Timer, span
+from pymontecarlo.program._penelope.archive import Archiver
 
 # Globals and constants variables.
-from zipfile import ZIP_DEFLATED
+
+TIMINGS_FILENAME = 'timings.jsonl'
 
 class Worker(_Worker):
 
-    def __init__(self, program):
+    def __init__(self, program, archiver=None):
         """
         Runner to run PENSHOWER simulation(s).
+
+        :arg archiver: archiver of the simulation files
+            (:class:`Archiver`). If ``None``, all files are archived with
+            the deflate compression.
         """
         _Worker.__init__(self, program)
 
+        if archiver is None:
+            archiver = Archiver()
+        self._archiver = archiver
+
+        self._timings = []
+
+    @property
+    def archiver(self):
+        """
+        Archiver of the simulation files.
+        Call :meth:`Archiver.wait` to wait until the archives created in the
+        background are completed.
+        """
+        return self._archiver
+
+    @property
+    def timings(self):
+        """
+        :class:`list` of the :class:`Span` of the stages (export, run,
+        import, etc.) of the last simulation.
+        """
+        return self._timings
+
+    def _run_timed(self, options, outputdir, timinglog, func, *args, **kwargs):
+        """
+        Calls *func* while recording the spans of its stages.
+        The spans are saved in the results ZIP (:file:`timings.jsonl`) and,
+        if *timinglog* is specified, appended to this JSON lines file
+        (see :meth:`_save_timings`).
+        """
+        with Timer(options.name) as timer:
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._timings = list(timer.spans)
+                self._save_timings(timer, options, outputdir, timinglog)
+
+    def _save_timings(self, timer, options, outputdir, timinglog=None):
+        """
+        Saves the spans of the timer in the results ZIP and in *timinglog*.
+        An error is only logged, so that it does not hide the results or the
+        error of the simulation.
+        """
+        try:
+            # Only the ZIP in the output directory gets the timings: the ZIP is
+            # copied in the result store before, so results reused from a store
+            # get the timings of the run which reused them
+            zipfilepath = os.path.join(outputdir, options.name + '.zip')
+            self._archiver.append(zipfilepath, TIMINGS_FILENAME, timer.to_jsonl())
+
+            if timinglog:
+                timer.write_jsonl(timinglog)
+        except Exception:
+            logging.exception('Saving timings of %s failed', options.name)
+            return
+
+        logging.debug('Timings of %s: %s', options.name,
+                      ', '.join('%s=%.3fs' % item for item in timer.durations().items()))
+
     def create(self, options, outputdir, *args, **kwargs):
         # Create directory if needed
         if kwargs.get('createdir', True):
             simdir = os.path.join(outputdir, options.name)
-            if os.path.exists(simdir):
+            if os.path.exists(simdir) and not kwargs.get('resume', False):
                 logging.info("Simulation directory (%s) exists. It will be empty.", simdir)
                 shutil.rmtree(simdir, ignore_errors=True)
-            os.makedirs(simdir)
+            if not os.path.exists(simdir):
+                os.makedirs(simdir)
         else:
             simdir = outputdir
 
@@ -59,15 +125,13 @@ class Worker(_Worker):
 
         # Import results to pyMonteCarlo
         self._status = 'Importing results'
-        results = self.import_(options, workdir)
+        with span('import'):
+            results = self.import_(options, workdir)
 
-        # Create ZIP with all results
+        # Create ZIP with the results
         zipfilepath = os.path.join(outputdir, options.name + '.zip')
-        with ZipFile(zipfilepath, 'w', compression=ZIP_DEFLATED) as zipfile:
-            for filename in os.listdir(workdir):
-                if filename in exceptions:
-                    continue
-                filepath = os.path.join(workdir, filename)
-                zipfile.write(filepath, filename)
+        with span('archive'):
+            self._archiver.archive(workdir, zipfilepath,
+                                   list(exceptions) + [TIMINGS_FILENAME])
 
         return results
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`batch` -- Grouping of PENEPMA simulations sharing the same sample
+================================================================================
+
+.. module:: batch
+   :synopsis: Grouping of PENEPMA simulations sharing the same sample
+
+.. inheritance-diagram:: pymontecarlo.program.penepma.batch
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+from operator import attrgetter
+from collections import OrderedDict
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.options.material import VACUUM
+
+# Globals and constants variables.
+
+def _material_key(material):
+    """
+    Returns a hashable key of all the properties of a material written in
+    the *mat* file or in the input file.
+    """
+    absorption_energy_eV = sorted((str(particle), energy_eV)
+            for particle, energy_eV in material.absorption_energy_eV.items())
+    forcings = sorted((str(forcing.particle), str(forcing.collision),
+                       forcing.forcer, tuple(forcing.weight))
+                      for forcing in material.interaction_forcings)
+
+    return (tuple(sorted(material.composition.items())),
+            material.density_kg_m3,
+            tuple(absorption_energy_eV),
+            tuple(material.elastic_scattering),
+            material.cutoff_energy_inelastic_eV,
+            material.cutoff_energy_bremsstrahlung_eV,
+            tuple(forcings),
+            material.maximum_step_length_m,
+            material.bremsstrahlung_splitting,
+            material.xray_splitting)
+
+def create_sample_key(pengeom):
+    """
+    Returns a hashable key identifying the *geo* file and the *mat* files of
+    a :class:`PenelopeGeometry`.
+    Two simulations with the same key can share these files.
+    """
+    lines = tuple(pengeom.to_geo()) # Also indexes the materials
+
+    materials = [material for material in pengeom.get_materials()
+                 if material is not VACUUM]
+    materials.sort(key=attrgetter('_index'))
+
+    return lines, tuple(_material_key(material) for material in materials)
+
+def group_options(options_list, exporter):
+    """
+    Groups the options by sample, i.e. options with the same *geo* and *mat*
+    files.
+    Returns a :class:`list` of :class:`list` of the indexes of the options in
+    *options_list*. The groups and the indexes within a group are in the order
+    of *options_list*.
+
+    :arg options_list: :class:`list` of options
+    :arg exporter: exporter used to create the geometry
+    """
+    groups = OrderedDict()
+
+    for index, options in enumerate(options_list):
+        pengeom = exporter.create_geometry(options.geometry, options.beam)
+        key = create_sample_key(pengeom)
+        groups.setdefault(key, []).append(index)
+
+    return list(groups.values())
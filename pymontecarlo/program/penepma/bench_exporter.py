@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`bench_exporter` -- Benchmark of the PENEPMA exporter
+================================================================================
+
+.. module:: bench_exporter
+   :synopsis: Benchmark of the PENEPMA exporter
+
+Measures the creation of the input file (:meth:`Exporter._create_input_file`)
+and the indexing of the photon detectors (:func:`index_delimited_detectors`)
+for a growing number of detectors.
+No material file is generated.
+
+Usage::
+
+    python -m pymontecarlo.program.penepma.bench_exporter \\
+        --baseline baseline.json
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import sys
+import shutil
+import tempfile
+from math import radians
+from collections import OrderedDict
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.options.material import VACUUM
+from pymontecarlo.options.detector import PhotonIntensityDetector
+
+from pymontecarlo.program._penelope.benchmark import measure, median, run_suite
+from pymontecarlo.program.penepma.exporter import Exporter
+from pymontecarlo.program.penepma.options.detector import index_delimited_detectors
+from pymontecarlo.program.penepma.bench_worker import create_options
+
+# Globals and constants variables.
+INPUT_DETECTOR_COUNTS = (1, 5, 25) # PENEPMA supports at most 25 detectors
+INDEX_DETECTOR_COUNTS = (10, 100, 1000, 10000)
+
+def bench_create_input_file(repeat=5, detector_counts=INPUT_DETECTOR_COUNTS):
+    """
+    Returns the median duration of :meth:`Exporter._create_input_file` for
+    each number of photon detectors.
+    """
+    exporter = Exporter()
+    results = OrderedDict()
+
+    outputdir = tempfile.mkdtemp()
+    try:
+        for detectors in detector_counts:
+            options = create_options(detectors=detectors)
+
+            pengeom = exporter.create_geometry(options.geometry, options.beam)
+            pengeom.to_geo() # Assign indexes
+            geoinfo = (pengeom, pengeom.title + '.geo')
+            matinfos = [(material, 'mat%i.mat' % material._index)
+                        for material in pengeom.get_materials()
+                        if material is not VACUUM]
+
+            func = lambda: exporter._create_input_file(options, outputdir,
+                                                       geoinfo, matinfos)
+            name = '_create_input_file (%i detectors)' % detectors
+            results[name] = median(measure(func, repeat))
+    finally:
+        shutil.rmtree(outputdir, ignore_errors=True)
+
+    return results
+
+def create_detectors(count):
+    """
+    Returns a :class:`dict` of *count* photon intensity detectors, where
+    about one detector in ten has a unique opening.
+    """
+    detectors = {}
+    for i in range(count):
+        elevation = radians(10.0 + 70.0 * (i // 10) / max(1, count // 10))
+        detectors['xray%i' % i] = \
+            PhotonIntensityDetector((elevation, elevation + radians(5)),
+                                    (0, radians(360.0)))
+    return detectors
+
+def bench_index_delimited_detectors(repeat=5, detector_counts=INDEX_DETECTOR_COUNTS):
+    """
+    Returns the median duration of :func:`index_delimited_detectors` for
+    each number of detectors.
+    """
+    results = OrderedDict()
+    for count in detector_counts:
+        detectors = create_detectors(count)
+        func = lambda: index_delimited_detectors(detectors)
+        name = 'index_delimited_detectors (%i detectors)' % count
+        results[name] = median(measure(func, repeat))
+    return results
+
+def main(argv=None):
+    suites = OrderedDict([('Exporter', bench_create_input_file),
+                          ('Detectors', bench_index_delimited_detectors)])
+    return run_suite('Benchmark of the PENEPMA exporter', suites, argv)
+
+if __name__ == '__main__': #pragma: no cover
+    sys.exit(main())
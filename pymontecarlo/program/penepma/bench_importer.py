@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`bench_importer` -- Benchmark of the PENEPMA importer
+================================================================================
+
+.. module:: bench_importer
+   :synopsis: Benchmark of the PENEPMA importer
+
+Measures each method of the PENEPMA :class:`Importer` on synthetic results
+of growing size (number of x-ray lines and of channels), written by the
+fake executable (:mod:`pymontecarlo.program._penelope.fake`).
+
+Usage::
+
+    python -m pymontecarlo.program.penepma.bench_importer \\
+        --baseline baseline.json
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import sys
+import shutil
+import tempfile
+from math import radians
+from collections import OrderedDict
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.options.options import Options
+from pymontecarlo.options.detector import \
+    (_PhotonDelimitedDetector,
+     PhotonSpectrumDetector,
+     PhotonIntensityDetector,
+     PhotonDepthDetector,
+     ElectronFractionDetector,
+     TimeDetector,
+     ShowersStatisticsDetector,
+     BackscatteredElectronEnergyDetector,
+     TransmittedElectronEnergyDetector)
+
+from pymontecarlo.program._penelope.fake import write_penepma_results
+from pymontecarlo.program._penelope.benchmark import measure, median, run_suite
+from pymontecarlo.program._penelope.directory import Directory
+from pymontecarlo.program.penepma.importer import Importer, ImportContext
+from pymontecarlo.program.penepma.options.detector import index_delimited_detectors
+
+# Globals and constants variables.
+SIZES = (100, 1000, 10000)
+DEPTH_MAPS = 10
+
+_DETECTORS = [('intensity', '_import_photon_intensity'),
+              ('spectrum', '_import_photon_spectrum'),
+              ('depth', '_import_photon_depth'),
+              ('fraction', '_import_electron_fraction'),
+              ('time', '_import_time'),
+              ('showers', '_import_showers_statistics'),
+              ('bse', '_import_backscattered_electron_energy'),
+              ('transmitted', '_import_transmitted_electron_energy')]
+
+def create_options(channels):
+    """
+    Returns options with one detector of each type supported by the importer.
+    """
+    elevation = (radians(35), radians(45))
+    azimuth = (0, radians(360.0))
+
+    ops = Options('bench')
+    ops.beam.energy_eV = 20e3
+    ops.detectors['intensity'] = PhotonIntensityDetector(elevation, azimuth)
+    ops.detectors['spectrum'] = \
+        PhotonSpectrumDetector(elevation, azimuth, channels, (0, 20e3))
+    ops.detectors['depth'] = PhotonDepthDetector(elevation, azimuth, channels)
+    ops.detectors['fraction'] = ElectronFractionDetector()
+    ops.detectors['time'] = TimeDetector()
+    ops.detectors['showers'] = ShowersStatisticsDetector()
+    ops.detectors['bse'] = BackscatteredElectronEnergyDetector(channels, (0.0, 20e3))
+    ops.detectors['transmitted'] = TransmittedElectronEnergyDetector(channels, (0.0, 20e3))
+    return ops
+
+def write_results(dirpath, size):
+    """
+    Writes synthetic PENEPMA results in a directory, where the intensity
+    files have *size* x-ray lines, and the spectrum, distributions and
+    :const:`DEPTH_MAPS` depth maps have *size* channels.
+    """
+    keywords = {'SENERG': [['2e4']],
+                'PDENER': [['0', '2e4', str(size)]],
+                'NBE': [['0', '2e4', str(size)]],
+                'GRIDZ': [['-1e-4', '0', str(size)]],
+                'XRLINE': []}
+    for i in range(DEPTH_MAPS):
+        code = str((30 + i // 2) * 1000000 + 1 * 10000 + 4 * 100) # K-L3
+        keywords['XRLINE'].append([code, str(i % 2)])
+
+    write_penepma_results(keywords, 1e6, 100.0, 1e4, dirpath, size, size)
+
+def bench_importer(repeat=5, sizes=SIZES):
+    """
+    Returns the median duration of each method of the :class:`Importer` for
+    each size of the results (see :func:`write_results`).
+    """
+    importer = Importer()
+    results = OrderedDict()
+
+    for size in sizes:
+        options = create_options(size)
+        dets = dict(options.detectors.iterclass(_PhotonDelimitedDetector))
+        phdets_key_index, phdets_index_keys = index_delimited_detectors(dets)
+
+        dirpath = tempfile.mkdtemp()
+        try:
+            write_results(dirpath, size)
+            directory = Directory(dirpath)
+
+            for key, methodname in _DETECTORS:
+                method = getattr(importer, methodname)
+                detector = options.detectors[key]
+                func = lambda: method(options, key, detector, directory,
+                                      phdets_key_index, phdets_index_keys,
+                                      ImportContext(directory))
+                name = '%s (%i)' % (methodname, size)
+                results[name] = median(measure(func, repeat))
+
+            func = lambda: importer.import_(options, dirpath)
+            results['import_ (%i)' % size] = median(measure(func, repeat))
+        finally:
+            shutil.rmtree(dirpath, ignore_errors=True)
+
+    return results
+
+def main(argv=None):
+    suites = OrderedDict([('Importer', bench_importer)])
+    return run_suite('Benchmark of the PENEPMA importer', suites, argv)
+
+if __name__ == '__main__': #pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`bench_suite` -- Benchmark suite of PENEPMA
+================================================================================
+
+.. module:: bench_suite
+   :synopsis: Benchmark suite of PENEPMA
+
+Runs the benchmarks of the serialization of the geometries, of the exporter
+and of the importer, and compares their durations with a baseline.
+The command exits with status 1 if a benchmark is slower than its baseline
+by more than the threshold.
+Baselines depend on the machine; they are created with ``--update``.
+
+Usage::
+
+    python -m pymontecarlo.program.penepma.bench_suite \\
+        --baseline baseline.json --update
+    python -m pymontecarlo.program.penepma.bench_suite \\
+        --baseline baseline.json --threshold 1.5
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import sys
+from collections import OrderedDict
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.program._penelope.benchmark import run_suite
+from pymontecarlo.program._penelope.options.bench_geometry import bench_to_geo
+from pymontecarlo.program.penepma.bench_exporter import \
+    bench_create_input_file, bench_index_delimited_detectors
+from pymontecarlo.program.penepma.bench_importer import bench_importer
+
+# Globals and constants variables.
+
+def main(argv=None):
+    suites = OrderedDict([('PenelopeGeometry', bench_to_geo),
+                          ('Exporter', bench_create_input_file),
+                          ('Detectors', bench_index_delimited_detectors),
+                          ('Importer', bench_importer)])
+    return run_suite('Benchmark suite of PENEPMA', suites, argv)
+
+if __name__ == '__main__': #pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`bench_worker` -- Benchmark of the overhead of the PENEPMA worker
+================================================================================
+
+.. module:: bench_worker
+   :synopsis: Benchmark of the overhead of the PENEPMA worker
+
+Measures the time spent by the PENEPMA worker around the simulation itself
+(export, launch, import, archive), by running it with the fake executable
+(:mod:`pymontecarlo.program._penelope.fake`), which returns immediately.
+
+Usage::
+
+    python -m pymontecarlo.program.penepma.bench_worker
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import shutil
+import tempfile
+import argparse
+from math import radians
+from collections import OrderedDict
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.options.options import Options
+from pymontecarlo.options.detector import \
+    PhotonIntensityDetector, PhotonSpectrumDetector, TimeDetector
+from pymontecarlo.options.limit import ShowersLimit
+
+from pymontecarlo.program._penelope.options.material import PenelopeMaterial
+from pymontecarlo.program._penelope.benchmark import \
+    fake_executable, measure, median, format_report, stage_medians
+from pymontecarlo.program.penepma.config import program
+from pymontecarlo.program.penepma.converter import Converter
+from pymontecarlo.program.penepma.worker import Worker
+
+# Globals and constants variables.
+
+def create_options(name='bench', detectors=1):
+    """
+    Returns options of a copper substrate with *detectors* photon intensity
+    and spectrum detectors.
+    """
+    ops = Options(name)
+    ops.beam.energy_eV = 20e3
+    ops.geometry.body.material = PenelopeMaterial.pure(29)
+    for i in range(detectors):
+        elevation = radians(30 + i)
+        ops.detectors['xray%i' % i] = \
+            PhotonIntensityDetector((elevation, elevation + radians(10)),
+                                    (0, radians(360.0)))
+        ops.detectors['spectrum%i' % i] = \
+            PhotonSpectrumDetector((elevation, elevation + radians(10)),
+                                   (0, radians(360.0)), 1000, (0, 20e3))
+    ops.detectors['time'] = TimeDetector()
+    ops.limits.add(ShowersLimit(1000))
+    return Converter().convert(ops)[0]
+
+def bench_run(repeat=5, **kwargs):
+    """
+    Returns the median duration of each stage of :meth:`Worker.run` and
+    of the whole run (``total``).
+    The keyword arguments are passed to :meth:`Worker.run`.
+    """
+    options = create_options()
+    worker = Worker(program)
+    timings_list = []
+    dirpaths = []
+
+    def _setup():
+        dirpaths[:] = [tempfile.mkdtemp(), tempfile.mkdtemp()]
+
+    def _run():
+        try:
+            worker.run(options, dirpaths[0], dirpaths[1], **kwargs)
+        finally:
+            timings_list.append(worker.timings)
+            for dirpath in dirpaths:
+                shutil.rmtree(dirpath, ignore_errors=True)
+
+    durations = measure(_run, repeat, _setup)
+
+    results = stage_medians(timings_list)
+    results['total'] = median(durations)
+    return results
+
+def bench_batch(count=16, repeat=3, max_processes=None):
+    """
+    Returns the median duration per simulation of :meth:`Worker.run_batch`
+    with *count* simulations of the same sample.
+    """
+    options_list = [create_options('bench%i' % i) for i in range(count)]
+
+    worker = Worker(program)
+    dirpaths = []
+
+    def _setup():
+        dirpaths[:] = [tempfile.mkdtemp(), tempfile.mkdtemp()]
+
+    def _run():
+        try:
+            worker.run_batch(options_list, dirpaths[0], dirpaths[1], max_processes)
+        finally:
+            for dirpath in dirpaths:
+                shutil.rmtree(dirpath, ignore_errors=True)
+
+    durations = measure(_run, repeat, _setup)
+    return OrderedDict([('per simulation', median(durations) / count)])
+
+def run(repeat=5, **env):
+    """
+    Runs all the benchmarks of the worker with the fake executable and
+    returns the report.
+    """
+    reports = []
+    with fake_executable('penepma', **env):
+        reports.append(format_report('Worker.run', bench_run(repeat)))
+        reports.append(format_report('Worker.run (4 shards)', bench_run(repeat, shards=4)))
+        reports.append(format_report('Worker.run_batch', bench_batch()))
+    return '\n\n'.join(reports)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of the overhead of the PENEPMA worker')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of runs of each benchmark')
+    parser.add_argument('--lines', type=int, default=100,
+                        help='Number of x-ray lines in the intensity files')
+    parser.add_argument('--channels', type=int, default=1000,
+                        help='Number of channels of the spectra')
+    args = parser.parse_args()
+
+    print(run(args.repeat, lines=args.lines, channels=args.channels))
+
+if __name__ == '__main__': #pragma: no cover
+    main()
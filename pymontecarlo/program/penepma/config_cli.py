@@ -48,4 +48,9 @@ class _PenepmaCLI(CLI):
         default = getattr(section, 'dumpp', None)
         section.dumpp = console.prompt_int(question, default)
 
+        # shards
+        question = 'Number of processes per simulation'
+        default = getattr(section, 'shards', 1)
+        section.shards = console.prompt_int(question, default)
+
 cli = _PenepmaCLI()
@@ -46,11 +46,17 @@ class _PenepmaConfigurePanelWidget(_ConfigurePanelWidget):
         self._spn_dumpp.setMinimum(30)
         self._spn_dumpp.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
 
+        self._spn_shards = QSpinBox()
+        self._spn_shards.setMinimum(1)
+        self._spn_shards.setMaximum(256)
+        self._spn_shards.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+
         # Layouts
         layout = _ConfigurePanelWidget._initUI(self)
         layout.addRow("Path to pendbase directory", self._brw_pendbase)
         layout.addRow('Path to PENEPMA executable', self._brw_exe)
         layout.addRow('Interval between dump (s)', self._spn_dumpp)
+        layout.addRow('Number of processes per simulation', self._spn_shards)
 
         # Signals
         self._brw_pendbase.pathChanged.connect(self._onPathChanged)
@@ -95,11 +101,18 @@ class _PenepmaConfigurePanelWidget(_ConfigurePanelWidget):
             except (TypeError, ValueError):
                 pass
 
+            try:
+                shards = int(getattr(settings.penepma, 'shards', 1))
+                self._spn_shards.setValue(shards)
+            except (TypeError, ValueError):
+                pass
+
     def updateSettings(self, settings):
         section = _ConfigurePanelWidget.updateSettings(self, settings)
         section.pendbase = self._brw_pendbase.path()
         section.exe = self._brw_exe.path()
         section.dumpp = int(self._spn_dumpp.value())
+        section.shards = int(self._spn_shards.value())
         return section
 
 class _PenepmaGUI(GUI):
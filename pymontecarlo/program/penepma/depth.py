@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`depth` -- Array-backed photon depth distributions
+================================================================================
+
+.. module:: depth
+   :synopsis: Array-backed photon depth distributions
+
+.. inheritance-diagram:: pymontecarlo.program.penepma.depth
+
+The photon depth distributions (:file:`pe-map-XX-depth.dat`) of a simulation
+are stored in a single array of shape ``(distributions, channels, 3)``,
+where each distribution contains the depth (in m), the density of x-ray
+emission and its uncertainty of each channel.
+Channels missing from shorter distributions are NaN and the number of
+channels of each distribution is kept, so that the padding is never
+returned.
+The :class:`DepthTable` maps each :class:`PhotonKey` to its row.
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pymontecarlo.results.result import PhotonDepthResult
+
+# Globals and constants variables.
+
+class DepthTable(object):
+
+    def __init__(self, keys, values, lengths=None):
+        """
+        Photon depth distributions of a simulation.
+
+        :arg keys: :class:`list` of :class:`PhotonKey`, one for each
+            distribution
+        :arg values: array of shape ``(len(keys), channels, 3)``
+            (see :mod:`depth`)
+        :arg lengths: number of channels of each distribution.
+            If ``None``, all distributions have ``channels`` channels.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 3 or values.shape[0] != len(keys) or values.shape[2] != 3:
+            raise ValueError('Invalid shape of distributions: %s' % (values.shape,))
+
+        if lengths is None:
+            lengths = [values.shape[1]] * len(keys)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        if lengths.shape != (len(keys),) or \
+                np.any(lengths < 0) or np.any(lengths > values.shape[1]):
+            raise ValueError('Invalid lengths of distributions: %s' % (lengths,))
+
+        self._keys = list(keys)
+        self._indexes = dict((key, i) for i, key in enumerate(self._keys))
+        self._values = values
+        self._values.flags.writeable = False
+        self._lengths = lengths
+        self._lengths.flags.writeable = False
+
+    def __repr__(self):
+        return '<%s(%i distributions, %i channels)>' % \
+            (self.__class__.__name__, len(self._keys), self._values.shape[1])
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._indexes
+
+    def __getitem__(self, key):
+        index = self._indexes[key]
+        return self._values[index, :self._lengths[index]]
+
+    def index(self, key):
+        """
+        Returns the row of a photon key in :attr:`values`.
+        Raises :exc:`KeyError` if the key is not in the table.
+        """
+        return self._indexes[key]
+
+    @property
+    def keys(self):
+        """
+        Photon keys, in the order of the rows of :attr:`values`.
+        """
+        return list(self._keys)
+
+    @property
+    def values(self):
+        """
+        Read-only array of the distributions (see :mod:`depth`).
+        """
+        return self._values
+
+    @property
+    def lengths(self):
+        """
+        Read-only array of the number of channels of each distribution.
+        """
+        return self._lengths
+
+class TabularPhotonDepthResult(PhotonDepthResult):
+
+    def __init__(self, table):
+        """
+        :class:`PhotonDepthResult` backed by a :class:`DepthTable`.
+        The distribution of each key is a view of its row of the table,
+        without the padding channels.
+
+        :arg table: :class:`DepthTable`
+        """
+        distributions = dict((key, table[key]) for key in table.keys)
+        PhotonDepthResult.__init__(self, distributions)
+
+        self._table = table
+
+    @property
+    def table(self):
+        """
+        :class:`DepthTable` of the distributions.
+        """
+        return self._table
@@ -54,7 +54,10 @@ from pymontecarlo.options.beam import GaussianBeam
 from pymontecarlo.util.photon_range import photon_range
 
 from pymontecarlo.program._penelope.exporter import \
-    Exporter as _Exporter, Keyword, Comment, ExporterException, ExporterWarning
+    (Exporter as _Exporter, Keyword, Comment, ExporterException, ExporterWarning,
+     GROUPING_LINEAR)
+from pymontecarlo.program._penelope.cache import create_material_cache
+from pymontecarlo.program._penelope.settings import _parse_bool
 from pymontecarlo.program.penepma.options.detector import index_delimited_detectors
 
 from pypenelopelib.material import MaterialInfo
@@ -63,6 +66,7 @@ from pypenelopelib.material import MaterialInfo
 MAX_PHOTON_DETECTORS = 25 # Set in penepma.f
 MAX_SPATIAL_DISTRIBUTION = 10 # Set in penepma.f
 MAX_PHOTON_DETECTOR_CHANNEL = 1000
+DUMP_FILENAME = 'dump.dat'
 
 _PARTICLES_REF = {ELECTRON: 1, PHOTON: 2, POSITRON: 3}
 _COLLISIONS_REF = {ELECTRON: {HARD_ELASTIC: 2,
@@ -98,6 +102,8 @@ class Exporter(_Exporter):
     _KEYWORD_DSMAX = Keyword("DSMAX", "IB, maximum step length (cm) in body IB")
 
     _KEYWORD_IFORCE = Keyword("IFORCE", "KB,KPAR,ICOL,FORCER,WLOW,WHIG")
+    _KEYWORD_IBRSPL = Keyword("IBRSPL", "KB,splitting factor")
+    _KEYWORD_IXRSPL = Keyword("IXRSPL", "KB,splitting factor")
 
     _KEYWORD_NBE = Keyword("NBE", "E-interval and no. of energy bins")
     _KEYWORD_NBANGL = Keyword("NBANGL", "Nos. of bins for the angles THETA and PHI")
@@ -138,10 +144,16 @@ class Exporter(_Exporter):
         Creates a exporter to PENEPMA.
         """
         try:
-            pendbase = get_settings().penepma.pendbase
+            section = get_settings().penepma
         except AttributeError:
-            pendbase = None
-        _Exporter.__init__(self, pendbase)
+            section = None
+        pendbase = getattr(section, 'pendbase', None)
+        material_cache = create_material_cache(section)
+        max_workers = int(getattr(section, 'matworkers', 1))
+        grouping = getattr(section, 'grouping', GROUPING_LINEAR)
+        tight_bounds = _parse_bool(getattr(section, 'tightbounds', False))
+        _Exporter.__init__(self, pendbase, material_cache, max_workers,
+                           grouping, tight_bounds)
 
         self._beam_exporters[GaussianBeam] = self._export_dummy
 
@@ -249,7 +261,10 @@ class Exporter(_Exporter):
             if body.material is VACUUM:
                 continue
 
-            for intforce in body.material.interaction_forcings:
+            intforces = sorted(body.material.interaction_forcings,
+                               key=lambda f: (_PARTICLES_REF[f.particle],
+                                              _COLLISIONS_REF[f.particle][f.collision]))
+            for intforce in intforces:
                 kpar = _PARTICLES_REF[intforce.particle]
                 icol = _COLLISIONS_REF[intforce.particle][intforce.collision]
                 forcer = intforce.forcer
@@ -279,6 +294,19 @@ class Exporter(_Exporter):
                 line = self._KEYWORD_IFORCE(text)
                 lines.append(line)
 
+            # Splitting
+            splitting = body.material.bremsstrahlung_splitting
+            if splitting > 1:
+                text = [body._index + 1, splitting]
+                line = self._KEYWORD_IBRSPL(text)
+                lines.append(line)
+
+            splitting = body.material.xray_splitting
+            if splitting > 1:
+                text = [body._index + 1, splitting]
+                line = self._KEYWORD_IXRSPL(text)
+                lines.append(line)
+
         lines.append(self._COMMENT_SKIP())
 
     def _append_emerging_particles_distribution(self, lines, options,
@@ -389,7 +417,7 @@ class Exporter(_Exporter):
             energyhigh = options.beam.energy_eV
 
             transitions = []
-            for z in zs:
+            for z in sorted(zs):
                 transitions += get_transitions(z, energylow, energyhigh)
 
             if not transitions:
@@ -448,14 +476,15 @@ class Exporter(_Exporter):
         lines.append(self._COMMENT_SKIP())
 
     def _append_job_properties(self, lines, options, geoinfo, matinfos,
-                               phdets_key_index, phdets_index_keys, *args):
+                               phdets_key_index, phdets_index_keys,
+                               seeds=None, *args):
         lines.append(self._COMMENT_JOBPROP())
 
-        text = 'dump.dat'
+        text = DUMP_FILENAME
         line = self._KEYWORD_RESUME(text)
         lines.append(line)
 
-        text = 'dump.dat'
+        text = DUMP_FILENAME
         line = self._KEYWORD_DUMPTO(text)
         lines.append(line)
 
@@ -465,7 +494,10 @@ class Exporter(_Exporter):
 
         lines.append(self._COMMENT_SKIP())
 
-        #NOTE: No random number. PENEPMA will select them.
+        # NOTE: Without seeds, PENEPMA will select them.
+        if seeds is not None:
+            line = self._KEYWORD_RSEED(list(seeds))
+            lines.append(line)
 
         limits = list(options.limits.iterclass(UncertaintyLimit))
         if limits:
@@ -19,9 +19,12 @@ __copyright__ = "Copyright (c) 2012 Philippe T. Pinard"
 __license__ = "GPL v3"
 
 # Standard library modules.
+import io
 import os
 import re
-import glob
+import mmap
+import functools
+from concurrent.futures import ThreadPoolExecutor
 
 # Third party modules.
 import numpy as np
@@ -32,9 +35,7 @@ from pyxray.subshell import Subshell
 # Local modules.
 from pymontecarlo.results.result import \
     (PhotonKey,
-     PhotonIntensityResult,
      PhotonSpectrumResult,
-     PhotonDepthResult,
      ElectronFractionResult,
      TimeResult,
      ShowersStatisticsResult,
@@ -53,34 +54,270 @@ from pymontecarlo.options.detector import \
      TimeDetector,
      ShowersStatisticsDetector,
      )
-from pymontecarlo.program.importer import Importer as _Importer, ImporterException
+from pymontecarlo.settings import get_settings
+from pymontecarlo.program.importer import ImporterException
+from pymontecarlo.program._penelope.importer import Importer as _Importer
+from pymontecarlo.program._penelope.directory import Directory
 from pymontecarlo.program.penepma.options.detector import index_delimited_detectors
+from pymontecarlo.program.penepma.log import read_log
+from pymontecarlo.program.penepma.intensity import \
+    IntensityTable, TabularPhotonIntensityResult
+from pymontecarlo.program.penepma.depth import DepthTable, TabularPhotonDepthResult
 
 # Globals and constants variables.
 
-def _load_dat_files(filepath):
-    bins = []
-    vals = []
-    uncs = []
+_MMAP_THRESHOLD = 1024 ** 2 # Memory-map files larger than 1 MB
+_PARSE_CHUNK_SIZE = 8 * 1024 ** 2 # Parse data files by chunks of 8 MB
+_INTENSITY_COLUMNS = 10 # P, C, B, TF and T with their uncertainties
+_DEPTH_MAP_PATTERN = 'pe-map-*-depth.dat'
+_DEPTH_HEADER_LINES = 6
+_DEPTH_DEFAULT_WORKERS = 4
+
+_TRANSITION_CACHE_SIZE = 1024
+_COMMENT_PATTERN = re.compile(br'^[ \t]*#[^\n]*', re.MULTILINE)
+_DEPTH_HEADER_PATTERN = \
+    re.compile(br'Z\s*=\s*(\d+)\s*,\s*(\w+)\s*-\s*(\w+)\s*,\s*detector\s*=\s*(\d+)')
+
+def _parse_dat(buf, columns, chunksize=_PARSE_CHUNK_SIZE):
+    # Skip header, i.e. blank lines and comments at the top of the file
+    start = 0
+    while start < len(buf):
+        end = buf.find(b'\n', start)
+        if end < 0:
+            end = len(buf)
+        line = buf[start:end].strip()
+        if line and not line.startswith(b'#'):
+            break
+        start = end + 1
+
+    # Parse by chunks of whole lines, so that only one chunk of a
+    # memory-mapped file is copied in memory at a time
+    chunks = []
+    while start < len(buf):
+        end = min(start + chunksize, len(buf))
+        if end < len(buf):
+            newline = buf.rfind(b'\n', start, end)
+            if newline < 0: # line longer than the chunk
+                newline = buf.find(b'\n', end)
+            end = len(buf) if newline < 0 else newline + 1
+
+        body = buf[start:end]
+        if b'#' in body:
+            body = _COMMENT_PATTERN.sub(b'', body)
+        if body and not body.isspace(): # loadtxt warns on blanks
+            try:
+                chunk = np.loadtxt(io.BytesIO(body), ndmin=2)
+            except ValueError as ex:
+                raise ImporterException("Invalid data: %s" % ex)
+            if chunk.shape[1] != columns:
+                raise ImporterException("Number of columns (%i) is not %i" % \
+                                        (chunk.shape[1], columns))
+            chunks.append(chunk)
+
+        start = end
+
+    if not chunks:
+        return np.empty((0, columns))
+    elif len(chunks) == 1:
+        return chunks[0]
+    else:
+        return np.concatenate(chunks)
+
+def _open_data_file(directory, filename):
+    if not directory.exists(filename):
+        raise ImporterException("Data file %s cannot be found" % \
+                                directory.join(filename))
+    return directory.open(filename)
+
+def _load_dat(directory, filename, columns=3):
+    """
+    Reads all numerical values of a PENEPMA data file in one pass and returns
+    them as an array of shape ``(n, columns)``.
+    Blank lines and comment lines (starting with ``#``) are skipped.
+    Large files of the file system are memory-mapped and parsed by chunks,
+    without copying the whole file in memory.
+
+    :arg directory: directory containing the file (see :mod:`directory`)
+    :arg filename: name of the file
+    """
+    with _open_data_file(directory, filename) as fp:
+        try:
+            fileno = fp.fileno()
+        except (AttributeError, io.UnsupportedOperation): # e.g. ZIP member
+            fileno = None
+
+        if fileno is not None and os.fstat(fileno).st_size > _MMAP_THRESHOLD:
+            with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as buf:
+                return _parse_dat(buf, columns)
+        return _parse_dat(fp.read(), columns)
+
+def _load_dat_file(filepath, columns=3):
+    """
+    Reads all numerical values of a PENEPMA data file (see :func:`_load_dat`).
+    """
+    dirpath, filename = os.path.split(filepath)
+    return _load_dat(Directory(dirpath or os.curdir), filename, columns)
+
+@functools.lru_cache(maxsize=_TRANSITION_CACHE_SIZE)
+def get_transition(z, dest, src):
+    """
+    Returns the :class:`Transition` of an element between two subshells
+    (IUPAC notation) or ``None`` if the transition is not supported.
+    The most recently used transitions are cached, i.e. the same object is
+    returned for the same arguments.
+    """
+    try:
+        return Transition(z, Subshell(z, iupac=src), Subshell(z, iupac=dest))
+    except ValueError: # transition not supported
+        return None
+
+def _read_intensities(directory, filename):
+    """
+    Reads an intensity file of PENEPMA (:file:`pe-gen-ph.dat` or
+    :file:`pe-intens-XX.dat`) and returns a :class:`tuple` of the list of
+    transitions and an array of their intensities, where each row contains
+    the P, C, B, TF and T intensities, each followed by its uncertainty.
+    Unsupported transitions are skipped.
+    """
+    with _open_data_file(directory, filename) as fp:
+        text = fp.read().decode('ascii')
+
+    transitions = []
+    rows = []
+    for line in text.splitlines():
+        values = line.split()
+        if not values or values[0].startswith('#'):
+            continue
+
+        transition = get_transition(int(values[0]), values[1], values[2])
+        if transition is None:
+            continue
+
+        transitions.append(transition)
+        rows.append(values[4:4 + _INTENSITY_COLUMNS])
+
+    values = np.array(rows, dtype=float).reshape(-1, _INTENSITY_COLUMNS)
+    return transitions, values
+
+def _read_depth_map(directory, filename):
+    """
+    Reads a depth distribution file of PENEPMA (:file:`pe-map-XX-depth.dat`)
+    in one pass and returns a :class:`tuple` of the header, i.e. atomic
+    number, destination and source subshells and detector index (0 for the
+    generated distribution), and the array of the distribution
+    (see :func:`_load_dat`).
+    """
+    buf = directory.read(filename)
+
+    # Emission line is in the header (second line)
+    header_end = 0
+    for _ in range(_DEPTH_HEADER_LINES):
+        header_end = buf.find(b'\n', header_end) + 1
+        if header_end <= 0:
+            header_end = len(buf)
+            break
+
+    match = _DEPTH_HEADER_PATTERN.search(buf, 0, header_end)
+    if match is None:
+        raise ImporterException('No X-ray emission line in header of %s' % \
+                                directory.join(filename))
+
+    z, dest, src, detector_index = match.groups()
+    header = (int(z), dest.decode('ascii'), src.decode('ascii'), int(detector_index))
+
+    return header, _parse_dat(buf, 3)
+
+def _read_depth_maps(directory, max_workers=1):
+    """
+    Reads all depth distribution files of PENEPMA, concurrently with up to
+    *max_workers* threads, and returns a :class:`tuple` of the list of
+    headers (see :func:`_read_depth_map`), an array of shape
+    ``(files, channels, 3)`` of the distributions, where the depths are
+    converted from cm to m, and the number of channels of each file.
+    Shorter distributions are padded with NaN.
+    """
+    filenames = directory.glob(_DEPTH_MAP_PATTERN)
+
+    max_workers = min(max_workers, len(filenames))
+    if max_workers > 1:
+        with ThreadPoolExecutor(max_workers) as executor:
+            maps = list(executor.map(lambda filename: _read_depth_map(directory, filename),
+                                     filenames))
+    else:
+        maps = [_read_depth_map(directory, filename) for filename in filenames]
+
+    lengths = [len(datum) for _header, datum in maps]
+    values = np.full((len(maps), max(lengths or [0]), 3), np.nan)
+    for i, (_header, datum) in enumerate(maps):
+        values[i, :len(datum)] = datum
+    values *= 1e-2 # cm to m
+
+    return [header for header, _datum in maps], values, lengths
+
+class ImportContext(object):
+
+    def __init__(self, path, max_workers=1):
+        """
+        Files of a simulation shared by the importers of all detectors during
+        one import. Each file is parsed at most once, when first needed.
 
-    with open(filepath, 'r') as fp:
-        for line in fp:
-            line = line.strip()
-            if line.startswith('#'): continue
-            if not line: continue
-            values = line.split()
+        :arg path: directory containing the simulation files
+        :arg max_workers: maximum number of threads used to read several
+            files of the same kind (e.g. depth distributions)
+        """
+        self._path = path
+        self._max_workers = max(1, int(max_workers))
+        self._log = None
+        self._intensities = {}
+        self._depth_maps = None
+
+    @property
+    def log(self):
+        """
+        Parsed :file:`penepma-res.dat` (:class:`PenepmaLog`).
+        """
+        if self._log is None:
+            self._log = read_log(self._path)
+        return self._log
 
-            bins.append(float(values[0]))
-            vals.append(float(values[1]))
-            uncs.append(float(values[2]))
+    def intensities(self, filename):
+        """
+        Returns the transitions and intensities of an intensity file
+        (see :func:`_read_intensities`).
+        """
+        if filename not in self._intensities:
+            self._intensities[filename] = _read_intensities(self._path, filename)
+        return self._intensities[filename]
 
-    return bins, vals, uncs
+    def depth_maps(self):
+        """
+        Returns the headers, distributions and numbers of channels of the
+        depth distribution files (see :func:`_read_depth_maps`).
+        """
+        if self._depth_maps is None:
+            self._depth_maps = _read_depth_maps(self._path, self._max_workers)
+        return self._depth_maps
 
 class Importer(_Importer):
 
-    def __init__(self):
+    def __init__(self, max_workers=None):
+        """
+        Creates an importer of PENEPMA results.
+
+        :arg max_workers: maximum number of threads used to read the depth
+            distribution files (default: ``importworkers`` option of the
+            settings or 4)
+        """
         _Importer.__init__(self)
 
+        if max_workers is None:
+            try:
+                section = get_settings().penepma
+            except AttributeError:
+                section = None
+            max_workers = getattr(section, 'importworkers', _DEPTH_DEFAULT_WORKERS)
+        self._max_workers = max(1, int(max_workers))
+
         self._importers[PhotonSpectrumDetector] = \
             self._import_photon_spectrum
         self._importers[PhotonIntensityDetector] = self._import_photon_intensity
@@ -103,199 +340,94 @@ class Importer(_Importer):
         dets = dict(options.detectors.iterclass(_PhotonDelimitedDetector))
         phdets_key_index, phdets_index_keys = index_delimited_detectors(dets)
 
+        context = ImportContext(dirpath, self._max_workers)
+
         return self._run_importers(options, dirpath,
-                                   phdets_key_index, phdets_index_keys,
+                                   phdets_key_index, phdets_index_keys, context,
                                    *args, **kwargs)
 
     def _import_photon_spectrum(self, options, key, detector, path,
                                   phdets_key_index, phdets_index_keys, *args):
         index = phdets_key_index[key] + 1
 
-        # Find data files
-        spect_filepath = os.path.join(path, 'pe-spect-%s.dat' % str(index).zfill(2))
-        if not os.path.exists(spect_filepath):
-            raise ImporterException("Data file %s cannot be found" % spect_filepath)
-
         # Load total spectrum
-        energies, total_val, total_unc = _load_dat_files(spect_filepath)
-        total = np.array([energies, total_val, total_unc]).T
+        total = _load_dat(path, 'pe-spect-%s.dat' % str(index).zfill(2))
 
         # Generate fake background
         background = np.zeros(total.shape)
-        background[:, 0] = energies
+        background[:, 0] = total[:, 0]
 
         return PhotonSpectrumResult(total, background)
 
     def _import_photon_intensity(self, options, key, detector, path,
-                                   phdets_key_index, phdets_index_keys, *args):
-        def _read_intensities_line(line):
-            values = line.split()
-
-            try:
-                z = int(values[0])
-                src = Subshell(z, iupac=values[2].strip())
-                dst = Subshell(z, iupac=values[1].strip())
-                transition = Transition(z, src, dst)
-            except ValueError: # transition not supported
-                return None, 0.0, 0.0, 0.0, 0.0
-
-            nf = float(values[4]), float(values[5])
-            cf = float(values[6]), float(values[7])
-            bf = float(values[8]), float(values[9])
-            #tf = float(values[10]), float(values[11]) # skip not needed
-            t = float(values[12]), float(values[13])
-
-            return transition, cf, bf, nf, t
-
+                                 phdets_key_index, phdets_index_keys, context, *args):
         index = phdets_key_index[key] + 1
 
         # Find data files
-        emitted_filepath = os.path.join(path, 'pe-intens-%s.dat' % str(index).zfill(2))
-        if not os.path.exists(emitted_filepath):
-            raise ImporterException("Data file %s cannot be found" % emitted_filepath)
-
-        generated_filepath = os.path.join(path, 'pe-gen-ph.dat')
-        if not os.path.exists(generated_filepath):
-            raise ImporterException("Data file %s cannot be found" % generated_filepath)
-
-        # Load generated
-        intensities = {}
+        emitted_filename = 'pe-intens-%s.dat' % str(index).zfill(2)
+        if not path.exists(emitted_filename):
+            raise ImporterException("Data file %s cannot be found" % \
+                                    path.join(emitted_filename))
 
-        with open(generated_filepath, 'r') as fp:
-            for line in fp:
-                line = line.strip()
-                if line.startswith('#'): continue
+        # Generated intensities are shared by all detectors
+        table = IntensityTable.from_tables(context.intensities('pe-gen-ph.dat'),
+                                           context.intensities(emitted_filename))
 
-                transition, gcf, gbf, gnf, gt = _read_intensities_line(line)
-
-                if transition is None:
-                    continue
-
-                intensities[PhotonKey(transition, False, PhotonKey.C)] = gcf
-                intensities[PhotonKey(transition, False, PhotonKey.B)] = gbf
-                intensities[PhotonKey(transition, False, PhotonKey.P)] = gnf
-                intensities[PhotonKey(transition, False, PhotonKey.T)] = gt
-
-        # Load emitted
-        with open(emitted_filepath, 'r') as fp:
-            for line in fp:
-                line = line.strip()
-                if line.startswith('#'): continue
-
-                transition, ecf, ebf, enf, et = _read_intensities_line(line)
-
-                if transition is None:
-                    continue
-
-                intensities[PhotonKey(transition, True, PhotonKey.C)] = ecf
-                intensities[PhotonKey(transition, True, PhotonKey.B)] = ebf
-                intensities[PhotonKey(transition, True, PhotonKey.P)] = enf
-                intensities[PhotonKey(transition, True, PhotonKey.T)] = et
-
-        return PhotonIntensityResult(intensities)
+        return TabularPhotonIntensityResult(table)
 
     def _import_photon_depth(self, options, key, detector, path,
-                             phdets_key_index, phdets_index_keys, *args):
-        distributions = {}
-
-        for filepath in glob.glob(os.path.join(path, 'pe-map-*-depth.dat')):
-            # Create photon key
-            with open(filepath, 'r') as fp:
-                next(fp) # Skip first line
-                text = next(fp).split(':')[1].strip()
-                match = re.match('Z = ([ \d]+),([ \w]+)-([ \w]+), detector = ([ \d]+)', text)
-                z, dest, src, detector_index = match.groups()
-
-                z = int(z)
-                src = Subshell(z, iupac=src.strip())
-                dest = Subshell(z, iupac=dest.strip())
-                transition = Transition(z, src, dest)
-
-                detector_index = int(detector_index)
-                if detector_index == 0:
-                    photonkey = PhotonKey(transition, False, PhotonKey.T)
-                else:
-                    assert detector_index == phdets_key_index[key] + 1
-                    photonkey = PhotonKey(transition, True, PhotonKey.T)
-
-            # Read values
-            datum = np.genfromtxt(filepath, skip_header=6)
-            datum *= 1e-2 # cm to m
+                             phdets_key_index, phdets_index_keys, context, *args):
+        headers, values, lengths = context.depth_maps()
 
-            distributions[photonkey] = datum
+        keys = []
+        for z, dest, src, detector_index in headers:
+            transition = get_transition(z, dest, src)
+            if transition is None:
+                raise ImporterException('Unsupported transition in %s: Z=%i, %s-%s' % \
+                                        (path.name, z, dest, src))
 
-        return PhotonDepthResult(distributions)
-
-    def _read_log(self, path):
-        """
-        Returns the last line of the :file:`penepma.csv` log file as a
-        :class:`dict` where the keys are the header of each column and the
-        values are the values of the last line.
-
-        :arg path: directory containing the simulation files
-        """
-        filepath = os.path.join(path, 'penepma-res.dat')
-        if not os.path.exists(filepath):
-            raise ImporterException("Data file %s cannot be found" % filepath)
-
-        log = {}
-        with open(filepath, 'r') as fp:
-            for line in fp:
-                line = line.strip()
-
-                match = re.match(r'([^.]*) [\.]+  ([^ ]*)(?: \+\- )?([^ ]*)?', line)
-                if not match:
-                    continue
-
-                name = match.group(1).strip()
-                val = float(match.group(2))
-                unc = float(match.group(3) or 0.0)
-                log[name] = (val, unc)
+            # Create photon key
+            if detector_index == 0:
+                keys.append(PhotonKey(transition, False, PhotonKey.T))
+            else:
+                assert detector_index == phdets_key_index[key] + 1
+                keys.append(PhotonKey(transition, True, PhotonKey.T))
 
-        return log
+        return TabularPhotonDepthResult(DepthTable(keys, values, lengths))
 
-    def _import_electron_fraction(self, options, key, detector, path, *args):
-        log = self._read_log(path)
+    def _import_electron_fraction(self, options, key, detector, path,
+                                  phdets_key_index, phdets_index_keys, context, *args):
+        log = context.log
 
-        absorbed = log['Absorption fraction']
-        backscattered = log['Upbound fraction']
-        transmitted = log['Downbound fraction']
+        absorbed = log.absorption_fraction
+        backscattered = log.upbound_fraction
+        transmitted = log.downbound_fraction
 
         return ElectronFractionResult(absorbed, backscattered, transmitted)
 
-    def _import_time(self, options, key, detector, path, *args):
-        log = self._read_log(path)
+    def _import_time(self, options, key, detector, path,
+                     phdets_key_index, phdets_index_keys, context, *args):
+        log = context.log
 
-        simulation_time_s = log['Simulation time'][0]
-        simulation_speed_s = 1.0 / log['Simulation speed'][0], 0.0
+        simulation_time_s = log.simulation_time_s
+        simulation_speed_s = 1.0 / log.simulation_speed, 0.0
 
         return TimeResult(simulation_time_s, simulation_speed_s)
 
-    def _import_showers_statistics(self, options, key, detector, path, *args):
-        log = self._read_log(path)
-
-        showers = log['Simulated primary showers'][0]
+    def _import_showers_statistics(self, options, key, detector, path,
+                                   phdets_key_index, phdets_index_keys, context, *args):
+        showers = context.log.showers
 
         return ShowersStatisticsResult(showers)
 
     def _import_backscattered_electron_energy(self, options, key, detector, path, *args):
-        filepath = os.path.join(path, 'pe-energy-el-up.dat')
-        if not os.path.exists(filepath):
-            raise ImporterException("Data file %s cannot be found" % filepath)
-
         # Load distributions
-        bins, vals, uncs = _load_dat_files(filepath)
-        data = np.array([bins, vals, uncs]).T
+        data = _load_dat(path, 'pe-energy-el-up.dat')
 
         return BackscatteredElectronEnergyResult(data)
 
     def _import_transmitted_electron_energy(self, options, key, detector, path, *args):
-        filepath = os.path.join(path, 'pe-energy-el-down.dat')
-        if not os.path.exists(filepath):
-            raise ImporterException("Data file %s cannot be found" % filepath)
-
         # Load distributions
-        bins, vals, uncs = _load_dat_files(filepath)
-        data = np.array([bins, vals, uncs]).T
+        data = _load_dat(path, 'pe-energy-el-down.dat')
 
         return TransmittedElectronEnergyResult(data)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`intensity` -- Array-backed photon intensities
+================================================================================
+
+.. module:: intensity
+   :synopsis: Array-backed photon intensities
+
+.. inheritance-diagram:: pymontecarlo.program.penepma.intensity
+
+The photon intensities of a simulation are stored in a single array of shape
+``(transitions, 2, 4, 2)``:
+
+  * axis 1: generated (0) or emitted (1) intensities
+  * axis 2: characteristic (C), bremsstrahlung fluorescence (B),
+    primary (P) and total (T) intensities (see :data:`FLAGS`)
+  * axis 3: value and uncertainty
+
+Missing intensities are NaN.
+The :class:`IntensityTable` is also a read-only mapping of :class:`PhotonKey`
+to a :class:`tuple` of the value and uncertainty, so that it can be used
+wherever the :class:`dict` of intensities was used, without holding a key
+and a tuple for each intensity.
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+from collections.abc import Mapping
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pymontecarlo.results.result import PhotonKey, PhotonIntensityResult
+
+# Globals and constants variables.
+FLAGS = (PhotonKey.C, PhotonKey.B, PhotonKey.P, PhotonKey.T)
+
+_FLAG_INDEXES = dict((flag, i) for i, flag in enumerate(FLAGS))
+
+# Columns of the value of each flag in the tables of the intensity files
+# (P, C, B, TF and T with their uncertainties)
+_FILE_COLUMNS = {PhotonKey.P: 0, PhotonKey.C: 2, PhotonKey.B: 4, PhotonKey.T: 8}
+
+class IntensityTable(Mapping):
+
+    def __init__(self, transitions, values):
+        """
+        Photon intensities of a simulation.
+
+        :arg transitions: :class:`list` of transitions
+        :arg values: array of shape ``(len(transitions), 2, 4, 2)``
+            (see :mod:`intensity`)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape != (len(transitions), 2, len(FLAGS), 2):
+            raise ValueError('Invalid shape of intensities: %s' % (values.shape,))
+
+        self._transitions = list(transitions)
+        self._indexes = dict((transition, i) for i, transition in enumerate(self._transitions))
+        self._values = values
+        self._values.flags.writeable = False
+
+    @classmethod
+    def from_tables(cls, generated, emitted):
+        """
+        Creates the table from the generated and emitted intensities read
+        from the intensity files of PENEPMA.
+
+        :arg generated: :class:`tuple` of the transitions and array of
+            :file:`pe-gen-ph.dat`
+        :arg emitted: :class:`tuple` of the transitions and array of
+            :file:`pe-intens-XX.dat`
+        """
+        transitions = list(generated[0])
+        indexes = dict((transition, i) for i, transition in enumerate(transitions))
+        for transition in emitted[0]:
+            if transition not in indexes:
+                indexes[transition] = len(transitions)
+                transitions.append(transition)
+
+        values = np.full((len(transitions), 2, len(FLAGS), 2), np.nan)
+        for absorption, (table_transitions, table) in enumerate([generated, emitted]):
+            if not table_transitions:
+                continue
+            rows = [indexes[transition] for transition in table_transitions]
+            for flag, column in _FILE_COLUMNS.items():
+                values[rows, absorption, _FLAG_INDEXES[flag]] = table[:, column:column + 2]
+
+        return cls(transitions, values)
+
+    def __repr__(self):
+        return '<%s(%i transitions)>' % (self.__class__.__name__, len(self._transitions))
+
+    def __getitem__(self, key):
+        transition, absorption, flag = key
+        try:
+            value = self._values[self._indexes[transition],
+                                 1 if absorption else 0,
+                                 _FLAG_INDEXES[flag]]
+        except KeyError:
+            raise KeyError(key)
+
+        if np.isnan(value[0]):
+            raise KeyError(key)
+        return float(value[0]), float(value[1])
+
+    def __iter__(self):
+        present = ~np.isnan(self._values[..., 0])
+        for i, j, k in zip(*np.nonzero(present)):
+            yield PhotonKey(self._transitions[i], bool(j), FLAGS[k])
+
+    def __len__(self):
+        return int(np.count_nonzero(~np.isnan(self._values[..., 0])))
+
+    def index(self, transition):
+        """
+        Returns the row of a transition in :attr:`values`.
+        Raises :exc:`KeyError` if the transition is not in the table.
+        """
+        return self._indexes[transition]
+
+    @property
+    def transitions(self):
+        """
+        Transitions, in the order of the rows of :attr:`values`.
+        """
+        return list(self._transitions)
+
+    @property
+    def values(self):
+        """
+        Read-only array of the intensities (see :mod:`intensity`).
+        """
+        return self._values
+
+class TabularPhotonIntensityResult(PhotonIntensityResult):
+
+    def __init__(self, table):
+        """
+        :class:`PhotonIntensityResult` backed by an :class:`IntensityTable`.
+
+        :arg table: :class:`IntensityTable`
+        """
+        # The base class copies its intensities in a dict: pass none and
+        # read the intensities from the table instead
+        PhotonIntensityResult.__init__(self, {})
+        self._intensities = table
+
+        self._table = table
+
+    @property
+    def table(self):
+        """
+        :class:`IntensityTable` of the intensities.
+        """
+        return self._table
+
+def stack_intensities(results, transitions, absorption=True, flag=PhotonKey.T):
+    """
+    Returns an array of shape ``(len(results), len(transitions), 2)`` of the
+    value and uncertainty of the intensities of several results, e.g. to
+    compute k-ratios of many simulations at once.
+    Missing intensities are NaN.
+
+    :arg results: :class:`TabularPhotonIntensityResult` or
+        :class:`IntensityTable`
+    :arg transitions: transitions
+    :arg absorption: emitted (``True``) or generated (``False``) intensities
+    :arg flag: intensity flag (:data:`FLAGS`)
+    """
+    stacked = np.full((len(results), len(transitions), 2), np.nan)
+    k = _FLAG_INDEXES[flag]
+    j = 1 if absorption else 0
+
+    for r, result in enumerate(results):
+        table = getattr(result, 'table', result)
+        rows = []
+        columns = []
+        for t, transition in enumerate(transitions):
+            try:
+                rows.append(table.index(transition))
+            except KeyError:
+                continue
+            columns.append(t)
+
+        if rows:
+            stacked[r, columns] = table.values[rows, j, k]
+
+    return stacked
@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`log` -- Reader of the PENEPMA results file
+================================================================================
+
+.. module:: log
+   :synopsis: Reader of the PENEPMA results file
+
+.. inheritance-diagram:: pymontecarlo.program.penepma.log
+
+The global results of a PENEPMA simulation (simulation time, electron
+fractions, secondary-particle generation probabilities, etc.) are written in
+:file:`penepma-res.dat`.
+The file is parsed once by :func:`read_log` into a :class:`PenepmaLog`,
+which provides an accessor for each quantity.
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import re
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.program.importer import ImporterException
+
+# Globals and constants variables.
+LOG_FILENAME = 'penepma-res.dat'
+
+UPBOUND = 'upbound'
+DOWNBOUND = 'downbound'
+ABSORBED = 'absorbed'
+
+ELECTRONS = 'electrons'
+PHOTONS = 'photons'
+POSITRONS = 'positrons'
+
+_QUANTITY_PATTERN = re.compile(r'^\s*(?P<name>\S.*?)\s*\.{2,}\s+(?P<val>\S+)(?:\s+\+-\s+(?P<unc>\S+))?')
+_BODY_PATTERN = re.compile(r'^Body\s+(\d+)$')
+_DETECTOR_PATTERN = re.compile(r'^Detector\s*#\s*(\d+)$')
+_SEEDS_PATTERN = re.compile(r'^\s*Last random seeds\s*=\s*(-?\d+)\s*,\s*(-?\d+)')
+_TABLE_ROW_PATTERN = re.compile(r'^\s*\|\s*(\w*)\s*\|(.*)\|\s*$')
+_TABLE_HEADER_PATTERN = re.compile(r'^\s*\|\s*(\w+)\s*\|\s*(\w+)\s*\|\s*(\w+)\s*\|\s*$')
+
+class PenepmaLog(object):
+
+    def __init__(self, quantities, secondaries=None, deposited_energies=None,
+                 detector_energies=None, random_seeds=None):
+        """
+        Parsed content of :file:`penepma-res.dat`.
+        Values with an uncertainty are :class:`tuple` of the value and its
+        uncertainty (3 sigma).
+
+        :arg quantities: :class:`dict` of the name (as written in the file)
+            and :class:`tuple` of the value and uncertainty of each quantity
+        :arg secondaries: :class:`dict` of the secondary-particle
+            generation probabilities, where the keys are :class:`tuple` of
+            the direction and the particle
+        :arg deposited_energies: :class:`dict` of the average deposited
+            energy in each body (index starting at 1)
+        :arg detector_energies: :class:`dict` of the average photon energy
+            at each detector (index starting at 1)
+        :arg random_seeds: last random seeds
+        """
+        self._quantities = dict(quantities)
+        self._secondaries = dict(secondaries or {})
+        self._deposited_energies = dict(deposited_energies or {})
+        self._detector_energies = dict(detector_energies or {})
+        self._random_seeds = random_seeds
+
+    def __repr__(self):
+        return '<%s(%i quantities)>' % (self.__class__.__name__, len(self._quantities))
+
+    def __contains__(self, name):
+        return name in self._quantities
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def keys(self):
+        """
+        Returns the names of the quantities.
+        """
+        return self._quantities.keys()
+
+    def get(self, name):
+        """
+        Returns a :class:`tuple` of the value and uncertainty of a quantity.
+        The uncertainty is 0.0 if it is not reported.
+        Raises :exc:`ImporterException` if the quantity is not in the file.
+
+        :arg name: name of the quantity as written in the file
+            (e.g. ``Simulation time``)
+        """
+        try:
+            return self._quantities[name]
+        except KeyError:
+            raise ImporterException('No quantity "%s" in %s' % (name, LOG_FILENAME))
+
+    @property
+    def simulation_time_s(self):
+        """
+        Simulation time (in seconds).
+        """
+        return self.get('Simulation time')[0]
+
+    @property
+    def simulation_speed(self):
+        """
+        Simulation speed (in showers per second).
+        """
+        return self.get('Simulation speed')[0]
+
+    @property
+    def showers(self):
+        """
+        Number of simulated primary showers.
+        """
+        return self.get('Simulated primary showers')[0]
+
+    @property
+    def upbound_primaries(self):
+        """
+        Number of upbound (backscattered) primary particles.
+        """
+        return self.get('Upbound primary particles')[0]
+
+    @property
+    def downbound_primaries(self):
+        """
+        Number of downbound (transmitted) primary particles.
+        """
+        return self.get('Downbound primary particles')[0]
+
+    @property
+    def absorbed_primaries(self):
+        """
+        Number of absorbed primary particles.
+        """
+        return self.get('Absorbed primary particles')[0]
+
+    @property
+    def upbound_fraction(self):
+        """
+        Fraction of upbound (backscattered) primary particles and its
+        uncertainty.
+        """
+        return self.get('Upbound fraction')
+
+    @property
+    def downbound_fraction(self):
+        """
+        Fraction of downbound (transmitted) primary particles and its
+        uncertainty.
+        """
+        return self.get('Downbound fraction')
+
+    @property
+    def absorption_fraction(self):
+        """
+        Fraction of absorbed primary particles and its uncertainty.
+        """
+        return self.get('Absorption fraction')
+
+    def secondary_generation(self, direction, particle):
+        """
+        Returns the generation probability of secondary particles and its
+        uncertainty.
+
+        :arg direction: :const:`UPBOUND`, :const:`DOWNBOUND` or
+            :const:`ABSORBED`
+        :arg particle: :const:`ELECTRONS`, :const:`PHOTONS` or
+            :const:`POSITRONS`
+        """
+        try:
+            return self._secondaries[(direction, particle)]
+        except KeyError:
+            raise ImporterException('No generation probability of %s %s in %s' % \
+                                    (direction, particle, LOG_FILENAME))
+
+    @property
+    def deposited_energies_eV(self):
+        """
+        :class:`dict` of the average deposited energy (in eV) and its
+        uncertainty in each body. The keys are the indexes of the bodies
+        (starting at 1).
+        """
+        return dict(self._deposited_energies)
+
+    @property
+    def detector_energies_eV(self):
+        """
+        :class:`dict` of the average photon energy (in eV) and its
+        uncertainty at each photon detector. The keys are the indexes of the
+        detectors (starting at 1).
+        """
+        return dict(self._detector_energies)
+
+    @property
+    def random_seeds(self):
+        """
+        :class:`tuple` of the last two random seeds or ``None``.
+        """
+        return self._random_seeds
+
+def _parse_float(text):
+    try:
+        return float(text)
+    except ValueError: # e.g. overflow written as ********
+        return float('nan')
+
+def parse_log(lines):
+    """
+    Parses the lines (:class:`str`) of :file:`penepma-res.dat` and returns a
+    :class:`PenepmaLog`.
+    """
+    quantities = {}
+    secondaries = {}
+    deposited_energies = {}
+    detector_energies = {}
+    random_seeds = None
+
+    particles = None
+    direction = None
+
+    for line in lines:
+        match = _SEEDS_PATTERN.match(line)
+        if match:
+            random_seeds = int(match.group(1)), int(match.group(2))
+            continue
+
+        match = _QUANTITY_PATTERN.match(line)
+        if match:
+            name = match.group('name')
+            val = _parse_float(match.group('val'))
+            unc = _parse_float(match.group('unc') or '0.0')
+
+            body = _BODY_PATTERN.match(name)
+            detector = _DETECTOR_PATTERN.match(name)
+            if body:
+                deposited_energies[int(body.group(1))] = (val, unc)
+            elif detector:
+                detector_energies[int(detector.group(1))] = (val, unc)
+            else:
+                quantities[name] = (val, unc)
+            continue
+
+        # Table of the secondary-particle generation probabilities
+        match = _TABLE_HEADER_PATTERN.match(line)
+        if match:
+            particles = match.groups()
+            continue
+
+        match = _TABLE_ROW_PATTERN.match(line)
+        if match and particles is not None:
+            cells = [cell.replace('+-', '').strip() for cell in match.group(2).split('|')]
+            if match.group(1): # values
+                direction = match.group(1)
+                for particle, cell in zip(particles, cells):
+                    secondaries[(direction, particle)] = (_parse_float(cell), 0.0)
+            elif direction is not None: # uncertainties
+                for particle, cell in zip(particles, cells):
+                    val = secondaries[(direction, particle)][0]
+                    secondaries[(direction, particle)] = (val, _parse_float(cell))
+                direction = None
+
+    return PenepmaLog(quantities, secondaries, deposited_energies,
+                      detector_energies, random_seeds)
+
+def read_log(directory):
+    """
+    Reads :file:`penepma-res.dat` of a simulation and returns a
+    :class:`PenepmaLog`.
+
+    :arg directory: directory containing the simulation files
+        (see :mod:`pymontecarlo.program._penelope.directory`)
+    """
+    if not directory.exists(LOG_FILENAME):
+        raise ImporterException("Data file %s cannot be found" % \
+                                directory.join(LOG_FILENAME))
+
+    text = directory.read(LOG_FILENAME).decode('ascii', 'replace')
+    return parse_log(text.splitlines())
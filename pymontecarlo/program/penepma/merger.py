@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`merger` -- Merge PENEPMA output files of independent simulations
+================================================================================
+
+.. module:: merger
+   :synopsis: Merge PENEPMA output files of independent simulations
+
+PENEPMA normalizes all its results per primary electron. The results of
+independent simulations (e.g. run with different random seeds) can therefore
+be combined by a weighted average, where the weight of each simulation is its
+fraction of the total number of simulated showers.
+The statistical uncertainties are combined in quadrature using the same
+weights.
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import os
+import re
+import glob
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Globals and constants variables.
+_LOG_FILENAME = 'penepma-res.dat'
+_LOG_PATTERN = re.compile(r'^(\s*)([^.]*) ([\.]+)(\s+)([^ ]+)(?: \+\- ([^ ]+))?(.*)$')
+
+_LOG_SHOWERS = 'Simulated primary showers'
+_LOG_TIME = 'Simulation time'
+_LOG_SPEED = 'Simulation speed'
+_LOG_SUMMED = frozenset([_LOG_SHOWERS, _LOG_SPEED,
+                         'Upbound primary particles',
+                         'Downbound primary particles',
+                         'Absorbed primary particles'])
+
+_DAT_PATTERNS = ['pe-spect-*.dat', 'pe-map-*-depth.dat',
+                 'pe-energy-el-up.dat', 'pe-energy-el-down.dat']
+_INTENSITIES_PATTERNS = ['pe-intens-*.dat', 'pe-gen-ph.dat']
+
+def _combine(values, uncertainties, weights):
+    """
+    Returns the weighted average of the values and the uncertainty of this
+    average.
+    The values and uncertainties are arrays where the first axis corresponds
+    to the simulations.
+    """
+    weights = np.reshape(weights, (-1,) + (1,) * (np.ndim(values) - 1))
+    value = np.sum(weights * values, axis=0)
+    uncertainty = np.sqrt(np.sum((weights * uncertainties) ** 2, axis=0))
+    return value, uncertainty
+
+def read_showers(dirpath):
+    """
+    Returns the number of simulated showers reported in the
+    :file:`penepma-res.dat` of the specified directory.
+    """
+    filepath = os.path.join(dirpath, _LOG_FILENAME)
+    with open(filepath, 'r') as fp:
+        for line in fp:
+            match = _LOG_PATTERN.match(line.rstrip())
+            if match and match.group(2).strip() == _LOG_SHOWERS:
+                return float(match.group(5))
+
+    raise ValueError('Number of showers not found in %s' % filepath)
+
+def _read_log_quantities(fp):
+    """
+    Returns a :class:`dict` of the matches of the quantities of a
+    :file:`penepma-res.dat` file, where the key is the name of the quantity
+    and its occurrence (starting at 0).
+    """
+    quantities = {}
+    occurrences = {}
+    for line in fp:
+        match = _LOG_PATTERN.match(line.rstrip('\n'))
+        if not match:
+            continue
+
+        name = match.group(2).strip()
+        occurrence = occurrences.get(name, 0)
+        occurrences[name] = occurrence + 1
+        quantities[name, occurrence] = match
+
+    return quantities
+
+def merge_log_files(filepaths, weights, outfilepath):
+    """
+    Merges :file:`penepma-res.dat` files.
+    The first file is used as template. The quantities of the other files
+    are matched by name, so the files may have different lines.
+    Raises :exc:`ValueError` if a quantity of the template is missing from
+    another file.
+    The number of showers and particles as well as the simulation speed are
+    summed, the simulation time is the longest one and all other quantities
+    are averaged.
+    """
+    # Quantities of each file, identified by their name and occurrence,
+    # since warnings may add lines to some files
+    quantities = []
+    for filepath in filepaths:
+        with open(filepath, 'r') as fp:
+            quantities.append(_read_log_quantities(fp))
+
+    with open(filepaths[0], 'r') as fp:
+        template = [line.rstrip('\n') for line in fp]
+
+    lines = []
+    occurrences = {}
+    for line in template:
+        match = _LOG_PATTERN.match(line)
+        if not match:
+            lines.append(line)
+            continue
+
+        indent, name, dots, space, val, unc, tail = match.groups()
+
+        name = name.strip()
+        occurrence = occurrences.get(name, 0)
+        occurrences[name] = occurrence + 1
+
+        matches = []
+        for filepath, quantity in zip(filepaths, quantities):
+            try:
+                matches.append(quantity[name, occurrence])
+            except KeyError:
+                raise ValueError('Quantity "%s" not found in %s' % (name, filepath))
+        vals = np.array([float(m.group(5)) for m in matches])
+
+        if name == _LOG_TIME:
+            val = np.max(vals)
+        elif name in _LOG_SUMMED:
+            val = np.sum(vals)
+        else:
+            uncs = np.array([float(m.group(6) or 0.0) for m in matches])
+            val, newunc = _combine(vals, uncs, weights)
+            if unc is not None:
+                unc = '%.1E' % newunc
+
+        text = '%s%s %s%s%E' % (indent, name, dots, space, val)
+        if unc is not None:
+            text += ' +- %s' % unc
+        lines.append(text + tail)
+
+    with open(outfilepath, 'w') as fp:
+        for line in lines:
+            fp.write(line + '\n')
+
+def _read_dat_file(filepath):
+    header = []
+    data = []
+
+    with open(filepath, 'r') as fp:
+        for line in fp:
+            values = line.split()
+            if not values:
+                if not data:
+                    header.append('')
+                continue
+
+            try:
+                data.append(list(map(float, values)))
+            except ValueError:
+                header.append(line.rstrip('\n'))
+
+    return header, np.array(data)
+
+def merge_dat_files(filepaths, weights, outfilepath):
+    """
+    Merges three-column data files (bin, value, uncertainty), such as the
+    spectra, the energy distributions and the depth distributions.
+    All files must have the same bins.
+    """
+    header = None
+    datas = []
+    for filepath in filepaths:
+        tmpheader, data = _read_dat_file(filepath)
+        header = header or tmpheader
+        datas.append(data)
+
+    datas = np.array(datas)
+    vals, uncs = _combine(datas[:, :, 1], datas[:, :, 2], weights)
+
+    with open(outfilepath, 'w') as fp:
+        for line in header:
+            fp.write(line + '\n')
+        for x, val, unc in zip(datas[0, :, 0], vals, uncs):
+            fp.write('  %13.6E  %13.6E  %13.6E\n' % (x, val, unc))
+
+def merge_intensities_files(filepaths, weights, outfilepath):
+    """
+    Merges intensities files (:file:`pe-gen-ph.dat` and
+    :file:`pe-intens-XX.dat`).
+    The transitions are matched using the atomic number and the two subshells.
+    A transition missing from a file is considered to have a null intensity.
+    """
+    header = []
+    rows = {} # key: (z, s0, s1), value: (energy, array of values per file)
+
+    for i, filepath in enumerate(filepaths):
+        with open(filepath, 'r') as fp:
+            for line in fp:
+                if line.strip().startswith('#') or not line.strip():
+                    if i == 0:
+                        header.append(line.rstrip('\n'))
+                    continue
+
+                values = line.split()
+                key = (int(values[0]), values[1], values[2])
+                _energy, arr = rows.setdefault(key, (float(values[3]),
+                                                     np.zeros((len(filepaths), 10))))
+                arr[i] = list(map(float, values[4:14]))
+
+    with open(outfilepath, 'w') as fp:
+        for line in header:
+            fp.write(line + '\n')
+
+        for (z, s0, s1), (energy, arr) in rows.items():
+            vals, uncs = _combine(arr[:, 0::2], arr[:, 1::2], weights)
+            text = '  %3i %2s %2s  %10.4E' % (z, s0, s1, energy)
+            for val, unc in zip(vals, uncs):
+                text += '  %12.6E %8.2E' % (val, unc)
+            fp.write(text + '\n')
+
+def merge_results(dirpaths, outputdir):
+    """
+    Merges the output files of several PENEPMA simulations, located in
+    *dirpaths*, into *outputdir*.
+    The merged files have the same name and format as the original ones, so
+    that they can be read by the PENEPMA importer.
+
+    :return: total number of simulated showers
+    """
+    showers = np.array([read_showers(dirpath) for dirpath in dirpaths])
+    total = np.sum(showers)
+    if total <= 0:
+        raise ValueError('No shower was simulated')
+    weights = showers / total
+
+    def _filepaths(filename):
+        return [os.path.join(dirpath, filename) for dirpath in dirpaths]
+
+    merge_log_files(_filepaths(_LOG_FILENAME), weights,
+                    os.path.join(outputdir, _LOG_FILENAME))
+
+    for patterns, method in [(_DAT_PATTERNS, merge_dat_files),
+                             (_INTENSITIES_PATTERNS, merge_intensities_files)]:
+        for pattern in patterns:
+            for filepath in glob.glob(os.path.join(dirpaths[0], pattern)):
+                filename = os.path.basename(filepath)
+                method(_filepaths(filename), weights,
+                       os.path.join(outputdir, filename))
+
+    return total
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`monitor` -- Monitoring of the uncertainty of PENEPMA simulations
+================================================================================
+
+.. module:: monitor
+   :synopsis: Monitoring of the uncertainty of PENEPMA simulations
+
+.. inheritance-diagram:: pymontecarlo.program.penepma.monitor
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import os
+import logging
+
+# Third party modules.
+
+# Local modules.
+
+# Globals and constants variables.
+
+def read_total_intensities(filepath):
+    """
+    Returns the total emitted intensities of a :file:`pe-intens-XX.dat` file
+    as a :class:`dict` where the keys are tuples ``(z, dest, src)`` (IUPAC
+    notation of the subshells) and the values are tuples of the intensity
+    and its uncertainty.
+
+    :arg filepath: location of the intensity file
+    """
+    intensities = {}
+
+    with open(filepath, 'r') as fp:
+        for line in fp:
+            values = line.split()
+            if not values or values[0].startswith('#'):
+                continue
+
+            key = (int(values[0]), values[1], values[2])
+            intensities[key] = float(values[12]), float(values[13])
+
+    return intensities
+
+class UncertaintyMonitor(object):
+
+    def __init__(self, limits, phdets_key_index):
+        """
+        Monitors the relative uncertainty of the emitted intensity of several
+        transitions while a PENEPMA simulation is running.
+        The intensities are read from the :file:`pe-intens-XX.dat` files
+        written by PENEPMA at each dump.
+
+        :arg limits: iterable of :class:`UncertaintyLimit`
+        :arg phdets_key_index: :class:`dict` of the index of the photon
+            detectors (see :func:`index_delimited_detectors`)
+        """
+        self._targets = []
+        for limit in limits:
+            transition = limit.transition
+            key = (transition.z, transition.dest.iupac, transition.src.iupac)
+            index = phdets_key_index[limit.detector_key] + 1
+            self._targets.append((index, key, limit.uncertainty))
+
+    def __len__(self):
+        return len(self._targets)
+
+    def progress(self, dirpath):
+        """
+        Returns the progress (between 0.0 and 1.0) towards the uncertainty
+        targets of the simulation in *dirpath*.
+        The progress is the one of the target that is the furthest from
+        being met. A progress of 1.0 means that all targets are met.
+        """
+        intensities = {}
+        progress = 1.0
+
+        for index, key, uncertainty in self._targets:
+            if index not in intensities:
+                filepath = os.path.join(dirpath, 'pe-intens-%s.dat' % str(index).zfill(2))
+                try:
+                    intensities[index] = read_total_intensities(filepath)
+                except (IOError, ValueError, IndexError):
+                    # Not dumped yet or being written
+                    return 0.0
+
+            val, unc = intensities[index].get(key, (0.0, 0.0))
+            if val <= 0.0:
+                return 0.0
+
+            progress = min(progress, uncertainty / (unc / val) if unc > 0.0 else 1.0)
+
+        logging.debug('Uncertainty targets progress: %s', progress)
+        return min(progress, 1.0)
+
+    def is_met(self, dirpath):
+        """
+        Returns whether all the uncertainty targets are met for the
+        simulation in *dirpath*.
+        """
+        return self.progress(dirpath) >= 1.0
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.options.options import Options
+from pymontecarlo.program._penelope.options.material import PenelopeMaterial
+from pymontecarlo.program.penepma.exporter import Exporter
+from pymontecarlo.program.penepma.batch import group_options
+
+# Globals and constants variables.
+
+class TestModule(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.e = Exporter()
+
+    def _create_options(self, name, energy_eV, material):
+        ops = Options(name)
+        ops.beam.energy_eV = energy_eV
+        ops.geometry.body.material = material
+        return ops
+
+    def testgroup_options(self):
+        options_list = [self._create_options('cu10', 10e3, PenelopeMaterial.pure(29)),
+                        self._create_options('au10', 10e3, PenelopeMaterial.pure(79)),
+                        self._create_options('cu20', 20e3, PenelopeMaterial.pure(29)),
+                        self._create_options('cu20b', 20e3,
+                                             PenelopeMaterial.pure(29, xray_splitting=2))]
+
+        groups = group_options(options_list, self.e)
+
+        self.assertEqual(3, len(groups))
+        self.assertEqual([0, 2], groups[0])
+        self.assertEqual([1], groups[1])
+        self.assertEqual([3], groups[2])
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.results.result import PhotonKey
+from pymontecarlo.program.penepma.depth import DepthTable, TabularPhotonDepthResult
+from pymontecarlo.program.penepma.importer import get_transition
+
+# Globals and constants variables.
+
+class TestDepthTable(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        cula1 = get_transition(29, 'L3', 'M5')
+        self.generated = PhotonKey(cula1, False, PhotonKey.T)
+        self.emitted = PhotonKey(cula1, True, PhotonKey.T)
+
+        values = np.arange(2 * 5 * 3, dtype=float).reshape(2, 5, 3)
+        self.table = DepthTable([self.generated, self.emitted], values)
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+
+    def testkeys(self):
+        self.assertEqual([self.generated, self.emitted], self.table.keys)
+        self.assertEqual(2, len(self.table))
+        self.assertEqual(1, self.table.index(self.emitted))
+        self.assertIn(self.generated, self.table)
+
+    def test__getitem__(self):
+        datum = self.table[self.emitted]
+        self.assertEqual((5, 3), datum.shape)
+        self.assertAlmostEqual(15.0, datum[0, 0], 4)
+
+    def testvalues(self):
+        self.assertEqual((2, 5, 3), self.table.values.shape)
+        self.assertFalse(self.table.values.flags.writeable)
+
+    def testinvalid_shape(self):
+        self.assertRaises(ValueError, DepthTable, [self.generated], np.zeros((2, 5, 3)))
+        self.assertRaises(ValueError, DepthTable, [self.generated], np.zeros((1, 5, 2)))
+        self.assertRaises(ValueError, DepthTable, [self.generated], np.zeros((1, 5, 3)), [6])
+        self.assertRaises(ValueError, DepthTable, [self.generated], np.zeros((1, 5, 3)), [5, 5])
+
+    def testlengths(self):
+        self.assertEqual([5, 5], list(self.table.lengths))
+
+        values = np.full((2, 5, 3), np.nan)
+        values[0] = 1.0
+        values[1, :3] = 2.0
+        table = DepthTable([self.generated, self.emitted], values, [5, 3])
+
+        self.assertEqual((5, 3), table[self.generated].shape)
+        self.assertEqual((3, 3), table[self.emitted].shape)
+        self.assertFalse(np.any(np.isnan(table[self.emitted])))
+
+        result = TabularPhotonDepthResult(table)
+        datum = result.get('Cu La1', absorption=True)
+        self.assertEqual((3, 3), datum.shape)
+
+    def testresult(self):
+        result = TabularPhotonDepthResult(self.table)
+        self.assertIs(self.table, result.table)
+
+        datum = result.get('Cu La1', absorption=True)
+        self.assertAlmostEqual(15.0, datum[0, 0], 4)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
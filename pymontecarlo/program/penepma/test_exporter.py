@@ -117,6 +117,28 @@ class TestPenelopeExporter(TestCase):
 
         self.e.export(opss[0], self.tmpdir)
 
+    def testsplitting(self):
+        ops = Options(name='test1')
+        ops.beam.energy_eV = 30e3
+        ops.geometry.body.material = \
+            PenelopeMaterial.pure(29, bremsstrahlung_splitting=2, xray_splitting=5)
+        ops.detectors['det1'] = TimeDetector()
+        ops.limits.add(TimeLimit(100))
+
+        opss = self.c.convert(ops)
+        filepath = self.e.export(opss[0], self.tmpdir)
+
+        with open(filepath, 'r') as fp:
+            lines = fp.readlines()
+
+        ibrspl = [line for line in lines if line.startswith('IBRSPL')]
+        self.assertEqual(1, len(ibrspl))
+        self.assertEqual(['1', '2'], ibrspl[0].split()[1:3])
+
+        ixrspl = [line for line in lines if line.startswith('IXRSPL')]
+        self.assertEqual(1, len(ixrspl))
+        self.assertEqual(['1', '5'], ixrspl[0].split()[1:3])
+
 if __name__ == '__main__': #pragma: no cover
     logging.getLogger().setLevel(logging.DEBUG)
     unittest.main()
@@ -12,9 +12,13 @@ __license__ = "GPL v3"
 import unittest
 import logging
 import os
+import tempfile
+import shutil
 from math import radians
+from zipfile import ZipFile
 
 # Third party modules.
+import numpy as np
 
 # Local modules.
 from pymontecarlo.testcase import TestCase
@@ -29,7 +33,11 @@ from pymontecarlo.options.detector import \
      ShowersStatisticsDetector,
      BackscatteredElectronEnergyDetector,
      TransmittedElectronEnergyDetector)
-from pymontecarlo.program.penepma.importer import Importer
+from pymontecarlo.program.importer import ImporterException
+from pymontecarlo.program._penelope.directory import Directory
+from pymontecarlo.program.penepma.importer import \
+    (Importer, ImportContext, get_transition, _load_dat_file, _read_depth_maps,
+     _parse_dat)
 
 # Globals and constants variables.
 
@@ -231,6 +239,161 @@ class TestImporter(TestCase):
 
         self.assertEqual(1000, len(result))
 
+class TestModule(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        testdata = os.path.join(os.path.dirname(__file__), 'testdata', 'test1')
+        self.directory = Directory(testdata)
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+
+    def testget_transition(self):
+        transition = get_transition(29, 'K', 'L3')
+        self.assertEqual(29, transition.z)
+        self.assertEqual('K', transition.dest.iupac)
+        self.assertEqual('L3', transition.src.iupac)
+        self.assertIs(transition, get_transition(29, 'K', 'L3'))
+
+    def testimport_context(self):
+        context = ImportContext(self.directory)
+
+        transitions, values = context.intensities('pe-gen-ph.dat')
+        self.assertEqual(len(transitions), values.shape[0])
+        self.assertEqual(10, values.shape[1])
+        self.assertIs(values, context.intensities('pe-gen-ph.dat')[1])
+
+        self.assertIs(context.log, context.log)
+
+        headers, values, lengths = context.depth_maps()
+        self.assertIs(values, context.depth_maps()[1])
+
+    def test_read_depth_maps(self):
+        headers, values, lengths = _read_depth_maps(self.directory)
+
+        self.assertEqual(2, len(headers))
+        self.assertEqual((29, 'L3', 'M5', 0), headers[0])
+        self.assertEqual((2, 60, 3), values.shape)
+        self.assertEqual([60, 60], lengths)
+        self.assertAlmostEqual(-5.750000e-7, values[0, 2, 0], 4)
+        self.assertAlmostEqual(4.737908e-6, values[0, 2, 1], 4)
+
+        headers2, values2, lengths2 = _read_depth_maps(self.directory, max_workers=4)
+        self.assertEqual(headers, headers2)
+        self.assertTrue(np.array_equal(values, values2))
+        self.assertEqual(lengths, lengths2)
+
+class TestImporterZip(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        testdata = os.path.join(os.path.dirname(__file__), 'testdata', 'test1')
+        self.zipfilepath = os.path.join(self.tmpdir, 'test1.zip')
+        with ZipFile(self.zipfilepath, 'w') as z:
+            for filename in os.listdir(testdata):
+                z.write(os.path.join(testdata, filename), filename)
+
+        self.i = Importer()
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _create_options(self):
+        ops = Options(name='test1')
+        ops.beam.energy_eV = 20e3
+        ops.detectors['xray'] = \
+            PhotonIntensityDetector((radians(-45), radians(-35)), (0, radians(360.0)))
+        ops.detectors['depth'] = \
+            PhotonDepthDetector((radians(35), radians(45)), (0, radians(360.0)), 100)
+        ops.detectors['bse'] = \
+            BackscatteredElectronEnergyDetector(100, (0.0, 20e3))
+        ops.detectors['time'] = TimeDetector()
+        return ops
+
+    def test_import_zip(self):
+        resultscontainer = self.i.import_(self._create_options(), self.zipfilepath)
+
+        val, _unc = resultscontainer['xray'].intensity('W Ma1')
+        self.assertAlmostEqual(6.07152e-05, val, 9)
+
+        self.assertEqual(1000, len(resultscontainer['bse']))
+        self.assertGreater(len(resultscontainer['depth'].get('Cu La1', absorption=True)), 0)
+        self.assertAlmostEqual(8.993401e1, resultscontainer['time'].simulation_time_s, 4)
+
+    def test_import_zip_fileobj(self):
+        with open(self.zipfilepath, 'rb') as fp:
+            resultscontainer = self.i.import_(self._create_options(), fp)
+
+        val, _unc = resultscontainer['xray'].intensity('W Ma1')
+        self.assertAlmostEqual(6.07152e-05, val, 9)
+
+    def test_import_zip_missing(self):
+        with ZipFile(self.zipfilepath, 'w') as z:
+            z.writestr('penepma-res.dat', '')
+
+        self.assertRaises(ImporterException, self.i.import_,
+                          self._create_options(), self.zipfilepath)
+
+class Test_load_dat_file(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_load_dat_file(self):
+        filepath = os.path.join(self.tmpdir, 'test.dat')
+        with open(filepath, 'w') as fp:
+            fp.write(' # header\n\n  1.0E+01  2.0E-01  3.0E-02\n')
+            fp.write(' # comment\n  4.0E+01  5.0E-01  6.0E-02\n\n')
+
+        data = _load_dat_file(filepath)
+
+        self.assertEqual((2, 3), data.shape)
+        self.assertAlmostEqual(10.0, data[0, 0], 4)
+        self.assertAlmostEqual(0.06, data[1, 2], 4)
+
+    def test_load_dat_file_empty(self):
+        filepath = os.path.join(self.tmpdir, 'test.dat')
+        with open(filepath, 'w') as fp:
+            fp.write(' # header\n')
+
+        data = _load_dat_file(filepath)
+
+        self.assertEqual((0, 3), data.shape)
+
+    def test_parse_dat_chunks(self):
+        buf = b' # header\n\n  1.0E+01  2.0E-01  3.0E-02\n' + \
+              b' # comment\n  4.0E+01  5.0E-01  6.0E-02\n' + \
+              b'  7.0E+01  8.0E-01  9.0E-02\n\n'
+
+        expected = _parse_dat(buf, 3)
+        self.assertEqual((3, 3), expected.shape)
+
+        # Chunks smaller than a line and than a few lines
+        for chunksize in [1, 5, 40, 64]:
+            data = _parse_dat(buf, 3, chunksize)
+            self.assertTrue(np.array_equal(expected, data), chunksize)
+
+    def test_parse_dat_invalid(self):
+        # Invalid value
+        buf = b'  1.0E+01  2.0E-01  3.0E-02\n  ******  5.0E-01  6.0E-02\n'
+        self.assertRaises(ImporterException, _parse_dat, buf, 3)
+
+        # Number of values is a multiple of the columns, but not the lines
+        buf = b'  1.0E+01  2.0E-01\n  4.0E+01  5.0E-01\n  7.0E+01  8.0E-01\n'
+        self.assertRaises(ImporterException, _parse_dat, buf, 3)
+
 if __name__ == '__main__': #pragma: no cover
     logging.getLogger().setLevel(logging.DEBUG)
     unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+from unittest import mock
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.results.result import PhotonKey
+from pymontecarlo.program.penepma.intensity import \
+    IntensityTable, TabularPhotonIntensityResult, stack_intensities
+from pymontecarlo.program.penepma.importer import get_transition
+
+# Globals and constants variables.
+
+def _create_table(transitions, scale):
+    # P, C, B, TF and T with their uncertainties
+    values = np.array([[1.0, 0.1, 2.0, 0.2, 3.0, 0.3, 5.0, 0.5, 6.0, 0.6]] * len(transitions))
+    return transitions, values * scale
+
+class TestIntensityTable(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.cuka1 = get_transition(29, 'K', 'L3')
+        self.cuka2 = get_transition(29, 'K', 'L2')
+        self.cula1 = get_transition(29, 'L3', 'M5')
+
+        generated = _create_table([self.cuka1, self.cuka2], 1.0)
+        emitted = _create_table([self.cuka1, self.cula1], 0.5)
+        self.table = IntensityTable.from_tables(generated, emitted)
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+
+    def testtransitions(self):
+        self.assertEqual([self.cuka1, self.cuka2, self.cula1], self.table.transitions)
+        self.assertEqual((3, 2, 4, 2), self.table.values.shape)
+        self.assertEqual(1, self.table.index(self.cuka2))
+
+    def test__getitem__(self):
+        val, unc = self.table[PhotonKey(self.cuka1, False, PhotonKey.T)]
+        self.assertAlmostEqual(6.0, val, 4)
+        self.assertAlmostEqual(0.6, unc, 4)
+
+        val, unc = self.table[PhotonKey(self.cuka1, True, PhotonKey.P)]
+        self.assertAlmostEqual(0.5, val, 4)
+        self.assertAlmostEqual(0.05, unc, 4)
+
+        val, unc = self.table[PhotonKey(self.cula1, True, PhotonKey.B)]
+        self.assertAlmostEqual(1.5, val, 4)
+
+        self.assertRaises(KeyError, self.table.__getitem__,
+                          PhotonKey(self.cuka2, True, PhotonKey.T))
+        self.assertRaises(KeyError, self.table.__getitem__,
+                          PhotonKey(get_transition(79, 'K', 'L3'), True, PhotonKey.T))
+
+    def test__len__(self):
+        self.assertEqual(16, len(self.table))
+        self.assertEqual(16, len(list(self.table)))
+
+    def testdict(self):
+        intensities = dict(self.table)
+        self.assertEqual(16, len(intensities))
+        self.assertEqual(self.table[PhotonKey(self.cula1, True, PhotonKey.C)],
+                         intensities[PhotonKey(self.cula1, True, PhotonKey.C)])
+
+    def testresult(self):
+        result = TabularPhotonIntensityResult(self.table)
+        self.assertIs(self.table, result.table)
+
+        val, _unc = result.intensity(self.cuka1)
+        self.assertAlmostEqual(3.0, val, 4)
+
+    def testresult_no_copy(self):
+        # A dict of the intensities would iterate over the table
+        with mock.patch.object(IntensityTable, '__iter__',
+                               side_effect=AssertionError('Table copied')), \
+             mock.patch.object(IntensityTable, 'keys',
+                               side_effect=AssertionError('Table copied')):
+            result = TabularPhotonIntensityResult(self.table)
+
+            val, _unc = result.intensity(self.cuka1)
+            self.assertAlmostEqual(3.0, val, 4)
+
+        self.assertIs(self.table, result._intensities)
+
+    def teststack_intensities(self):
+        other = IntensityTable.from_tables(_create_table([self.cuka1], 2.0),
+                                           _create_table([self.cuka1], 4.0))
+        stacked = stack_intensities([self.table, other], [self.cuka1, self.cula1])
+
+        self.assertEqual((2, 2, 2), stacked.shape)
+        self.assertAlmostEqual(3.0, stacked[0, 0, 0], 4)
+        self.assertAlmostEqual(3.0, stacked[0, 1, 0], 4)
+        self.assertAlmostEqual(24.0, stacked[1, 0, 0], 4)
+        self.assertTrue(np.isnan(stacked[1, 1, 0]))
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+import os
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.program.importer import ImporterException
+from pymontecarlo.program._penelope.directory import Directory
+from pymontecarlo.program.penepma.log import \
+    read_log, parse_log, UPBOUND, ABSORBED, ELECTRONS, PHOTONS, POSITRONS
+
+# Globals and constants variables.
+
+class TestPenepmaLog(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        testdata = os.path.join(os.path.dirname(__file__), 'testdata', 'test1')
+        self.log = read_log(Directory(testdata))
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+
+    def testquantities(self):
+        self.assertAlmostEqual(8.993401e1, self.log.simulation_time_s, 4)
+        self.assertAlmostEqual(8.554940e2, self.log.simulation_speed, 4)
+        self.assertAlmostEqual(7.693800e4, self.log.showers, 4)
+        self.assertAlmostEqual(3.759300e4, self.log.upbound_primaries, 4)
+        self.assertAlmostEqual(0.0, self.log.downbound_primaries, 4)
+        self.assertAlmostEqual(3.934500e4, self.log.absorbed_primaries, 4)
+
+        val, unc = self.log.upbound_fraction
+        self.assertAlmostEqual(0.5168187, val, 6)
+        self.assertAlmostEqual(7.5e-3, unc, 6)
+
+        val, unc = self.log.absorption_fraction
+        self.assertAlmostEqual(0.5113858, val, 6)
+        self.assertAlmostEqual(5.4e-3, unc, 6)
+
+        self.assertEqual(self.log.upbound_fraction, self.log['Upbound fraction'])
+        self.assertIn('Downbound fraction', self.log)
+
+    def testsecondary_generation(self):
+        val, unc = self.log.secondary_generation(UPBOUND, ELECTRONS)
+        self.assertAlmostEqual(2.820453e-2, val, 8)
+        self.assertAlmostEqual(2.1e-3, unc, 6)
+
+        val, unc = self.log.secondary_generation(ABSORBED, PHOTONS)
+        self.assertAlmostEqual(3.266266e-2, val, 8)
+        self.assertAlmostEqual(2.0e-3, unc, 6)
+
+        val, unc = self.log.secondary_generation(ABSORBED, POSITRONS)
+        self.assertAlmostEqual(0.0, val, 8)
+
+    def testdeposited_energies(self):
+        energies = self.log.deposited_energies_eV
+        self.assertEqual([1], list(energies.keys()))
+        self.assertAlmostEqual(1.824160e4, energies[1][0], 2)
+        self.assertAlmostEqual(1.4e2, energies[1][1], 2)
+
+    def testdetector_energies(self):
+        energies = self.log.detector_energies_eV
+        self.assertEqual([1, 2], sorted(energies.keys()))
+        self.assertAlmostEqual(3.414320e1, energies[1][0], 4)
+        self.assertAlmostEqual(3.5e-2, energies[2][1], 4)
+
+    def testrandom_seeds(self):
+        self.assertEqual((523821246, 1720393448), self.log.random_seeds)
+
+    def testmissing(self):
+        log = parse_log([' Simulation time ......................  4.000000E+00 sec'])
+        self.assertAlmostEqual(4.0, log.simulation_time_s, 4)
+        self.assertRaises(ImporterException, getattr, log, 'showers')
+        self.assertRaises(ImporterException, log.secondary_generation,
+                          UPBOUND, ELECTRONS)
+        self.assertIsNone(log.random_seeds)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import math
+import tempfile
+import shutil
+from math import radians
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.options.options import Options
+from pymontecarlo.options.detector import \
+    (PhotonSpectrumDetector, PhotonIntensityDetector,
+     ElectronFractionDetector, ShowersStatisticsDetector)
+from pymontecarlo.program.penepma.importer import Importer
+from pymontecarlo.program.penepma.merger import \
+    merge_results, merge_log_files, read_showers
+
+# Globals and constants variables.
+_LOG = '''
+   Simulation time ......................  %E sec
+
+   Simulated primary showers ............  %E
+%s
+   Upbound fraction ................  %E +- %.1E
+'''
+
+class TestMerger(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.testdata = os.path.join(os.path.dirname(__file__),
+                                     'testdata', 'test1')
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.i = Importer()
+
+        self.ops = Options(name='test1')
+        self.ops.beam.energy_eV = 20e3
+        self.ops.detectors['spectrum'] = \
+            PhotonSpectrumDetector((radians(35), radians(45)), (0, radians(360.0)),
+                                   1000, (0, 20e3))
+        self.ops.detectors['xray2'] = \
+            PhotonIntensityDetector((radians(-45), radians(-35)), (0, radians(360.0)))
+        self.ops.detectors['fraction'] = ElectronFractionDetector()
+        self.ops.detectors['showers'] = ShowersStatisticsDetector()
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def testread_showers(self):
+        self.assertAlmostEqual(76938, read_showers(self.testdata), 4)
+
+    def testmerge_results(self):
+        showers = merge_results([self.testdata] * 2, self.tmpdir)
+        self.assertAlmostEqual(2 * 76938, showers, 4)
+
+        results = self.i.import_(self.ops, self.tmpdir)
+
+        result = results['showers']
+        self.assertEqual(2 * 76938, result.showers)
+
+        result = results['fraction']
+        self.assertAlmostEqual(0.5168187, result.backscattered[0], 4)
+        self.assertAlmostEqual(7.5e-3 / math.sqrt(2), result.backscattered[1], 4)
+
+        result = results['xray2']
+        val, unc = result.intensity('W Ma1')
+        self.assertAlmostEqual(6.07152e-05, val, 9)
+        self.assertAlmostEqual(2.23e-06 / math.sqrt(2), unc, 8)
+
+        total = results['spectrum'].get_total()
+        self.assertEqual(1000, len(total))
+        self.assertAlmostEqual(2.841637e-6, total[31, 1], 10)
+        self.assertAlmostEqual(8.402574e-6 / math.sqrt(2), total[31, 2], 10)
+
+    def _create_log(self, filename, time_s, showers, fraction, extra=''):
+        filepath = os.path.join(self.tmpdir, filename)
+        with open(filepath, 'w') as fp:
+            fp.write(_LOG % (time_s, showers, extra, fraction, 0.1 * fraction))
+        return filepath
+
+    def testmerge_log_files(self):
+        filepaths = [self._create_log('res1.dat', 10.0, 1000, 0.3),
+                     self._create_log('res2.dat', 20.0, 3000, 0.5,
+                                      '   *** Warning: too many warnings\n')]
+        outfilepath = os.path.join(self.tmpdir, 'penepma-res.dat')
+
+        merge_log_files(filepaths, [0.25, 0.75], outfilepath)
+
+        self.assertAlmostEqual(4000, read_showers(self.tmpdir), 4)
+        with open(outfilepath, 'r') as fp:
+            content = fp.read()
+        self.assertIn('%E sec' % 20.0, content)
+        self.assertIn('%E +-' % 0.45, content)
+
+    def testmerge_log_files_missing(self):
+        filepaths = [self._create_log('res1.dat', 10.0, 1000, 0.3)]
+        filepath = os.path.join(self.tmpdir, 'res2.dat')
+        with open(filepath, 'w') as fp:
+            fp.write('   Simulation time ......................  %E sec\n' % 20.0)
+        filepaths.append(filepath)
+        outfilepath = os.path.join(self.tmpdir, 'penepma-res.dat')
+
+        self.assertRaises(ValueError, merge_log_files, filepaths, [0.5, 0.5],
+                          outfilepath)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
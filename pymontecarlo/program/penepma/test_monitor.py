@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import tempfile
+import shutil
+
+# Third party modules.
+from pyxray.transition import Transition
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.options.limit import UncertaintyLimit
+
+from pymontecarlo.program.penepma.monitor import \
+    UncertaintyMonitor, read_total_intensities
+
+# Globals and constants variables.
+
+_INTENS = ('# Results from PENEPMA. Intensities of characteristic lines.\n'
+           '#  IZ S0 S1  E (eV)    P(E)   unc.\n'
+           '  29 K  L3  8.04e3  1.0e-5 1.0e-7  1.0e-5 1.0e-7  0.0 0.0  0.0 0.0  1.0e-4 1.0e-6\n'
+           '  29 K  L2  8.02e3  1.0e-5 1.0e-7  1.0e-5 1.0e-7  0.0 0.0  0.0 0.0  5.0e-5 1.0e-6\n')
+
+class TestUncertaintyMonitor(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.filepath = os.path.join(self.tmpdir, 'pe-intens-01.dat')
+        with open(self.filepath, 'w') as fp:
+            fp.write(_INTENS)
+
+        limits = [UncertaintyLimit(Transition(29, siegbahn='Ka1'), 'xray', 0.05),
+                  UncertaintyLimit(Transition(29, siegbahn='Ka2'), 'xray', 0.01)]
+        self.monitor = UncertaintyMonitor(limits, {'xray': 0})
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def testread_total_intensities(self):
+        intensities = read_total_intensities(self.filepath)
+        self.assertEqual(2, len(intensities))
+
+        val, unc = intensities[(29, 'K', 'L3')]
+        self.assertAlmostEqual(1e-4, val, 10)
+        self.assertAlmostEqual(1e-6, unc, 10)
+
+    def testprogress(self):
+        self.assertEqual(2, len(self.monitor))
+
+        # Ka2: 0.01 / (1e-6 / 5e-5)
+        self.assertAlmostEqual(0.5, self.monitor.progress(self.tmpdir), 4)
+        self.assertFalse(self.monitor.is_met(self.tmpdir))
+
+    def testprogress_met(self):
+        limits = [UncertaintyLimit(Transition(29, siegbahn='Ka1'), 'xray', 0.05),
+                  UncertaintyLimit(Transition(29, siegbahn='Ka2'), 'xray', 0.05)]
+        monitor = UncertaintyMonitor(limits, {'xray': 0})
+
+        self.assertAlmostEqual(1.0, monitor.progress(self.tmpdir), 4)
+        self.assertTrue(monitor.is_met(self.tmpdir))
+
+    def testprogress_missing(self):
+        os.remove(self.filepath)
+        self.assertAlmostEqual(0.0, self.monitor.progress(self.tmpdir), 4)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
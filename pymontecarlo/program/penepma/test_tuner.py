@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import tempfile
+import shutil
+from math import radians
+
+# Third party modules.
+from pyxray.transition import Transition
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.options.options import Options
+from pymontecarlo.options.detector import PhotonIntensityDetector
+from pymontecarlo.program._penelope.options.material import \
+    PenelopeMaterial, InteractionForcing
+from pymontecarlo.program.penepma.tuner import \
+    figure_of_merit, tune_interaction_forcings, _replace_forcing
+
+# Globals and constants variables.
+from pymontecarlo.options.particle import ELECTRON, PHOTON
+from pymontecarlo.options.collision import \
+    HARD_BREMSSTRAHLUNG_EMISSION, INNERSHELL_IMPACT_IONISATION
+
+_RES = ' Simulation time ......................  4.000000E+00 sec\n'
+
+_INTENS = ('# Results from PENEPMA. Intensities of characteristic lines.\n'
+           '#  IZ S0 S1  E (eV)    P(E)   unc.\n'
+           '  29 K  L3  8.04e3  1.0e-5 1.0e-7  1.0e-5 1.0e-7  0.0 0.0  0.0 0.0  1.0e-4 1.0e-6\n'
+           '  29 K  L2  8.02e3  1.0e-5 1.0e-7  1.0e-5 1.0e-7  0.0 0.0  0.0 0.0  5.0e-5 1.0e-6\n')
+
+_INTENS_TRACE = ('  29 K  L3  8.04e3  0.0 0.0  0.0 0.0  0.0 0.0  0.0 0.0  1.0e-4 %e\n'
+                 '  79 L3 M5  9.71e3  0.0 0.0  0.0 0.0  0.0 0.0  0.0 0.0  0.0 0.0\n')
+
+class TestModule(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        with open(os.path.join(self.tmpdir, 'penepma-res.dat'), 'w') as fp:
+            fp.write(_RES)
+        with open(os.path.join(self.tmpdir, 'pe-intens-01.dat'), 'w') as fp:
+            fp.write(_INTENS)
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def testfigure_of_merit(self):
+        # Worst line: 1 / ((1e-6 / 5e-5)^2 * 4)
+        fom = figure_of_merit(self.tmpdir, [1])
+        self.assertAlmostEqual(625.0, fom, 4)
+
+        # Only Cu Ka1: 1 / ((1e-6 / 1e-4)^2 * 4)
+        fom = figure_of_merit(self.tmpdir, [1], [Transition(29, siegbahn='Ka1')])
+        self.assertAlmostEqual(2500.0, fom, 4)
+
+    def test_replace_forcing(self):
+        forcings = [InteractionForcing(ELECTRON, HARD_BREMSSTRAHLUNG_EMISSION, -4),
+                    InteractionForcing(PHOTON, INNERSHELL_IMPACT_IONISATION, -10)]
+        material = PenelopeMaterial.pure(29, interaction_forcings=forcings,
+                                         xray_splitting=2)
+
+        newmaterial = _replace_forcing(material, INNERSHELL_IMPACT_IONISATION, -50)
+        self.assertEqual(3, len(newmaterial.interaction_forcings))
+        self.assertIn(InteractionForcing(ELECTRON, INNERSHELL_IMPACT_IONISATION, -50),
+                      newmaterial.interaction_forcings)
+        self.assertEqual(2, newmaterial.xray_splitting)
+
+        newmaterial = _replace_forcing(material, HARD_BREMSSTRAHLUNG_EMISSION, None)
+        self.assertEqual(1, len(newmaterial.interaction_forcings))
+
+    def testfigure_of_merit_no_counts(self):
+        with open(os.path.join(self.tmpdir, 'pe-intens-01.dat'), 'w') as fp:
+            fp.write(_INTENS_TRACE % 1e-6)
+
+        # Au La1 has no counts and is skipped
+        fom = figure_of_merit(self.tmpdir, [1])
+        self.assertAlmostEqual(2500.0, fom, 4)
+
+        fom = figure_of_merit(self.tmpdir, [1], [Transition(79, siegbahn='La1')])
+        self.assertAlmostEqual(0.0, fom, 4)
+
+    def _create_pilot(self, count, uncertainty):
+        dirpath = os.path.join(self.tmpdir, 'pilot%i' % count)
+        os.makedirs(dirpath)
+        with open(os.path.join(dirpath, 'penepma-res.dat'), 'w') as fp:
+            fp.write(_RES)
+        with open(os.path.join(dirpath, 'pe-intens-01.dat'), 'w') as fp:
+            fp.write(_INTENS_TRACE % uncertainty)
+        return dirpath
+
+    def _create_options(self, forcings=()):
+        ops = Options(name='test1')
+        ops.geometry.body.material = \
+            PenelopeMaterial.pure(29, interaction_forcings=list(forcings))
+        ops.detectors['x-ray'] = \
+            PhotonIntensityDetector((radians(35), radians(45)), (0, radians(360.0)))
+        return ops
+
+    def testtune_interaction_forcings_trace(self):
+        ops = self._create_options()
+
+        def _run_pilot(pilot_options, count):
+            # Forcing reduces the uncertainty of Cu Ka1, Au La1 has no counts
+            material = pilot_options.geometry.body.material
+            uncertainty = 1e-6 if material.interaction_forcings else 1e-5
+            return self._create_pilot(count, uncertainty)
+
+        newops = tune_interaction_forcings(ops, _run_pilot, forcers=(None, -50),
+                                           collisions=(INNERSHELL_IMPACT_IONISATION,))
+
+        material = newops.geometry.body.material
+        self.assertEqual(1, len(material.interaction_forcings))
+        self.assertEqual(-50, list(material.interaction_forcings)[0].forcer)
+
+    def testtune_interaction_forcings_no_counts(self):
+        ops = self._create_options()
+
+        def _run_pilot(pilot_options, count):
+            return self._create_pilot(count, 0.0)
+
+        newops = tune_interaction_forcings(ops, _run_pilot, forcers=(None, -50),
+                                           collisions=(INNERSHELL_IMPACT_IONISATION,))
+        self.assertIs(ops, newops)
+
+    def testtune_interaction_forcings(self):
+        forcings = [InteractionForcing(ELECTRON, INNERSHELL_IMPACT_IONISATION, -50)]
+        ops = self._create_options(forcings)
+
+        counts = []
+        def _run_pilot(pilot_options, count):
+            counts.append(count)
+            return self.tmpdir
+
+        newops = tune_interaction_forcings(ops, _run_pilot, forcers=(None, -50),
+                                           collisions=(INNERSHELL_IMPACT_IONISATION,))
+
+        # Forcer -50 is the starting point and is not run twice
+        self.assertEqual([0, 1], counts)
+
+        material = newops.geometry.body.material
+        self.assertEqual(1, len(material.interaction_forcings))
+        self.assertEqual(-50, list(material.interaction_forcings)[0].forcer)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
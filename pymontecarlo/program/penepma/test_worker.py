@@ -11,20 +11,30 @@ __license__ = "GPL v3"
 # Standard library modules.
 import unittest
 import logging
+import os
 import tempfile
 import shutil
+import json
+from math import radians
 
 # Third party modules.
+from pyxray.transition import Transition
 
 # Local modules.
 from pymontecarlo.testcase import TestCase
 
 from pymontecarlo.options.options import Options
-from pymontecarlo.options.detector import TimeDetector
-from pymontecarlo.options.limit import ShowersLimit
+from pymontecarlo.options.detector import TimeDetector, PhotonIntensityDetector
+from pymontecarlo.options.limit import ShowersLimit, UncertaintyLimit
 
+from pymontecarlo.program._penelope.options.material import PenelopeMaterial
+from pymontecarlo.program._penelope.benchmark import fake_executable
 from pymontecarlo.program.penepma.config import program
-from pymontecarlo.program.penepma.worker import Worker
+from pymontecarlo.program.penepma.worker import \
+    (Worker, _is_resumable, _update_job_limits, _describe_monitor,
+     _clear_directory)
+from pymontecarlo.program.penepma.exporter import Exporter
+from pymontecarlo.program.penepma.merger import read_showers
 from pymontecarlo.program.penepma.converter import Converter
 
 # Globals and constants variables.
@@ -53,6 +63,216 @@ class TestWorker(TestCase):
         results = self.worker.run(self.ops, self.outputdir, self.workdir)
         self.assertIn('time', results[0])
 
+class TestWorkerFake(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.outputdir = tempfile.mkdtemp()
+        self.workdir = tempfile.mkdtemp()
+
+        self.fake = fake_executable('penepma', lines=10)
+        self.fake.__enter__()
+
+        self.worker = Worker(program)
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+        self.fake.__exit__(None, None, None)
+        shutil.rmtree(self.outputdir, ignore_errors=True)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def _create_options(self, showers, name='test', key='x-ray'):
+        ops = Options(name)
+        ops.beam.energy_eV = 20e3
+        ops.geometry.body.material = PenelopeMaterial.pure(29)
+        ops.detectors[key] = \
+            PhotonIntensityDetector((radians(35), radians(45)), (0, radians(360.0)))
+        ops.limits.add(ShowersLimit(showers))
+        return Converter().convert(ops)[0]
+
+    def _run(self, ops, shards=1):
+        return self.worker.run(ops, self.outputdir, self.workdir,
+                               resume=True, autotune=False, shards=shards)
+
+    def _read_seeds(self, dirpath):
+        with open(os.path.join(dirpath, 'test.in'), 'r') as fp:
+            for line in fp:
+                if line.startswith('RSEED'):
+                    return tuple(line.split()[1:3])
+
+    def _interrupt(self):
+        # Dump of a run killed halfway, with a file left by this run
+        with open(os.path.join(self.workdir, 'dump.dat'), 'w') as fp:
+            json.dump({'showers': 500.0, 'time_s': 0.5}, fp)
+        open(os.path.join(self.workdir, 'interrupted'), 'w').close()
+
+    def _read_showers(self):
+        with open(os.path.join(self.workdir, 'dump.dat'), 'r') as fp:
+            return json.load(fp)['showers']
+
+    def testresume(self):
+        self._run(self._create_options(1000))
+        self._interrupt()
+
+        results = self._run(self._create_options(1000))
+        self.assertIn('x-ray', results[0])
+        self.assertTrue(os.path.exists(os.path.join(self.workdir, 'interrupted')))
+        self.assertAlmostEqual(1000.0, self._read_showers(), 4)
+
+    def testresume_changed(self):
+        self._run(self._create_options(1000))
+        self._interrupt()
+
+        # Different options, the interrupted run is discarded
+        results = self._run(self._create_options(2000))
+        self.assertIn('x-ray', results[0])
+        self.assertFalse(os.path.exists(os.path.join(self.workdir, 'interrupted')))
+        self.assertAlmostEqual(2000.0, self._read_showers(), 4)
+
+    def testrun_shards(self):
+        results = self._run(self._create_options(1000), shards=2)
+        self.assertIn('x-ray', results[0])
+
+        # Each shard simulates half of the showers
+        shard_dirs = [os.path.join(self.workdir, 'shard01'),
+                      os.path.join(self.workdir, 'shard02')]
+        for shard_dir in shard_dirs:
+            self.assertAlmostEqual(500.0, read_showers(shard_dir), 4)
+        self.assertAlmostEqual(1000.0, read_showers(self.workdir), 4)
+
+        seeds = [self._read_seeds(shard_dir) for shard_dir in shard_dirs]
+        self.assertIsNotNone(seeds[0])
+        self.assertNotEqual(seeds[0], seeds[1])
+
+    def testextend(self):
+        ops = self._create_options(1000)
+        self._run(ops)
+        self.assertAlmostEqual(1000.0, read_showers(self.workdir), 4)
+
+        extenddir = tempfile.mkdtemp()
+        try:
+            results = self.worker.extend(ops, self.outputdir, extenddir,
+                                         self.workdir, showers=3000)
+            self.assertIn('x-ray', results[0])
+
+            # Resumed from the dump of the finished simulation
+            self.assertAlmostEqual(3000.0, read_showers(extenddir), 4)
+            self.assertAlmostEqual(1000.0, read_showers(self.workdir), 4)
+        finally:
+            shutil.rmtree(extenddir, ignore_errors=True)
+
+    def testrun_batch(self):
+        opss = [self._create_options(1000, 'test1', 'x-ray1'),
+                self._create_options(2000, 'test2', 'x-ray2'),
+                self._create_options(3000, 'test3', 'x-ray3')]
+        results = self.worker.run_batch(opss, self.outputdir, self.workdir)
+
+        # Results in the order of the options
+        self.assertEqual(3, len(results))
+        for i, ops in enumerate(opss):
+            self.assertIn('x-ray%i' % (i + 1), results[i])
+            self.assertNotIn('x-ray%i' % ((i + 1) % 3 + 1), results[i])
+
+            simdir = os.path.join(self.workdir, ops.name)
+            self.assertAlmostEqual(1000.0 * (i + 1), read_showers(simdir), 4)
+            self.assertTrue(os.path.exists(os.path.join(self.outputdir,
+                                                        ops.name + '.zip')))
+
+        # Same sample, geometry and materials exported once
+        groupdir = os.path.join(self.workdir, 'group01')
+        self.assertFalse(os.path.exists(os.path.join(self.workdir, 'group02')))
+
+        filenames = sorted(filename for filename in os.listdir(groupdir)
+                           if filename.endswith(('.geo', '.mat')))
+        self.assertEqual(2, len(filenames))
+
+        # Hard-linked in the directory of each simulation
+        for ops in opss:
+            for filename in filenames:
+                filepath = os.path.join(self.workdir, ops.name, filename)
+                self.assertTrue(os.path.samefile(os.path.join(groupdir, filename),
+                                                 filepath))
+
+class TestModule(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.workdir = tempfile.mkdtemp()
+        self.ops = Options('test')
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def _create_file(self, *paths):
+        filepath = os.path.join(self.workdir, *paths)
+        if not os.path.exists(os.path.dirname(filepath)):
+            os.makedirs(os.path.dirname(filepath))
+        open(filepath, 'w').close()
+
+    def test_is_resumable(self):
+        self.assertFalse(_is_resumable(self.ops, self.workdir, 1))
+
+        self._create_file('test.in')
+        self.assertFalse(_is_resumable(self.ops, self.workdir, 1))
+
+        self._create_file('dump.dat')
+        self.assertTrue(_is_resumable(self.ops, self.workdir, 1))
+
+    def test_is_resumable_shards(self):
+        self._create_file('shard01', 'test.in')
+        self._create_file('shard01', 'dump.dat')
+        self.assertFalse(_is_resumable(self.ops, self.workdir, 2))
+
+        # Second shard did not dump yet
+        self._create_file('shard02', 'test.in')
+        self.assertTrue(_is_resumable(self.ops, self.workdir, 2))
+
+    def test_clear_directory(self):
+        self._create_file('test.in')
+        self._create_file('shard01', 'dump.dat')
+
+        _clear_directory(self.workdir)
+        self.assertEqual([], os.listdir(self.workdir))
+
+    def test_update_job_limits(self):
+        filepath = os.path.join(self.workdir, 'test.in')
+        with open(filepath, 'w') as fp:
+            fp.write(Exporter._KEYWORD_REFLIN([29010300, 1, 0.05]) + '\n')
+            fp.write(Exporter._KEYWORD_NSIMSH('%e' % 1e3) + '\n')
+            fp.write(Exporter._KEYWORD_TIME('%e' % 60.0) + '\n')
+            fp.write(Exporter._KEYWORD_END() + '\n')
+
+        self.assertRaises(ValueError, _update_job_limits, filepath, 1e2)
+
+        _update_job_limits(filepath, showers=1e4)
+
+        with open(filepath, 'r') as fp:
+            lines = fp.read().splitlines()
+        self.assertEqual(3, len(lines))
+        self.assertAlmostEqual(1e4, float(lines[0].split()[1]), 4)
+        self.assertAlmostEqual(60.0, float(lines[1].split()[1]), 4)
+
+    def test_describe_monitor(self):
+        self.ops.detectors['x-ray'] = \
+            PhotonIntensityDetector((radians(35), radians(45)), (0, radians(360.0)))
+        transition = Transition(29, siegbahn='Ka1')
+
+        self.assertEqual([], _describe_monitor(self.ops, []))
+
+        targets = [UncertaintyLimit(transition, 'x-ray', 0.05)]
+        extra = _describe_monitor(self.ops, targets)
+        self.assertEqual(1, len(extra))
+
+        targets = [UncertaintyLimit(transition, 'x-ray', 0.01)]
+        self.assertNotEqual(extra, _describe_monitor(self.ops, targets))
+
+        # Uncertainty limit of the options is monitored with the targets
+        self.ops.limits.add(UncertaintyLimit(transition, 'x-ray', 0.1))
+        self.assertEqual(2, len(_describe_monitor(self.ops, targets)))
+
 if __name__ == '__main__': #pragma: no cover
     logging.getLogger().setLevel(logging.DEBUG)
     unittest.main()
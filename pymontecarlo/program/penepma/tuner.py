@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`tuner` -- Automatic tuning of the interaction forcings
+================================================================================
+
+.. module:: tuner
+   :synopsis: Automatic tuning of the interaction forcings
+
+The interaction forcings of each material are selected by running short
+pilot simulations over a grid of forcing factors.
+The figure of merit of a simulation is defined as ``1 / (r^2 * T)``, where
+``r`` is the relative uncertainty of the emitted x-ray intensity and ``T``
+the simulation time.
+When several x-ray lines are tallied, the worst figure of merit is used, so
+that no line is penalized.
+Lines without counts in a pilot simulation (e.g. of a trace element) are
+skipped, since their uncertainty is unknown.
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import os
+import copy
+import logging
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.options.material import VACUUM
+from pymontecarlo.options.limit import TimeLimit, UncertaintyLimit
+from pymontecarlo.options.detector import \
+    _PhotonDelimitedDetector, PhotonIntensityDetector
+
+from pymontecarlo.program._penelope.options.material import \
+    PenelopeMaterial, InteractionForcing
+from pymontecarlo.program._penelope.directory import Directory
+from pymontecarlo.program.penepma.options.detector import index_delimited_detectors
+from pymontecarlo.program.penepma.monitor import read_total_intensities
+from pymontecarlo.program.penepma.log import read_log
+
+# Globals and constants variables.
+from pymontecarlo.options.particle import ELECTRON
+from pymontecarlo.options.collision import \
+    HARD_BREMSSTRAHLUNG_EMISSION, INNERSHELL_IMPACT_IONISATION
+
+DEFAULT_FORCERS = (None, -5, -50, -250) # None: no interaction forcing
+DEFAULT_COLLISIONS = (INNERSHELL_IMPACT_IONISATION, HARD_BREMSSTRAHLUNG_EMISSION)
+DEFAULT_PILOT_TIME_S = 10.0
+
+def figure_of_merit(dirpath, indexes, transitions=None):
+    """
+    Returns the figure of merit of a PENEPMA simulation.
+
+    :arg dirpath: directory containing the results of the simulation
+    :arg indexes: indexes (starting at 1) of the photon detectors
+    :arg transitions: transitions to consider. If ``None``, all the x-ray
+        lines tallied by the detectors are considered.
+
+    :return: figure of merit, or 0.0 if no line has counts
+    """
+    time_s = read_log(Directory(dirpath)).simulation_time_s
+    if time_s <= 0.0:
+        return 0.0
+
+    if transitions is not None:
+        transitions = set((t.z, t.dest.iupac, t.src.iupac) for t in transitions)
+
+    foms = []
+    for index in indexes:
+        filepath = os.path.join(dirpath, 'pe-intens-%s.dat' % str(index).zfill(2))
+        for key, (val, unc) in read_total_intensities(filepath).items():
+            if transitions is not None and key not in transitions:
+                continue
+
+            if val <= 0.0 or unc <= 0.0: # No counts
+                continue
+
+            foms.append(1.0 / ((unc / val) ** 2 * time_s))
+
+    return min(foms) if foms else 0.0
+
+def _replace_forcing(material, collision, forcer):
+    """
+    Returns a copy of the material where the interaction forcing of electrons
+    for the specified collision is replaced by the forcer.
+    If the forcer is ``None``, the interaction forcing is removed.
+    """
+    forcings = [forcing for forcing in material.interaction_forcings
+                if forcing.particle is not ELECTRON or forcing.collision is not collision]
+    if forcer is not None:
+        forcings.append(InteractionForcing(ELECTRON, collision, forcer))
+
+    return PenelopeMaterial(material.composition, material.name,
+                            material.density_kg_m3, material.absorption_energy_eV,
+                            material.elastic_scattering,
+                            material.cutoff_energy_inelastic_eV,
+                            material.cutoff_energy_bremsstrahlung_eV,
+                            forcings, material.maximum_step_length_m,
+                            material.bremsstrahlung_splitting,
+                            material.xray_splitting)
+
+def _get_forcings(material):
+    # InteractionForcing only compares the particle and collision
+    return frozenset((forcing.particle, forcing.collision, forcing.forcer, forcing.weight)
+                     for forcing in material.interaction_forcings)
+
+def _replace_materials(options, materials, newmaterials):
+    """
+    Returns a copy of the options where the bodies made of ``materials[i]``
+    are made of ``newmaterials[i]``.
+    """
+    memo = {}
+    options = copy.deepcopy(options, memo)
+
+    replacements = {}
+    for material, newmaterial in zip(materials, newmaterials):
+        replacements[id(memo.get(id(material), material))] = newmaterial
+
+    for body in options.geometry.get_bodies():
+        newmaterial = replacements.get(id(body.material))
+        if newmaterial is not None:
+            body.material = newmaterial
+
+    return options
+
+def _create_pilot_options(options, pilot_time_s):
+    options = copy.deepcopy(options)
+    options.limits.clear()
+    options.limits.add(TimeLimit(pilot_time_s))
+    return options
+
+def tune_interaction_forcings(options, run_pilot,
+                              forcers=DEFAULT_FORCERS,
+                              collisions=DEFAULT_COLLISIONS,
+                              pilot_time_s=DEFAULT_PILOT_TIME_S):
+    """
+    Returns a copy of the options where the interaction forcings of the
+    electrons are tuned to maximize the figure of merit of the
+    :class:`PhotonIntensityDetector`.
+
+    Each material and collision is tuned in turn (coordinate descent): all
+    forcers are tried while the other forcings are kept at their best value.
+    The current forcings of the options are used as a starting point.
+    A forcer which would not change the best forcings is not tried again.
+    The number of pilot simulations is therefore at most
+    ``1 + materials * collisions * forcers``.
+
+    If the options have an :class:`UncertaintyLimit`, only its transition
+    is considered. Otherwise, all the x-ray lines are considered.
+    If the options do not have any :class:`PhotonIntensityDetector` or if
+    the pilot simulations all have the same figure of merit (e.g. no counts),
+    the options are returned unchanged.
+
+    :arg options: options of the simulation
+    :arg run_pilot: function taking options and a count (starting at 0),
+        running a simulation and returning the directory containing its
+        results
+    :arg forcers: forcing factors to try. ``None`` means no forcing.
+    :arg collisions: electron collisions to force
+    :arg pilot_time_s: duration of each pilot simulation
+    """
+    dets = dict(options.detectors.iterclass(_PhotonDelimitedDetector))
+    phdets_key_index, _ = index_delimited_detectors(dets)
+
+    limits = list(options.limits.iterclass(UncertaintyLimit))
+    if limits:
+        transitions = [limits[0].transition]
+        keys = [limits[0].detector_key]
+    else:
+        transitions = None
+        keys = [key for key, _ in options.detectors.iterclass(PhotonIntensityDetector)]
+
+    if not keys:
+        logging.debug('No photon intensity detector, no tuning')
+        return options
+
+    indexes = sorted(set(phdets_key_index[key] + 1 for key in keys))
+
+    materials = [material for material in options.geometry.get_materials()
+                 if material is not VACUUM]
+    best = list(materials)
+
+    count = [0]
+    foms = []
+    def _evaluate(newmaterials):
+        pilot_options = _replace_materials(options, materials, newmaterials)
+        pilot_options = _create_pilot_options(pilot_options, pilot_time_s)
+
+        dirpath = run_pilot(pilot_options, count[0])
+        count[0] += 1
+
+        fom = figure_of_merit(dirpath, indexes, transitions)
+        logging.debug('Figure of merit of pilot %i: %s', count[0], fom)
+        foms.append(fom)
+        return fom
+
+    best_fom = _evaluate(best)
+
+    for i in range(len(materials)):
+        for collision in collisions:
+            for forcer in forcers:
+                newmaterials = list(best)
+                newmaterials[i] = _replace_forcing(best[i], collision, forcer)
+                if _get_forcings(newmaterials[i]) == _get_forcings(best[i]):
+                    continue # Already evaluated
+
+                fom = _evaluate(newmaterials)
+                if fom > best_fom:
+                    best, best_fom = newmaterials, fom
+
+    if min(foms) == max(foms):
+        logging.info('Pilot simulations cannot separate the interaction '
+                     'forcings (figure of merit: %s), forcings kept', best_fom)
+        return options
+
+    logging.debug('Best figure of merit: %s', best_fom)
+
+    return _replace_materials(options, materials, best)
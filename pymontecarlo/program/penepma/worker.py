@@ -20,17 +20,227 @@ __license__ = "GPL v3"
 
 # Standard library modules.
 import os
+import math
+import copy
+import random
+import shutil
+import tempfile
 import subprocess
 import logging
+import functools
+from zipfile import ZipFile, is_zipfile
 
 # Third party modules.
 
 # Local modules.
 from pymontecarlo.settings import get_settings
 from pymontecarlo.options.limit import TimeLimit, ShowersLimit, UncertaintyLimit
+from pymontecarlo.options.detector import _PhotonDelimitedDetector
 from pymontecarlo.program._penelope.worker import Worker as _Worker
+from pymontecarlo.program._penelope.store import \
+    create_result_store, fingerprint_inputs
+from pymontecarlo.program._penelope.supervisor import Supervisor
+from pymontecarlo.program._penelope.archive import create_archiver
+from pymontecarlo.program._penelope.timing import Timer, Span, span
+from pymontecarlo.program._penelope.settings import _parse_bool
+from pymontecarlo.program.penepma.exporter import Exporter, DUMP_FILENAME
+from pymontecarlo.program.penepma.merger import merge_results
+from pymontecarlo.program.penepma.batch import group_options
+from pymontecarlo.program.penepma.monitor import UncertaintyMonitor
+from pymontecarlo.program.penepma.options.detector import index_delimited_detectors
+from pymontecarlo.program.penepma.tuner import \
+    tune_interaction_forcings, DEFAULT_PILOT_TIME_S
 
 # Globals and constants variables.
+MAX_SEED1 = 2147483562 # Set in penelope.f (RAND)
+MAX_SEED2 = 2147483398 # Set in penelope.f (RAND)
+
+FINGERPRINT_FILENAME = 'inputs.sha1'
+
+# The title and seeds differ between runs of the same simulation
+_FINGERPRINT_IGNORED_PREFIXES = (b'TITLE ', b'RSEED ')
+
+def _create_seeds(count):
+    """
+    Returns *count* distinct pairs of seeds for the random number generator.
+    """
+    seeds = set()
+    while len(seeds) < count:
+        seeds.add((random.randint(1, MAX_SEED1), random.randint(1, MAX_SEED2)))
+    return sorted(seeds)
+
+def _extract_limits(options):
+    limits = list(options.limits.iterclass(ShowersLimit))
+    showers_limit = limits[0].showers if limits else 1e38
+
+    limits = list(options.limits.iterclass(TimeLimit))
+    time_limit = limits[0].time_s if limits else 1e38
+
+    limits = list(options.limits.iterclass(UncertaintyLimit))
+    uncertainty_limit = 1.0 - limits[0].uncertainty if limits else float('inf')
+
+    return showers_limit, time_limit, uncertainty_limit
+
+def parse_progress(line, limits):
+    """
+    Parses a line of PENEPMA standard output and returns a :class:`tuple` of
+    the status and progress. The progress is ``None`` if the line does not
+    report it.
+    Raises :exc:`RuntimeError` if PENEPMA reports an error.
+
+    :arg line: line of the standard output (:class:`bytes`)
+    :arg limits: showers, time and uncertainty limits
+        (see :func:`_extract_limits`)
+    """
+    showers_limit, time_limit, uncertainty_limit = limits
+
+    infos = line.decode('ascii').split(',')
+    if len(infos) == 1:
+        status = infos[0].strip()
+        if status.startswith('STOP'):
+            raise RuntimeError("The following error occurred during the simulation: %s" % status)
+        return status, None
+    elif len(infos) == 4:
+        progress_showers = float(infos[0]) / showers_limit
+        progress_time = float(infos[1]) / time_limit
+        progress_uncertainty = (1.0 - float(infos[2])) / uncertainty_limit
+        return 'Running', max(0.001, progress_showers, progress_time,
+                              progress_uncertainty)
+
+    return None, None
+
+def _get_shard_dir(workdir, index):
+    return os.path.join(workdir, 'shard%s' % str(index + 1).zfill(2))
+
+def _is_resumable(options, workdir, shards):
+    """
+    Returns whether a previous run of the simulation left input files and
+    at least one dump file in *workdir*.
+    """
+    if shards > 1:
+        dirpaths = [_get_shard_dir(workdir, i) for i in range(shards)]
+    else:
+        dirpaths = [workdir]
+
+    filename = options.name + '.in'
+    if not all(os.path.exists(os.path.join(dirpath, filename)) for dirpath in dirpaths):
+        return False
+
+    return any(os.path.exists(os.path.join(dirpath, DUMP_FILENAME))
+               for dirpath in dirpaths)
+
+def _read_fingerprint(workdir):
+    filepath = os.path.join(workdir, FINGERPRINT_FILENAME)
+    if not os.path.exists(filepath):
+        return None
+    with open(filepath, 'r') as fp:
+        return fp.read().strip()
+
+def _write_fingerprint(workdir, fingerprint):
+    with open(os.path.join(workdir, FINGERPRINT_FILENAME), 'w') as fp:
+        fp.write(fingerprint)
+
+def _clear_directory(dirpath):
+    """
+    Removes all the files and subdirectories of *dirpath*.
+    """
+    for filename in os.listdir(dirpath):
+        filepath = os.path.join(dirpath, filename)
+        if os.path.isdir(filepath) and not os.path.islink(filepath):
+            shutil.rmtree(filepath, ignore_errors=True)
+        else:
+            os.remove(filepath)
+
+def _update_job_limits(infilepath, showers=None, time_s=None):
+    """
+    Raises the showers and time limits of a PENEPMA input file and removes
+    its reference line (uncertainty limit).
+    Raises :exc:`ValueError` if a new limit is not greater than the current
+    one.
+    """
+    with open(infilepath, 'r') as fp:
+        lines = fp.read().splitlines()
+
+    newlines = []
+    for line in lines:
+        keyword = line[:Exporter._KEYWORD_NSIMSH.LINE_KEYWORDS_SIZE].strip()
+
+        if keyword == 'NSIMSH' and showers is not None:
+            if showers <= float(line.split()[1]):
+                raise ValueError('Showers limit (%e) must be greater than %s' % \
+                                 (showers, line.split()[1]))
+            line = Exporter._KEYWORD_NSIMSH('%e' % showers)
+        elif keyword == 'TIME' and time_s is not None:
+            if time_s <= float(line.split()[1]):
+                raise ValueError('Time limit (%e) must be greater than %s' % \
+                                 (time_s, line.split()[1]))
+            line = Exporter._KEYWORD_TIME('%e' % time_s)
+        elif keyword == 'REFLIN':
+            continue
+
+        newlines.append(line)
+
+    with open(infilepath, 'w') as fp:
+        for line in newlines:
+            fp.write(line + os.linesep)
+
+def _create_monitor(options, targets, factor=1.0):
+    """
+    Returns a copy of the options without uncertainty limit and a monitor of
+    the uncertainty limits of the options and of the *targets*.
+    The uncertainty of the targets (but not of the limits of the options) is
+    multiplied by *factor*.
+    """
+    limits = list(options.limits.iterclass(UncertaintyLimit))
+    limits += [UncertaintyLimit(limit.transition, limit.detector_key,
+                                limit.uncertainty * factor) for limit in targets]
+
+    dets = dict(options.detectors.iterclass(_PhotonDelimitedDetector))
+    phdets_key_index, _ = index_delimited_detectors(dets)
+    monitor = UncertaintyMonitor(limits, phdets_key_index)
+
+    # PENEPMA would stop as soon as the uncertainty limit is met
+    others = list(options.limits.iterclass(ShowersLimit)) + \
+             list(options.limits.iterclass(TimeLimit))
+    options = copy.deepcopy(options)
+    options.limits.clear()
+    for limit in others:
+        options.limits.add(copy.deepcopy(limit))
+
+    return options, monitor
+
+def _describe_monitor(options, targets):
+    """
+    Returns a :class:`list` of :class:`str` describing the uncertainty limits
+    monitored by the worker (see :func:`_create_monitor`), which are not
+    written in the input file.
+    """
+    if not targets:
+        return []
+
+    dets = dict(options.detectors.iterclass(_PhotonDelimitedDetector))
+    phdets_key_index, _ = index_delimited_detectors(dets)
+
+    limits = list(options.limits.iterclass(UncertaintyLimit)) + list(targets)
+    return ['target:%s:%i:%r' % (limit.transition,
+                                 phdets_key_index[limit.detector_key] + 1,
+                                 limit.uncertainty)
+            for limit in limits]
+
+def _get_batch_ignored_settings(section):
+    """
+    Returns the names of the options of the settings section which are set
+    but not supported by :meth:`Worker.run_batch`.
+    """
+    ignored = []
+    if getattr(section, 'resultstore', None):
+        ignored.append('resultstore')
+    if int(getattr(section, 'shards', 1)) > 1:
+        ignored.append('shards')
+    for name in ['autotune', 'resume']:
+        if _parse_bool(getattr(section, name, False)):
+            ignored.append(name)
+    return ignored
 
 class Worker(_Worker):
 
@@ -38,54 +248,603 @@ class Worker(_Worker):
         """
         Runner to run PENEPMA simulation(s).
         """
-        _Worker.__init__(self, program)
+        _Worker.__init__(self, program,
+                         create_archiver(get_settings().penepma))
 
         self._executable = get_settings().penepma.exe
         if not os.path.isfile(self._executable):
             raise IOError('PENEPMA executable (%s) cannot be found' % self._executable)
         logging.debug('PENEPMA executable: %s', self._executable)
 
+        self._supervisor = None
+
+    def cancel(self):
+        supervisor = self._supervisor
+        if supervisor is not None:
+            supervisor.cancel()
+        _Worker.cancel(self)
+
     def run(self, options, outputdir, workdir, *args, **kwargs):
-        infilepath = self.create(options, workdir, createdir=False)
+        """
+        Runs the simulation.
+
+        If *shards* is greater than 1 (by default, the ``shards`` option of the
+        ``penepma`` section of the settings), the showers and time limits
+        are split between as many PENEPMA processes running concurrently.
+        Each process runs in its own subdirectory of *workdir* with
+        different random seeds. Their results are merged before being
+        imported.
+
+        If a result store is specified (*store* argument or ``resultstore``
+        option of the ``penepma`` section of the settings), the results of a
+        simulation with the same input files, executable and
+        *uncertainty_targets* are reused instead of running PENEPMA.
+
+        If *autotune* is ``True`` (by default, the ``autotune`` option of the
+        ``penepma`` section of the settings), the interaction forcings of the
+        electrons are first selected from short pilot simulations
+        (see :func:`tune_interaction_forcings`).
+        The results stored for the same untuned options are reused without
+        running the pilot simulations.
+
+        Additional :class:`UncertaintyLimit` can be specified with the
+        *uncertainty_targets* argument. In this case, the worker monitors the
+        intensities written by PENEPMA at each dump and stops the simulation
+        once the uncertainty limits of the options and all the targets are
+        met (or the showers or time limit is reached).
+
+        If *resume* is ``True`` (by default, the ``resume`` option of the
+        ``penepma`` section of the settings) and a previous run of the
+        simulation in *workdir* was interrupted (e.g. killed or cancelled),
+        PENEPMA continues from its dump file(s) using the input files of the
+        previous run.
+        The numbers of showers and simulation time are restored from the dump,
+        so the limits still apply to the whole simulation.
+        The simulation is only resumed if the input files exported from the
+        options (ignoring the random seeds), *shards*, *uncertainty_targets*
+        and *autotune* did not change. Otherwise, the files left in *workdir*
+        are removed and the simulation starts over.
+
+        The duration of each stage is recorded (see :attr:`timings`) and,
+        if *timinglog* (by default, the ``timinglog`` option of the
+        ``penepma`` section of the settings) is specified, appended to this
+        JSON lines file.
+        """
+        timinglog = kwargs.get('timinglog', getattr(get_settings().penepma, 'timinglog', None))
+        return self._run_timed(options, outputdir, timinglog,
+                               self._run, options, outputdir, workdir, *args, **kwargs)
+
+    def _run(self, options, outputdir, workdir, *args, **kwargs):
+        section = get_settings().penepma
+        shards = int(kwargs.get('shards', getattr(section, 'shards', 1)))
+        store = kwargs.get('store', create_result_store(section))
+        autotune = kwargs.get('autotune',
+                              _parse_bool(getattr(section, 'autotune', False)))
+        resume = kwargs.get('resume',
+                            _parse_bool(getattr(section, 'resume', False)))
+        targets = list(kwargs.get('uncertainty_targets', []))
+        pilot_time_s = float(getattr(section, 'pilottime', DEFAULT_PILOT_TIME_S))
+        zipfilepath = os.path.join(outputdir, options.name + '.zip')
+
+        # Only resume the same simulation: the input files exported from
+        # the (untuned) options must not have changed
+        fingerprint = None
+        if resume:
+            extra = ['shards:%i' % shards] + _describe_monitor(options, targets)
+            if autotune:
+                extra += ['autotune', 'pilottime:%r' % pilot_time_s]
+            with span('export'):
+                fingerprint = self._fingerprint(options, targets, extra)
+
+            if not _is_resumable(options, workdir, shards):
+                resume = False
+            elif _read_fingerprint(workdir) != fingerprint:
+                logging.info('Simulation in %s changed, it is not resumed', workdir)
+                _clear_directory(workdir)
+                resume = False
+
+        if not resume:
+            dumpfilepath = os.path.join(workdir, DUMP_FILENAME)
+            if os.path.exists(dumpfilepath):
+                os.remove(dumpfilepath)
+
+        # Tune interaction forcings
+        # (the forcings of an interrupted run are kept in its input file)
+        tune_key = None
+        if autotune and not resume:
+            # The tuned forcings only depend on the untuned options, so the
+            # results of a simulation tuned from the same options are reused
+            # without running the pilots
+            if store is not None:
+                export_options = options
+                if targets:
+                    export_options, _ = _create_monitor(options, targets)
+                self._export(options, export_options, workdir, shards)
+
+                extra = ['autotune', 'pilottime:%r' % pilot_time_s]
+                extra += _describe_monitor(options, targets)
+                tune_key = store.create_key(workdir, self._executable, extra)
+                results = self._fetch(store, tune_key, options, zipfilepath, workdir)
+                if results is not None:
+                    return results
+
+            with span('tune'):
+                options = self._tune(options, workdir, pilot_time_s)
+
+        # Monitor uncertainty targets
+        if targets:
+            export_options, monitor = _create_monitor(options, targets)
+        else:
+            export_options, monitor = options, None
+
+        exporter = geoinfo = matinfos = None
+        if resume:
+            # Keep the input files of the interrupted run
+            logging.info('Resuming simulation in %s', workdir)
+            infilepath = os.path.join(workdir, options.name + '.in')
+        else:
+            exporter, geoinfo, matinfos, infilepath = \
+                self._export(options, export_options, workdir, shards)
+            if fingerprint is not None:
+                _write_fingerprint(workdir, fingerprint)
+
+        # Reuse results of an identical simulation
+        if store is not None:
+            extra = _describe_monitor(options, targets)
+            key = store.create_key(workdir, self._executable, extra)
+            results = self._fetch(store, key, options, zipfilepath, workdir)
+            if results is not None:
+                if tune_key is not None:
+                    store.put(tune_key, zipfilepath)
+                return results
+
+        # Run
+        if shards > 1:
+            results = self._run_sharded(options, outputdir, workdir, shards,
+                                        exporter, geoinfo, matinfos, targets,
+                                        resume)
+        else:
+            results = self._run_single(options, outputdir, workdir, infilepath,
+                                       export_options, monitor)
+
+        if store is not None:
+            with span('store'):
+                self._archiver.wait() # ZIP may be archived in the background
+                if os.path.exists(zipfilepath):
+                    store.put(key, zipfilepath)
+                    if tune_key is not None:
+                        store.put(tune_key, zipfilepath)
+                else:
+                    logging.debug('Results not archived, not stored: %s', key)
+
+        return results
+
+    def _export(self, options, export_options, workdir, shards):
+        """
+        Exports the geometry of *options* and the input file of
+        *export_options* in *workdir*.
+        Returns the exporter, the geometry and materials information (only
+        for sharded simulations) and the path of the input file.
+        """
+        exporter = geoinfo = matinfos = None
+        with span('export'):
+            if shards > 1:
+                exporter = Exporter()
+                geoinfo, matinfos = exporter.export_geometry(options.geometry, workdir,
+                                                             options.beam)
+                infilepath = exporter._create_input_file(export_options, workdir,
+                                                         geoinfo, matinfos)
+            else:
+                infilepath = self.create(export_options, workdir, createdir=False)
+
+        return exporter, geoinfo, matinfos, infilepath
+
+    def _fingerprint(self, options, targets, extra):
+        """
+        Returns the fingerprint of the input files exported from *options*
+        (in a temporary directory) and of *extra*.
+        The title and random seeds are ignored.
+        """
+        export_options = options
+        if targets:
+            export_options, _ = _create_monitor(options, targets)
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            self.create(export_options, tmpdir, createdir=False)
+            return fingerprint_inputs(tmpdir, extra, _FINGERPRINT_IGNORED_PREFIXES)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def _fetch(self, store, key, options, zipfilepath, workdir):
+        """
+        Returns the imported results of *key* if they are in the store,
+        ``None`` otherwise.
+        """
+        with span('store'):
+            found = store.fetch(key, zipfilepath, workdir)
+        if not found:
+            return None
+
+        self._status = 'Importing results'
+        with span('import'):
+            return self.import_(options, workdir)
+
+    def extend(self, options, outputdir, workdir, source, showers=None, time_s=None):
+        """
+        Continues a finished simulation to improve its statistics.
+
+        The files of the simulation (input files and :file:`dump.dat`) are
+        copied from *source* to *workdir*. The showers and/or time limits are
+        raised to the specified values and PENEPMA resumes from the dump.
+        The limits are totals including the showers and time of the finished
+        simulation. The uncertainty limit is removed.
+        Sharded simulations cannot be extended, since their merged results
+        do not have a dump file.
+
+        :arg options: options of the finished simulation
+        :arg outputdir: directory where the updated results are saved
+        :arg workdir: directory where the simulation is run
+        :arg source: directory or ZIP containing the results of the finished
+            simulation
+        :arg showers: new total number of showers
+        :arg time_s: new total simulation time (in seconds)
+
+        :return: updated results
+        """
+        timinglog = getattr(get_settings().penepma, 'timinglog', None)
+        return self._run_timed(options, outputdir, timinglog, self._extend,
+                               options, outputdir, workdir, source, showers, time_s)
+
+    def _extend(self, options, outputdir, workdir, source, showers, time_s):
+        if showers is None and time_s is None:
+            raise ValueError('Specify the showers and/or time limit')
+
+        # Copy files of the finished simulation
+        self._status = 'Copying simulation'
+        self._progress = 0.001
+
+        if is_zipfile(source):
+            with ZipFile(source, 'r') as zipfile:
+                zipfile.extractall(workdir)
+        elif os.path.abspath(source) != os.path.abspath(workdir):
+            for filename in os.listdir(source):
+                filepath = os.path.join(source, filename)
+                if os.path.isfile(filepath):
+                    shutil.copy(filepath, workdir)
+
+        infilepath = os.path.join(workdir, options.name + '.in')
+        for filepath in [infilepath, os.path.join(workdir, DUMP_FILENAME)]:
+            if not os.path.exists(filepath):
+                raise ValueError('Simulation cannot be extended, %s is missing' % \
+                                 os.path.basename(filepath))
 
-        # Extract limit
-        limits = list(options.limits.iterclass(ShowersLimit))
-        showers_limit = limits[0].showers if limits else 1e38
+        # Raise limits
+        _update_job_limits(infilepath, showers, time_s)
 
-        limits = list(options.limits.iterclass(TimeLimit))
-        time_limit = limits[0].time_s if limits else 1e38
+        limit_options = copy.deepcopy(options)
+        limit_options.limits.clear()
+        if showers is not None:
+            limit_options.limits.add(ShowersLimit(showers))
+        if time_s is not None:
+            limit_options.limits.add(TimeLimit(time_s))
 
-        limits = list(options.limits.iterclass(UncertaintyLimit))
-        uncertainty_limit = 1.0 - limits[0].uncertainty if limits else float('inf')
+        return self._run_single(options, outputdir, workdir, infilepath,
+                                limit_options)
+
+    def run_batch(self, options_list, outputdir, workdir, max_processes=None):
+        """
+        Runs several simulations concurrently.
+
+        The options are grouped by sample (same geometry and materials, see
+        :func:`group_options`), so that the *geo* and *mat* files of each
+        group are only exported once, in a ``groupXX`` subdirectory of
+        *workdir*. They are then linked in the directory of each simulation,
+        named after the options.
+        At most *max_processes* (by default, the ``batchprocesses`` option
+        of the ``penepma`` section of the settings or the number of CPUs)
+        PENEPMA processes run at the same time. The results of a simulation
+        are imported as soon as it finishes, and the durations of its stages
+        are saved in its results ZIP (see :meth:`run`).
+
+        Each simulation is run as a single PENEPMA process from scratch: the
+        ``resultstore``, ``shards``, ``autotune`` and ``resume`` options of
+        the ``penepma`` section of the settings are ignored (a warning is
+        logged if they are set). Use :meth:`run` for these features.
+
+        :arg options_list: :class:`list` of options, with different names
+        :arg outputdir: directory where the results (ZIP) are saved
+        :arg workdir: directory where the simulations are run
+
+        :return: :class:`list` of results, in the order of *options_list*
+        """
+        names = [options.name for options in options_list]
+        if len(set(names)) != len(names):
+            raise ValueError('The names of the options must be different')
+
+        section = get_settings().penepma
+        if max_processes is None:
+            max_processes = getattr(section, 'batchprocesses', None)
+            max_processes = int(max_processes) if max_processes else None
+
+        ignored = _get_batch_ignored_settings(section)
+        if ignored:
+            logging.warning('Settings ignored when running a batch: %s',
+                            ', '.join(ignored))
+
+        self._status = 'Exporting batch'
+        self._progress = 0.001
+
+        exporter = Exporter()
+        with span('export.group'):
+            groups = group_options(options_list, exporter)
+        logging.debug('%i simulations grouped in %i samples',
+                      len(options_list), len(groups))
+
+        # Export
+        simdirs = [None] * len(options_list)
+        infilepaths = [None] * len(options_list)
+
+        for i, indexes in enumerate(groups):
+            groupdir = os.path.join(workdir, 'group%s' % str(i + 1).zfill(2))
+            if not os.path.exists(groupdir):
+                os.makedirs(groupdir)
+
+            first = options_list[indexes[0]]
+            geoinfo, matinfos = exporter.export_geometry(first.geometry, groupdir,
+                                                         first.beam)
+            shared_filepaths = [geoinfo[1]] + [filepath for _, filepath in matinfos]
+
+            for index in indexes:
+                options = options_list[index]
+
+                simdir = os.path.join(workdir, options.name)
+                if os.path.exists(simdir):
+                    shutil.rmtree(simdir, ignore_errors=True)
+                os.makedirs(simdir)
+
+                for filepath in shared_filepaths:
+                    dst = os.path.join(simdir, os.path.basename(filepath))
+                    try:
+                        os.link(filepath, dst)
+                    except OSError:
+                        shutil.copy(filepath, dst)
+
+                simdirs[index] = simdir
+                infilepaths[index] = \
+                    exporter._create_input_file(options, simdir, geoinfo, matinfos)
 
         # Launch
-        args = [self._executable]
-        stdin = open(infilepath, 'r')
-        logging.debug('Launching %s', ' '.join(args))
+        self._status = 'Running PENEPMA (%i simulations)' % len(options_list)
+
+        def _on_progress(job):
+            self._progress = max(0.001, sum(job.progress for job in jobs) / len(jobs))
 
+        timinglog = getattr(section, 'timinglog', None)
+
+        def _extract(options):
+            def _callback(job):
+                with Timer(options.name) as timer:
+                    timer.spans.append(Span(options.name, 'run', job.start, job.duration_s))
+                    results = self._extract_results(options, outputdir, job.workdir)
+                self._save_timings(timer, options, outputdir, timinglog)
+                return results
+            return _callback
+
+        self._supervisor = Supervisor(max_processes, on_progress=_on_progress)
+        jobs = []
+        for options, simdir, infilepath in zip(options_list, simdirs, infilepaths):
+            read_progress = functools.partial(parse_progress,
+                                              limits=_extract_limits(options))
+            job = self._supervisor.submit([self._executable], infilepath, simdir,
+                                          read_progress, callback=_extract(options))
+            jobs.append(job)
+
+        try:
+            self._supervisor.run()
+        finally:
+            self._supervisor = None
+
+        errors = ['%s: %s' % (options.name, job.error)
+                  for options, job in zip(options_list, jobs) if not job.succeeded]
+        if errors:
+            raise RuntimeError('An error occurred during the simulation(s): ' + \
+                               '; '.join(errors))
+
+        self._status = 'Completed'
+        return [job.result for job in jobs]
+
+    def _tune(self, options, workdir, pilot_time_s):
+        pilot_dirs = []
+
+        def _run_pilot(pilot_options, count):
+            self._status = 'Tuning interaction forcings (pilot %i)' % (count + 1)
+            self._progress = 0.001
+
+            pilot_dir = os.path.join(workdir, 'pilot%s' % str(count + 1).zfill(2))
+            if os.path.exists(pilot_dir):
+                shutil.rmtree(pilot_dir, ignore_errors=True)
+            os.makedirs(pilot_dir)
+            pilot_dirs.append(pilot_dir)
+
+            infilepath = self.create(pilot_options, pilot_dir, createdir=False)
+            self._launch(infilepath, pilot_dir, _extract_limits(pilot_options))
+
+            return pilot_dir
+
+        try:
+            return tune_interaction_forcings(options, _run_pilot,
+                                             pilot_time_s=pilot_time_s)
+        finally:
+            for pilot_dir in pilot_dirs:
+                shutil.rmtree(pilot_dir, ignore_errors=True)
+
+    def _run_single(self, options, outputdir, workdir, infilepath,
+                    export_options=None, monitor=None):
+        if export_options is None:
+            export_options = options
+
+        # Launch
         self._status = 'Running PENEPMA'
         self._progress = 0.001 # Ensure that the simulation has started
 
-        with self._create_process(args, stdin=stdin, stdout=subprocess.PIPE,
-                                  stderr=subprocess.STDOUT, cwd=workdir) as process:
-            for line in iter(process.stdout.readline, b""):
-                infos = line.decode('ascii').split(',')
-                if len(infos) == 1:
-                    self._status = infos[0].strip()
-                    if self._status.startswith('STOP'):
-                        raise RuntimeError("The following error occurred during the simulation: %s" % self._status)
-                elif len(infos) == 4:
-                    progress_showers = float(infos[0]) / showers_limit
-                    progress_time = float(infos[1]) / time_limit
-                    progress_uncertainty = (1.0 - float(infos[2])) / uncertainty_limit
-                    self._progress = max(0.001, progress_showers, progress_time,
-                                         progress_uncertainty)
-                    self._status = 'Running'
-
-        retcode = self._join_process()
-
-        if retcode != 0:
-            raise RuntimeError("An error occurred during the simulation")
+        with span('run'):
+            self._launch(infilepath, workdir, _extract_limits(export_options), monitor)
 
         return self._extract_results(options, outputdir, workdir)
 
+    def _launch(self, infilepath, workdir, limits, monitor=None):
+        """
+        Runs PENEPMA in *workdir* with the specified input file and waits
+        until it finishes or, if a monitor is specified, until its
+        uncertainty targets are met.
+        """
+        stopped = False
+
+        with open(infilepath, 'r') as stdin:
+            args = [self._executable]
+            logging.debug('Launching %s', ' '.join(args))
+
+            with self._create_process(args, stdin=stdin, stdout=subprocess.PIPE,
+                                      stderr=subprocess.STDOUT, cwd=workdir) as process:
+                for line in iter(process.stdout.readline, b""):
+                    progress = self._read_progress(line, limits)
+                    if progress is None:
+                        continue
+
+                    if monitor is not None:
+                        targets_progress = monitor.progress(workdir)
+                        progress = max(progress, targets_progress)
+
+                        if targets_progress >= 1.0:
+                            logging.debug('Uncertainty targets met, stopping PENEPMA')
+                            process.terminate()
+                            stopped = True
+                            break
+
+                    self._progress = progress
+
+            retcode = self._join_process()
+
+        if retcode != 0 and not stopped:
+            raise RuntimeError("An error occurred during the simulation")
+
+    def _read_progress(self, line, limits):
+        """
+        Parses a line of PENEPMA standard output, updates the status and
+        returns the progress or ``None`` if the line does not report it.
+        """
+        status, progress = parse_progress(line, limits)
+        if status is not None:
+            self._status = status
+        return progress
+
+    def _create_shard_options(self, options, shards):
+        """
+        Returns a copy of the options where the showers and time limits are
+        divided by the number of shards.
+        The uncertainty limit is relaxed accordingly, since the uncertainty
+        of the merged results decreases with the square root of the number of
+        shards.
+        """
+        options = copy.deepcopy(options)
+
+        for limit in options.limits.iterclass(ShowersLimit):
+            limit.showers = int(math.ceil(limit.showers / shards))
+        for limit in options.limits.iterclass(TimeLimit):
+            limit.time_s = limit.time_s / shards
+        for limit in options.limits.iterclass(UncertaintyLimit):
+            limit.uncertainty = limit.uncertainty * math.sqrt(shards)
+
+        return options
+
+    def _export_shards(self, shard_options, workdir, shards,
+                       exporter, geoinfo, matinfos):
+        """
+        Creates the directory of each shard with the shared geometry and
+        material files and an input file with different random seeds.
+        Returns the directories and the input files.
+        """
+        shared_filepaths = [geoinfo[1]] + [filepath for _, filepath in matinfos]
+
+        shard_dirs = []
+        infilepaths = []
+        for i, seeds in enumerate(_create_seeds(shards)):
+            shard_dir = _get_shard_dir(workdir, i)
+            if os.path.exists(shard_dir):
+                shutil.rmtree(shard_dir, ignore_errors=True)
+            os.makedirs(shard_dir)
+
+            for filepath in shared_filepaths:
+                dst = os.path.join(shard_dir, os.path.basename(filepath))
+                try:
+                    os.link(filepath, dst)
+                except OSError:
+                    shutil.copy(filepath, dst)
+
+            infilepath = exporter._create_input_file(shard_options, shard_dir,
+                                                     geoinfo, matinfos, seeds)
+
+            shard_dirs.append(shard_dir)
+            infilepaths.append(infilepath)
+
+        return shard_dirs, infilepaths
+
+    def _run_sharded(self, options, outputdir, workdir, shards,
+                     exporter, geoinfo, matinfos, targets=(), resume=False):
+        self._status = 'Exporting shards'
+        self._progress = 0.001 # Ensure that the simulation has started
+
+        shard_options = self._create_shard_options(options, shards)
+
+        # Each shard only needs to reach the relaxed uncertainty targets
+        monitor = None
+        if targets:
+            shard_options, monitor = \
+                _create_monitor(shard_options, targets, math.sqrt(shards))
+
+        limits = _extract_limits(shard_options)
+
+        if resume:
+            # Keep the input and dump files of the interrupted shards
+            shard_dirs = [_get_shard_dir(workdir, i) for i in range(shards)]
+            infilepaths = [os.path.join(shard_dir, options.name + '.in')
+                           for shard_dir in shard_dirs]
+        else:
+            shard_dirs, infilepaths = \
+                self._export_shards(shard_options, workdir, shards,
+                                    exporter, geoinfo, matinfos)
+
+        # Launch
+        self._status = 'Running PENEPMA (%i shards)' % shards
+
+        def _on_progress(job):
+            self._progress = max(0.001, min(job.progress for job in jobs))
+
+        def _stop(job):
+            return monitor.progress(job.workdir) >= 1.0
+
+        read_progress = functools.partial(parse_progress, limits=limits)
+        stop = _stop if monitor is not None else None
+
+        self._supervisor = Supervisor(shards, on_progress=_on_progress)
+        jobs = [self._supervisor.submit([self._executable], infilepath, shard_dir,
+                                        read_progress, stop)
+                for shard_dir, infilepath in zip(shard_dirs, infilepaths)]
+        try:
+            with span('run'):
+                self._supervisor.run()
+        finally:
+            self._supervisor = None
+
+        for job in jobs:
+            if not job.succeeded:
+                raise RuntimeError("An error occurred during the simulation: %s" % job.error)
+
+        # Merge
+        self._status = 'Merging shards'
+        with span('merge'):
+            showers = merge_results(shard_dirs, workdir)
+        logging.debug('Merged %i shards (%i showers)', shards, showers)
+
+        return self._extract_results(options, outputdir, workdir)
@@ -34,7 +34,9 @@ from pymontecarlo.options.limit import ShowersLimit
 from pymontecarlo.options.detector import TrajectoryDetector
 
 from pymontecarlo.program._penelope.exporter import \
-    Exporter as _Exporter, Keyword, Comment
+    Exporter as _Exporter, Keyword, Comment, GROUPING_LINEAR
+from pymontecarlo.program._penelope.cache import create_material_cache
+from pymontecarlo.program._penelope.settings import _parse_bool
 
 # Globals and constants variables.
 MAX_PHOTON_DETECTORS = 25 # Set in penepma.f
@@ -76,10 +78,16 @@ class Exporter(_Exporter):
         Creates a exporter to PENSHOWER.
         """
         try:
-            pendbase = get_settings().penepma.pendbase
+            section = get_settings().penepma
         except AttributeError:
-            pendbase = None
-        _Exporter.__init__(self, pendbase)
+            section = None
+        pendbase = getattr(section, 'pendbase', None)
+        material_cache = create_material_cache(section)
+        max_workers = int(getattr(section, 'matworkers', 1))
+        grouping = getattr(section, 'grouping', GROUPING_LINEAR)
+        tight_bounds = _parse_bool(getattr(section, 'tightbounds', False))
+        _Exporter.__init__(self, pendbase, material_cache, max_workers,
+                           grouping, tight_bounds)
 
         self._beam_exporters[GaussianBeam] = self._export_dummy
 
@@ -12,6 +12,9 @@ __license__ = "GPL v3"
 import unittest
 import logging
 import os
+import tempfile
+import shutil
+from zipfile import ZipFile
 
 # Third party modules.
 
@@ -65,6 +68,30 @@ class TestImporter(TestCase):
         self.assertEqual(577, len(trajectory.interactions))
         self.assertEqual(5, trajectory.interactions.shape[1])
 
+    def test_detector_trajectory_zip(self):
+        ops = Options(name='test1')
+        ops.beam.energy_eV = 20e3
+        ops.detectors['trajectories'] = TrajectoryDetector(50)
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            zipfilepath = os.path.join(tmpdir, 'test1.zip')
+            with ZipFile(zipfilepath, 'w') as z:
+                z.write(os.path.join(self.testdata, 'pe-trajectories.dat'),
+                        'pe-trajectories.dat')
+
+            resultcontainer = self.i.import_(ops, zipfilepath)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        self.assertEqual(559, len(resultcontainer['trajectories']))
+
+    def testiter_trajectory_tables(self):
+        tables = list(self.i.iter_trajectory_tables(self.testdata, 100))
+
+        self.assertEqual(6, len(tables))
+        self.assertEqual(559, sum(len(table) for table in tables))
+
 if __name__ == '__main__': #pragma: no cover
     logging.getLogger().setLevel(logging.DEBUG)
     unittest.main()
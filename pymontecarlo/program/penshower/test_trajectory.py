@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+""" """
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import io
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.testcase import TestCase
+
+from pymontecarlo.program.importer import ImporterException
+from pymontecarlo.program.penshower.trajectory import \
+    (TrajectoryTable, ChunkedTrajectoryTable, iter_trajectory_tables,
+     read_trajectory_table, read_trajectory_tables)
+
+# Globals and constants variables.
+from pymontecarlo.options.particle import ELECTRON
+from pymontecarlo.options.collision import NO_COLLISION
+from pymontecarlo.results.result import EXIT_STATE_ABSORBED
+
+_TRAJECTORY = b'\n'.join([b'0' * 80, b'TRAJ          1', b'KPAR          1',
+                          b'PARENT        0', b'ICOL          0', b'EXIT          3',
+                          b'1' * 80, b' 0.0 0.0 0.1 2.0E+04 1.0 1 0', b'%s',
+                          b'0' * 80, b''])
+
+class TestTrajectoryTable(TestCase):
+
+    def setUp(self):
+        TestCase.setUp(self)
+
+        self.filepath = os.path.join(os.path.dirname(__file__),
+                                     'testdata', 'test1', 'pe-trajectories.dat')
+
+    def tearDown(self):
+        TestCase.tearDown(self)
+
+    def testread_trajectory_table(self):
+        table = read_trajectory_table(self.filepath)
+
+        self.assertEqual(559, len(table))
+        self.assertEqual(560, len(table.offsets))
+        self.assertEqual(len(table.interactions), table.offsets[-1])
+        self.assertEqual(1, table.indices[0])
+
+        trajectory = table[0]
+        self.assertTrue(trajectory.is_primary())
+        self.assertIs(ELECTRON, trajectory.particle)
+        self.assertIs(NO_COLLISION, trajectory.collision)
+        self.assertEqual(EXIT_STATE_ABSORBED, trajectory.exit_state)
+        self.assertEqual(577, len(trajectory.interactions))
+        self.assertEqual(5, trajectory.interactions.shape[1])
+        self.assertAlmostEqual(0.1, trajectory.interactions[0, 2], 4)
+        self.assertAlmostEqual(2e4, trajectory.interactions[0, 3], 4)
+
+    def testiter_trajectory_tables(self):
+        tables = list(iter_trajectory_tables(self.filepath, 100))
+
+        self.assertEqual(6, len(tables))
+        self.assertEqual(100, len(tables[0]))
+        self.assertEqual(59, len(tables[-1]))
+
+        table = TrajectoryTable.concatenate(tables)
+        expected = read_trajectory_table(self.filepath)
+
+        self.assertEqual(len(expected), len(table))
+        self.assertTrue((expected.offsets == table.offsets).all())
+        self.assertTrue((expected.interactions == table.interactions).all())
+        self.assertTrue((expected.primaries == table.primaries).all())
+
+    def testread_trajectory_tables(self):
+        table = read_trajectory_tables(self.filepath, 100)
+        expected = read_trajectory_table(self.filepath)
+
+        self.assertEqual(6, len(table.tables))
+        self.assertEqual(len(expected), len(table))
+
+        for index in [0, 99, 100, 558, -1]:
+            self.assertTrue((expected[index].interactions == table[index].interactions).all())
+            self.assertIs(expected[index].particle, table[index].particle)
+        self.assertEqual(3, len(table[98:101]))
+        self.assertRaises(IndexError, table.__getitem__, 559)
+
+    def testiter_trajectory_tables_invalid(self):
+        fp = io.BytesIO(_TRAJECTORY % b' 0.0 0.0 0.2 1.9E+04 1.0 1 2')
+        self.assertEqual(2, len(read_trajectory_table(fp).interactions))
+
+        # Invalid value
+        fp = io.BytesIO(_TRAJECTORY % b' 0.0 0.0 ***** 1.9E+04 1.0 1 2')
+        self.assertRaises(ImporterException, read_trajectory_table, fp)
+
+        # Missing value
+        fp = io.BytesIO(_TRAJECTORY % b' 0.0 0.0 0.2 1.9E+04 1.0 1')
+        self.assertRaises(ImporterException, read_trajectory_table, fp)
+
+    def testchunked_empty(self):
+        table = ChunkedTrajectoryTable([])
+        self.assertEqual(0, len(table))
+        self.assertEqual([], list(table))
+
+    def testconcatenate_empty(self):
+        table = TrajectoryTable.concatenate([])
+        self.assertEqual(0, len(table))
+        self.assertEqual((0, 5), table.interactions.shape)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
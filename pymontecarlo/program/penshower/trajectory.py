@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+"""
+================================================================================
+:mod:`trajectory` -- Columnar storage and streaming reader of trajectories
+================================================================================
+
+.. module:: trajectory
+   :synopsis: Columnar storage and streaming reader of trajectories
+
+.. inheritance-diagram:: pymontecarlo.program.penshower.trajectory
+
+"""
+
+# Script information for the file.
+__author__ = "Philippe T. Pinard"
+__email__ = "philippe.pinard@gmail.com"
+__version__ = "0.1"
+__copyright__ = "Copyright (c) 2014 Philippe T. Pinard"
+__license__ = "GPL v3"
+
+# Standard library modules.
+import io
+from bisect import bisect_right
+from collections.abc import Sequence
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pymontecarlo.results.result import Trajectory
+from pymontecarlo.program.importer import ImporterException
+from pymontecarlo.options.particle import ELECTRON, PHOTON, POSITRON
+from pymontecarlo.options.collision import \
+    (NO_COLLISION, DELTA, SOFT_EVENT, HARD_ELASTIC, HARD_INELASTIC,
+     HARD_BREMSSTRAHLUNG_EMISSION, INNERSHELL_IMPACT_IONISATION,
+     COHERENT_RAYLEIGH_SCATTERING, INCOHERENT_COMPTON_SCATTERING,
+     PHOTOELECTRIC_ABSORPTION, ELECTRON_POSITRON_PAIR_PRODUCTION, ANNIHILATION)
+
+# Globals and constants variables.
+_PARTICLES_REF = {1: ELECTRON, 2: PHOTON, 3: POSITRON}
+_COLLISIONS_REF = {ELECTRON: {1: SOFT_EVENT,
+                              2: HARD_ELASTIC,
+                              3: HARD_INELASTIC,
+                              4: HARD_BREMSSTRAHLUNG_EMISSION,
+                              5: INNERSHELL_IMPACT_IONISATION,
+                              7: DELTA},
+                   PHOTON: {1: COHERENT_RAYLEIGH_SCATTERING,
+                            2: INCOHERENT_COMPTON_SCATTERING,
+                            3: PHOTOELECTRIC_ABSORPTION,
+                            4: ELECTRON_POSITRON_PAIR_PRODUCTION,
+                            7: DELTA},
+                   POSITRON: {1: SOFT_EVENT,
+                              2: HARD_ELASTIC,
+                              3: HARD_INELASTIC,
+                              4: HARD_BREMSSTRAHLUNG_EMISSION,
+                              5: INNERSHELL_IMPACT_IONISATION,
+                              6: ANNIHILATION,
+                              7: DELTA}}
+
+# Lookup table: KPAR -> PENELOPE ICOL -> int(collision)
+_MAX_ICOL = 8
+_COLLISIONS_LOOKUP = np.full((4, _MAX_ICOL), int(NO_COLLISION), dtype=np.int8)
+for _kpar, _particle in _PARTICLES_REF.items():
+    for _icol, _collision in _COLLISIONS_REF[_particle].items():
+        _COLLISIONS_LOOKUP[_kpar, _icol] = int(_collision)
+
+_LINE_SEPARATOR = b'0' * 80
+_LINE_HEADER_END = b'1' * 80
+
+class TrajectoryTable(Sequence):
+
+    def __init__(self, indices, particles, collisions, exit_states, primaries,
+                 offsets, interactions):
+        """
+        Compact storage of trajectories.
+
+        The interactions of all trajectories are concatenated in a single
+        array. The interactions of the i-th trajectory are located between
+        ``offsets[i]`` and ``offsets[i + 1]``.
+        The other properties of the trajectories are stored as columns
+        (one value per trajectory), using the PENELOPE codes for the particle
+        (``KPAR``) and the collision (``ICOL``).
+
+        :class:`Trajectory` objects are only created when an item is
+        accessed, so the table can be wrapped by a
+        :class:`TrajectoryResult`.
+
+        :arg indices: index of each trajectory
+        :arg particles: type of particle (KPAR) of each trajectory
+        :arg collisions: type of collision (ICOL) that created each trajectory
+        :arg exit_states: exit state of each trajectory
+        :arg primaries: whether each trajectory is a primary trajectory
+        :arg offsets: array of length ``n + 1`` of the first interaction of
+            each trajectory
+        :arg interactions: array of shape ``(m, 5)`` with the position (in m),
+            energy (in eV) and collision of each interaction
+        """
+        self._indices = np.asarray(indices, dtype=np.int64)
+        self._particles = np.asarray(particles, dtype=np.int8)
+        self._collisions = np.asarray(collisions, dtype=np.int8)
+        self._exit_states = np.asarray(exit_states, dtype=np.int8)
+        self._primaries = np.asarray(primaries, dtype=np.bool_)
+        self._offsets = np.asarray(offsets, dtype=np.int64)
+        self._interactions = np.asarray(interactions, dtype=np.float64).reshape(-1, 5)
+
+        if len(self._offsets) != len(self._indices) + 1:
+            raise ValueError('Offsets must have one more item than trajectories')
+
+    def __repr__(self):
+        return '<%s(%i trajectories, %i interactions)>' % \
+            (self.__class__.__name__, len(self), len(self._interactions))
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('Trajectory index out of range')
+
+        particle = _PARTICLES_REF[int(self._particles[index])]
+        collision = _COLLISIONS_REF[particle].get(int(self._collisions[index]),
+                                                  NO_COLLISION)
+        start, end = self._offsets[index], self._offsets[index + 1]
+
+        return Trajectory(bool(self._primaries[index]), particle, collision,
+                          int(self._exit_states[index]),
+                          self._interactions[start:end])
+
+    @classmethod
+    def concatenate(cls, tables):
+        """
+        Returns a new table containing the trajectories of all *tables*.
+        """
+        tables = list(tables)
+        if not tables:
+            return cls([], [], [], [], [], [0], np.empty((0, 5)))
+
+        offsets = [tables[0].offsets]
+        for table in tables[1:]:
+            offsets.append(table.offsets[1:] + offsets[-1][-1])
+
+        return cls(np.concatenate([t.indices for t in tables]),
+                   np.concatenate([t.particles for t in tables]),
+                   np.concatenate([t.collisions for t in tables]),
+                   np.concatenate([t.exit_states for t in tables]),
+                   np.concatenate([t.primaries for t in tables]),
+                   np.concatenate(offsets),
+                   np.concatenate([t.interactions for t in tables]))
+
+    @property
+    def indices(self):
+        """
+        Index of each trajectory.
+        """
+        return self._indices
+
+    @property
+    def particles(self):
+        """
+        Type of particle (PENELOPE code) of each trajectory.
+        """
+        return self._particles
+
+    @property
+    def collisions(self):
+        """
+        Type of collision (PENELOPE code) that created each trajectory.
+        """
+        return self._collisions
+
+    @property
+    def exit_states(self):
+        """
+        Exit state of each trajectory.
+        """
+        return self._exit_states
+
+    @property
+    def primaries(self):
+        """
+        Whether each trajectory is a primary trajectory.
+        """
+        return self._primaries
+
+    @property
+    def offsets(self):
+        """
+        Index of the first interaction of each trajectory in
+        :attr:`interactions`. The last item is the total number of
+        interactions.
+        """
+        return self._offsets
+
+    @property
+    def interactions(self):
+        """
+        Interactions of all trajectories: x, y, z (in m), energy (in eV) and
+        collision.
+        """
+        return self._interactions
+
+class ChunkedTrajectoryTable(Sequence):
+
+    def __init__(self, tables):
+        """
+        Sequence of the trajectories of several :class:`TrajectoryTable`,
+        e.g. the chunks read by :func:`iter_trajectory_tables`.
+        The tables are not concatenated, so that no copy of the
+        trajectories is made.
+
+        :arg tables: :class:`TrajectoryTable` objects
+        """
+        self._tables = [table for table in tables if len(table)]
+
+        self._starts = [0]
+        for table in self._tables:
+            self._starts.append(self._starts[-1] + len(table))
+
+    def __repr__(self):
+        return '<%s(%i trajectories, %i tables)>' % \
+            (self.__class__.__name__, len(self), len(self._tables))
+
+    def __len__(self):
+        return self._starts[-1]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('Trajectory index out of range')
+
+        i = bisect_right(self._starts, index) - 1
+        return self._tables[i][index - self._starts[i]]
+
+    @property
+    def tables(self):
+        """
+        Tables of the trajectories.
+        """
+        return list(self._tables)
+
+def _create_table(headers, lengths, lines):
+    """
+    Creates a :class:`TrajectoryTable` from the parsed headers, the number of
+    interactions of each trajectory and the raw interaction lines.
+    Raises :exc:`ImporterException` if a line is not made of 7 numerical
+    values.
+    """
+    headers = np.array(headers, dtype=np.int64).reshape(-1, 5)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    # Columns: X, Y, Z, E, WGHT, IBODY, ICOL
+    if lines:
+        try:
+            values = np.loadtxt(io.BytesIO(b'\n'.join(lines)), ndmin=2)
+        except ValueError as ex:
+            raise ImporterException('Invalid interaction in trajectory file: %s' % ex)
+    else:
+        values = np.empty((0, 7))
+
+    if values.shape != (offsets[-1], 7):
+        raise ImporterException('Expected %i interactions with 7 values, got %i with %i' % \
+                                (offsets[-1], values.shape[0], values.shape[1]))
+
+    interactions = np.empty((len(values), 5))
+    interactions[:, :3] = values[:, :3] * 0.01 # cm to m
+    interactions[:, 3] = values[:, 3]
+
+    kpars = np.repeat(headers[:, 1], lengths)
+    icols = values[:, 6].astype(np.int64)
+    icols[(icols < 0) | (icols >= _MAX_ICOL)] = 0
+    interactions[:, 4] = _COLLISIONS_LOOKUP[kpars, icols]
+
+    return TrajectoryTable(headers[:, 0], headers[:, 1], headers[:, 3],
+                           headers[:, 4], headers[:, 2] == 0,
+                           offsets, interactions)
+
+def iter_trajectory_tables(filepath, chunksize=10000):
+    """
+    Reads a PENSHOWER trajectory file (:file:`pe-trajectories.dat`) and
+    yields :class:`TrajectoryTable` of at most *chunksize* trajectories.
+    Only one chunk is kept in memory at a time.
+
+    :arg filepath: path or binary file object of the trajectory file
+    :arg chunksize: maximum number of trajectories per table
+    """
+    if hasattr(filepath, 'read'):
+        for table in _iter_tables(filepath, chunksize):
+            yield table
+        return
+
+    with open(filepath, 'rb') as fp:
+        for table in _iter_tables(fp, chunksize):
+            yield table
+
+def _iter_tables(fp, chunksize):
+    headers = [] # TRAJ, KPAR, PARENT, ICOL, EXIT of each trajectory
+    lengths = []
+    lines = []
+
+    header = None
+    length = 0
+
+    for line in fp:
+        line = line.strip()
+        if not line or line.startswith(b'#'):
+            continue
+
+        if line == _LINE_SEPARATOR:
+            if header is None:
+                continue
+
+            headers.extend(header)
+            lengths.append(length)
+            header = None
+            length = 0
+
+            if len(lengths) >= chunksize:
+                yield _create_table(headers, lengths, lines)
+                headers = []
+                lengths = []
+                lines = []
+        elif line == _LINE_HEADER_END:
+            continue
+        elif line.startswith(b'TRAJ'):
+            header = [int(line.split()[1]), 0, 0, 0, 0]
+        elif line.startswith(b'KPAR'):
+            header[1] = int(line.split()[1])
+        elif line.startswith(b'PARENT'):
+            header[2] = int(line.split()[1])
+        elif line.startswith(b'ICOL'):
+            header[3] = int(line.split()[1])
+        elif line.startswith(b'EXIT'):
+            header[4] = int(line.split()[1])
+        else:
+            lines.append(line)
+            length += 1
+
+    if lengths:
+        yield _create_table(headers, lengths, lines)
+
+def read_trajectory_table(filepath, chunksize=10000):
+    """
+    Reads all trajectories of a PENSHOWER trajectory file in a single
+    :class:`TrajectoryTable`.
+    While the chunks are concatenated, the trajectories are held twice in
+    memory (see :func:`read_trajectory_tables`).
+    """
+    return TrajectoryTable.concatenate(iter_trajectory_tables(filepath, chunksize))
+
+def read_trajectory_tables(filepath, chunksize=10000):
+    """
+    Reads all trajectories of a PENSHOWER trajectory file in a
+    :class:`ChunkedTrajectoryTable`, without concatenating the chunks.
+    All trajectories are still held in memory; to process files larger than
+    the memory, use :func:`iter_trajectory_tables`.
+    """
+    return ChunkedTrajectoryTable(iter_trajectory_tables(filepath, chunksize))
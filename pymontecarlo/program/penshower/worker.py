@@ -29,16 +29,40 @@ import logging
 from pymontecarlo.settings import get_settings
 from pymontecarlo.options.limit import ShowersLimit
 from pymontecarlo.program._penelope.worker import Worker as _Worker
+from pymontecarlo.program._penelope.archive import create_archiver
+from pymontecarlo.program._penelope.timing import span
 
 # Globals and constants variables.
 
+def parse_progress(line, showers_limit):
+    """
+    Parses a line of PENSHOWER standard output and returns a :class:`tuple`
+    of the status and progress. The progress is ``None`` if the line does not
+    report it.
+    Raises :exc:`RuntimeError` if PENSHOWER reports an error.
+
+    :arg line: line of the standard output (:class:`bytes`)
+    :arg showers_limit: number of showers to simulate
+    """
+    infos = line.decode('ascii').split(',')
+    if len(infos) == 1:
+        status = infos[0].strip()
+        if status.startswith('STOP'):
+            raise RuntimeError("The following error occurred during the simulation: %s" % status)
+        return status, None
+    elif len(infos) == 2:
+        return 'Running', max(0.001, float(infos[0]) / showers_limit)
+
+    return None, None
+
 class Worker(_Worker):
 
     def __init__(self, program):
         """
         Runner to run PENSHOWER simulation(s).
         """
-        _Worker.__init__(self, program)
+        _Worker.__init__(self, program,
+                         create_archiver(get_settings().penshower))
 
         self._executable = get_settings().penshower.exe
         if not os.path.isfile(self._executable):
@@ -46,7 +70,13 @@ class Worker(_Worker):
         logging.debug('PENSHOWER executable: %s', self._executable)
 
     def run(self, options, outputdir, workdir, *args, **kwargs):
-        infilepath = self.create(options, workdir, createdir=False)
+        timinglog = kwargs.get('timinglog', getattr(get_settings().penshower, 'timinglog', None))
+        return self._run_timed(options, outputdir, timinglog,
+                               self._run, options, outputdir, workdir, *args, **kwargs)
+
+    def _run(self, options, outputdir, workdir, *args, **kwargs):
+        with span('export'):
+            infilepath = self.create(options, workdir, createdir=False)
 
         # Extract limit
         limits = list(options.limits.iterclass(ShowersLimit))
@@ -60,17 +90,15 @@ class Worker(_Worker):
         self._status = 'Running PENSHOWER'
         self._progress = 0.001 # Ensure that the simulation has started
 
-        with self._create_process(args, stdin=stdin, stdout=subprocess.PIPE,
-                                  stderr=subprocess.STDOUT, cwd=workdir) as process:
+        with span('run'), \
+                self._create_process(args, stdin=stdin, stdout=subprocess.PIPE,
+                                     stderr=subprocess.STDOUT, cwd=workdir) as process:
             for line in iter(process.stdout.readline, b""):
-                infos = line.decode('ascii').split(',')
-                if len(infos) == 1:
-                    self._status = infos[0].strip()
-                    if self._status.startswith('STOP'):
-                        raise RuntimeError("The following error occurred during the simulation: %s" % self._status)
-                elif len(infos) == 2:
-                    self._progress = max(0.001, float(infos[0]) / showers_limit)
-                    self._status = 'Running'
+                status, progress = parse_progress(line, showers_limit)
+                if status is not None:
+                    self._status = status
+                if progress is not None:
+                    self._progress = progress
 
         retcode = self._join_process()
 